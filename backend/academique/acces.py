@@ -0,0 +1,136 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from academique.models import Cours
+
+
+class CoursAccessIndex:
+    """Index en mémoire : id du cours → (ids des promotions, ids des encadreurs).
+
+    Rempli à la demande : un cours pour les vues (can_access), plusieurs en
+    deux requêtes via get_many (accessible_cours, contrôle des conflits
+    d'horaires). Vidé par
+    academique.signals à chaque m2m_changed sur Cours.promotions /
+    Cours.encadreurs, avant et après le commit. Le TTL borne le retard entre
+    processus, comme pour users.authentication.UserCache.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, cours_ids):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                cours_id: entry[1]
+                for cours_id in cours_ids
+                if (entry := self._data.get(cours_id)) is not None and entry[0] >= now
+            }
+
+    def _load(self, cours_ids):
+        links = {cours_id: (set(), set()) for cours_id in cours_ids}
+        promotions = Cours.promotions.through.objects.filter(
+            cours_id__in=cours_ids
+        ).values_list('cours_id', 'promotion_id')
+        for cours_id, promotion_id in promotions:
+            links[cours_id][0].add(promotion_id)
+        encadreurs = Cours.encadreurs.through.objects.filter(
+            cours_id__in=cours_ids
+        ).values_list('cours_id', 'user_id')
+        for cours_id, user_id in encadreurs:
+            links[cours_id][1].add(user_id)
+
+        entries = {
+            cours_id: (frozenset(promotion_ids), frozenset(encadreur_ids))
+            for cours_id, (promotion_ids, encadreur_ids) in links.items()
+        }
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for cours_id, entry in entries.items():
+                self._data[cours_id] = (expires, entry)
+        return entries
+
+    def get_many(self, cours_ids):
+        """{id: (promotions, encadreurs)} pour chaque cours demandé"""
+        cours_ids = {int(cours_id) for cours_id in cours_ids}
+        entries = self._fresh(cours_ids)
+        missing = cours_ids - entries.keys()
+        if missing:
+            entries.update(self._load(missing))
+        return entries
+
+    def get(self, cours_id):
+        return self.get_many([cours_id])[int(cours_id)]
+
+    def invalidate(self, *cours_ids):
+        with self._lock:
+            for cours_id in cours_ids:
+                self._data.pop(cours_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+index = CoursAccessIndex(ttl=getattr(settings, 'COURS_ACCES_TTL', 60))
+
+
+def invalider(*cours_ids):
+    """Retire des cours de l'index (tous si aucun id), tout de suite puis après le commit.
+
+    Comme core.response_cache.bump : une lecture faite entre l'écriture et
+    le commit rechargerait les anciens liens pour la durée du TTL.
+    """
+    def _invalider():
+        if cours_ids:
+            index.invalidate(*cours_ids)
+        else:
+            index.clear()
+    _invalider()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_invalider)
+
+
+def _needs_links(user, write):
+    if write:
+        return user.role == 'ENCADREUR'
+    return user.role == 'ETUDIANT'
+
+
+def _allowed(user, entry, write):
+    promotion_ids, encadreur_ids = entry
+    if write:
+        if user.role in ['ADMIN', 'COORDON']:
+            return True
+        if user.role == 'ENCADREUR':
+            return user.id in encadreur_ids
+        return False
+    if user.role == 'ETUDIANT':
+        return user.promotion_id in promotion_ids
+    return True
+
+
+def can_access(user, cours_id, write=False):
+    """Lecture (write=False) ou écriture sur un cours, sans requête si l'index est chaud"""
+    if not _needs_links(user, write):
+        return _allowed(user, (frozenset(), frozenset()), write)
+    return _allowed(user, index.get(cours_id), write)
+
+
+
+def accessible_cours(user, cours_ids, write=False):
+    """Sous-ensemble des cours que l'utilisateur peut lire (ou modifier), en un appel.
+
+    Index chaud : aucune requête ; sinon deux requêtes quel que soit le
+    nombre de cours (recherche, lots de requêtes).
+    """
+    cours_ids = {int(cours_id) for cours_id in cours_ids}
+    if not _needs_links(user, write):
+        return cours_ids if _allowed(user, (frozenset(), frozenset()), write) else set()
+    entries = index.get_many(cours_ids)
+    return {cours_id for cours_id in cours_ids if _allowed(user, entries[cours_id], write)}
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AcademiqueConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academique'
+
+    def ready(self):
+        from academique import signals  # noqa: F401
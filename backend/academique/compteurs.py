@@ -0,0 +1,66 @@
+from django.db.models import Count, F
+from django.utils import timezone
+
+from academique.models import Compteur, Cours
+from users.models import User
+
+
+CLE_COURS = 'cours'
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+
+
+def cle_role(role):
+    """Clé du compteur des utilisateurs d'un rôle (ex: 'user:ETUDIANT')"""
+    return f'user:{role}'
+
+
+TOUTES_LES_CLES = [cle_role(role) for role in ROLES] + [CLE_COURS]
+
+
+def _compter():
+    """Recompte toutes les valeurs depuis les tables de base (2 requêtes)"""
+    valeurs = {cle: 0 for cle in TOUTES_LES_CLES}
+    for row in User.objects.values('role').annotate(n=Count('id')):
+        if row['role'] in ROLES:
+            valeurs[cle_role(row['role'])] = row['n']
+    valeurs[CLE_COURS] = Cours.objects.count()
+    return valeurs
+
+
+def recalculer():
+    """Reconstruit la table des compteurs et retourne les valeurs"""
+    now = timezone.now()
+    valeurs = _compter()
+    for cle, valeur in valeurs.items():
+        Compteur.objects.update_or_create(
+            cle=cle,
+            defaults={'valeur': valeur, 'date_recalcul': now},
+        )
+    return valeurs
+
+
+def incrementer(cle, delta):
+    """Applique `delta` au compteur de manière atomique (UPDATE ... SET valeur = valeur + delta)"""
+    if cle not in TOUTES_LES_CLES or delta == 0:
+        return
+    updated = Compteur.objects.filter(cle=cle).update(
+        valeur=F('valeur') + delta,
+        date_maj=timezone.now(),
+    )
+    if not updated:
+        # Table jamais initialisée : on repart d'un comptage complet
+        recalculer()
+
+
+def lire():
+    """Retourne (valeurs, date_recalcul, date_maj) en une lecture par clé primaire"""
+    compteurs = list(Compteur.objects.filter(cle__in=TOUTES_LES_CLES))
+    if len(compteurs) != len(TOUTES_LES_CLES):
+        recalculer()
+        compteurs = list(Compteur.objects.filter(cle__in=TOUTES_LES_CLES))
+
+    valeurs = {c.cle: c.valeur for c in compteurs}
+    date_recalcul = min(c.date_recalcul for c in compteurs)
+    date_maj = max(c.date_maj for c in compteurs)
+    return valeurs, date_recalcul, date_maj
+
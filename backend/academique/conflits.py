@@ -0,0 +1,191 @@
+import heapq
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Q
+
+from academique import acces
+from academique.models import Cours, Horaire
+from academique.queries import horaires_fenetre
+
+
+# Clé du verrou consultatif PostgreSQL qui sérialise les écritures d'horaires
+VERROU_HORAIRES = 0x686f7261
+
+# Sans date_fin, un horaire est ponctuel : il occupe son seul instant de début
+INSTANT = timedelta(microseconds=1)
+
+# `ref` : ('plan', index) pour une ligne du plan, ('horaire', id) pour la base
+Creneau = namedtuple('Creneau', ['ref', 'debut', 'fin', 'lieu', 'promotion_id', 'cours_id'])
+
+
+class ConflitHoraire(Exception):
+    """Créneau déjà occupé : `conflits` comme renvoyé par conflits_horaire"""
+
+    def __init__(self, conflits):
+        super().__init__("Conflit d'horaire")
+        self.conflits = conflits
+
+
+def ecriture_concurrente(exc):
+    """OperationalError due à une autre écriture (SQLite : base verrouillée)"""
+    return 'database is locked' in str(exc)
+
+
+def fin_effective(debut, fin):
+    return fin if fin and fin > debut else debut + INSTANT
+
+
+def cle_lieu(lieu):
+    lieu = (lieu or '').strip()
+    return lieu.casefold() if lieu else None
+
+
+def ressources(creneau, encadreurs):
+    """Clés des ressources occupées : lieu, promotion, chaque encadreur du cours"""
+    cles = []
+    if cle_lieu(creneau.lieu):
+        cles.append(('lieu', cle_lieu(creneau.lieu)))
+    if creneau.promotion_id:
+        cles.append(('promotion', creneau.promotion_id))
+    for encadreur_id in encadreurs.get(creneau.cours_id, ()):
+        cles.append(('encadreur', encadreur_id))
+    return cles
+
+
+def _encadreurs(cours_ids, frais=False):
+    """{cours: encadreurs} ; `frais` : lus dans la table de liaison plutôt que
+    dans l'index des droits (academique.acces), en retard d'au plus son TTL"""
+    cours_ids = {cours_id for cours_id in cours_ids if cours_id}
+    if not frais:
+        return {cours_id: entry[1] for cours_id, entry in acces.index.get_many(cours_ids).items()}
+    result = {cours_id: set() for cours_id in cours_ids}
+    liens = Cours.encadreurs.through.objects.filter(cours_id__in=cours_ids).values_list('cours_id', 'user_id')
+    for cours_id, user_id in liens:
+        result[cours_id].add(user_id)
+    return {cours_id: frozenset(ids) for cours_id, ids in result.items()}
+
+
+def verrouiller():
+    """Sérialise les écritures d'horaires jusqu'à la fin de la transaction courante.
+
+    PostgreSQL : verrou consultatif de transaction. SQLite sérialise déjà
+    les écritures : une création concurrente échoue au lieu de passer.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [VERROU_HORAIRES])
+
+
+def _creneau_base(row):
+    return Creneau(
+        ('horaire', row['id']), row['date_debut'], fin_effective(row['date_debut'], row['date_fin']),
+        row['lieu'], row['promotion_id'], row['cours_id'],
+    )
+
+
+CHAMPS = ('id', 'titre', 'date_debut', 'date_fin', 'lieu', 'promotion_id', 'cours_id')
+
+
+def conflits_horaire(debut, fin, lieu=None, promotion_id=None, cours_id=None, exclude_id=None):
+    """Horaires existants en conflit avec un créneau (création ou modification).
+
+    Une requête de plage sur l'index (promotion, date_debut) : O(log n + k)
+    au lieu d'un parcours de la table. Renvoie une liste de dicts avec les
+    ressources en conflit (lieu, promotion, encadreur). Contrôle d'écriture :
+    les encadreurs sont lus dans la table de liaison, pas dans l'index.
+    """
+    fin = fin_effective(debut, fin)
+    nouveau = Creneau(None, debut, fin, lieu, promotion_id, cours_id)
+    encadreurs_nouveau = _encadreurs([cours_id], frais=True).get(cours_id, frozenset())
+
+    concerne = Q(promotion_id=promotion_id) if promotion_id else Q(pk__in=[])
+    if cle_lieu(lieu):
+        concerne |= Q(lieu__iexact=lieu.strip())
+    if encadreurs_nouveau:
+        concerne |= Q(cours__encadreurs__in=encadreurs_nouveau)
+
+    candidats = horaires_fenetre(Horaire.objects.filter(concerne), debut, fin)
+    if exclude_id is not None:
+        candidats = candidats.exclude(pk=exclude_id)
+    rows = list(candidats.distinct().values(*CHAMPS))
+
+    encadreurs = _encadreurs([row['cours_id'] for row in rows], frais=True)
+    encadreurs[cours_id] = encadreurs_nouveau
+    occupees = set(ressources(nouveau, encadreurs))
+
+    conflits = []
+    for row in rows:
+        existant = _creneau_base(row)
+        if not (existant.debut < fin and debut < existant.fin):
+            continue
+        communes = sorted({cle[0] for cle in ressources(existant, encadreurs) if cle in occupees})
+        if communes:
+            conflits.append({
+                'horaire': row['id'],
+                'titre': row['titre'],
+                'date_debut': row['date_debut'],
+                'date_fin': row['date_fin'],
+                'ressources': communes,
+            })
+    return conflits
+
+
+def _balayage(creneaux):
+    """Paires de créneaux qui se chevauchent : tri + tas des fins, O(n log n + k)"""
+    actifs = []
+    for creneau in sorted(creneaux, key=lambda c: (c.debut, c.fin)):
+        while actifs and actifs[0][0] <= creneau.debut:
+            heapq.heappop(actifs)
+        for _, _, autre in actifs:
+            yield autre, creneau
+        heapq.heappush(actifs, (creneau.fin, id(creneau), creneau))
+
+
+def conflits_plan(lignes):
+    """Tous les conflits d'un plan (semestre) : entre ses lignes et avec la base.
+
+    `lignes` : dicts validés (date_debut, date_fin, lieu, promotion,
+    cours, id optionnel pour une modification). Une requête pour les
+    horaires existants de la période, un balayage par ressource.
+    """
+    if not lignes:
+        return []
+
+    plan = []
+    for index, ligne in enumerate(lignes):
+        debut = ligne['date_debut']
+        plan.append(Creneau(
+            ('plan', index), debut, fin_effective(debut, ligne.get('date_fin')),
+            ligne.get('lieu'), ligne.get('promotion'), ligne.get('cours'),
+        ))
+
+    remplaces = [ligne['id'] for ligne in lignes if ligne.get('id')]
+    existants = horaires_fenetre(
+        Horaire.objects.exclude(pk__in=remplaces),
+        min(c.debut for c in plan), max(c.fin for c in plan),
+    ).values(*CHAMPS)
+    base = [_creneau_base(row) for row in existants.iterator(chunk_size=2000)]
+
+    encadreurs = _encadreurs([c.cours_id for c in plan + base])
+    par_ressource = defaultdict(list)
+    for creneau in plan + base:
+        for cle in ressources(creneau, encadreurs):
+            par_ressource[cle].append(creneau)
+
+    conflits = []
+    for (type_ressource, valeur), creneaux in par_ressource.items():
+        if not any(c.ref[0] == 'plan' for c in creneaux):
+            continue
+        for a, b in _balayage(creneaux):
+            # Les conflits déjà présents en base ne concernent pas ce plan
+            if a.ref[0] == 'horaire' and b.ref[0] == 'horaire':
+                continue
+            conflits.append({
+                'ressource': type_ressource,
+                'valeur': a.lieu.strip() if type_ressource == 'lieu' else valeur,
+                'a': {a.ref[0]: a.ref[1]},
+                'b': {b.ref[0]: b.ref[1]},
+            })
+    return conflits
@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.utils import timezone
+
+from academique import compteurs, tendances
+from academique.models import Horaire, Promotion
+from academique.queries import horaires_fenetre
+from core import response_cache
+from users.models import User
+
+
+CHAMPS_MEMBRE = ('id', 'email', 'first_name', 'last_name', 'telephone', 'photo')
+CHAMPS_HORAIRE = (
+    'id', 'titre', 'date_debut', 'date_fin', 'lieu', 'cours__titre', 'promotion__name', 'promotion_id',
+)
+NB_HORAIRES = 10
+
+# Section -> scopes du cache des réponses dont elle dépend
+SECTIONS = {
+    'overview': ('user', 'cours'),
+    'enrollment_trend': ('user', 'cours'),
+    'coordons': ('user',),
+    'encadreurs': ('user',),
+    'horaires': ('horaire', 'cours', 'promotion'),
+    'promotions': ('promotion',),
+}
+ROLES_MEMBRES = {'coordons': 'COORDON', 'encadreurs': 'ENCADREUR'}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================
+# SECTIONS (partagées avec les endpoints stats/ et promotions/)
+# ============================================
+
+def overview():
+    """Compteurs matérialisés (academique.compteurs), sans l'âge calculé à la lecture"""
+    valeurs, date_recalcul, date_maj = compteurs.lire()
+    return {
+        'coordons': valeurs[compteurs.cle_role('COORDON')],
+        'encadreurs': valeurs[compteurs.cle_role('ENCADREUR')],
+        'etudiants': valeurs[compteurs.cle_role('ETUDIANT')],
+        'cours': valeurs[compteurs.CLE_COURS],
+        # Fraîcheur des compteurs : dernier recalcul complet et dernière mise à jour
+        'date_recalcul': date_recalcul,
+        'date_maj': date_maj,
+    }
+
+
+def avec_age(data):
+    return {**data, 'age_secondes': int((timezone.now() - data['date_recalcul']).total_seconds())}
+
+
+def debut_tendance(nb_mois):
+    return tendances.mois_decale(tendances.mois_de(timezone.now()), -nb_mois)
+
+
+def tendance(debut, promotion_id=None, par_promotion=False):
+    """Séries des étudiants et des cours en une requête sur les agrégats mensuels"""
+    series = tendances.lire_series([tendances.ETUDIANTS, tendances.COURS], debut, promotion_id, par_promotion)
+    return {'etudiants': series[tendances.ETUDIANTS], 'cours': series[tendances.COURS]}
+
+
+def membres(roles, promotion_id=None):
+    """Utilisateurs de plusieurs rôles en une requête : {role: [lignes]}"""
+    queryset = User.objects.filter(role__in=roles)
+    if promotion_id is not None:
+        queryset = queryset.filter(promotion_id=promotion_id)
+    result = {role: [] for role in roles}
+    for row in queryset.values('role', *CHAMPS_MEMBRE):
+        result[row.pop('role')].append(row)
+    return result
+
+
+def prochains_horaires(promotion_id=None, start=None, end=None):
+    """Les NB_HORAIRES prochains horaires (en cours ou à venir depuis `start`)"""
+    queryset = horaires_fenetre(Horaire.objects.all(), start or timezone.now(), end)
+    if promotion_id is not None:
+        queryset = queryset.filter(promotion_id=promotion_id)
+    return list(queryset.values(*CHAMPS_HORAIRE).order_by('date_debut')[:NB_HORAIRES])
+
+
+def promotions():
+    return list(Promotion.objects.all().values('id', 'name', 'annee'))
+
+
+# ============================================
+# TABLEAU DE BORD COMPOSÉ
+# ============================================
+
+def _pas_termine(row, now):
+    return row['date_debut'] >= now or (row['date_fin'] is not None and row['date_fin'] > now)
+
+
+def tableau(noms, promotion_id=None, tendance_promotion_id=None, nb_mois=6, par_promotion=False):
+    """Sections demandées, chacune en cache sous ses propres scopes.
+
+    `promotion_id` filtre les listes (membres, horaires) ;
+    `tendance_promotion_id` est le filtre explicite de la tendance, comme
+    sur stats/enrollment-trend/. Les sections manquantes du cache sont
+    calculées ensemble : coordons et encadreurs en une seule requête.
+    """
+    timeout = _setting('DASHBOARD_CACHE_TIMEOUT', 300)
+    cle_promotion = promotion_id if promotion_id is not None else 'all'
+    roles = [ROLES_MEMBRES[nom] for nom in noms if nom in ROLES_MEMBRES]
+    lot_membres = {}
+
+    def membres_du_role(role):
+        if not lot_membres:
+            lot_membres.update(membres(roles, promotion_id))
+        return lot_membres[role]
+
+    debut = debut_tendance(nb_mois)
+    builders = {
+        'overview': ((), overview),
+        'enrollment_trend': (
+            (debut, tendance_promotion_id, par_promotion),
+            lambda: tendance(debut, tendance_promotion_id, par_promotion),
+        ),
+        'coordons': ((cle_promotion,), lambda: membres_du_role('COORDON')),
+        'encadreurs': ((cle_promotion,), lambda: membres_du_role('ENCADREUR')),
+        'horaires': ((cle_promotion,), lambda: prochains_horaires(promotion_id)),
+        'promotions': ((), promotions),
+    }
+
+    result = {}
+    for nom in noms:
+        variant, build = builders[nom]
+        result[nom] = response_cache.cached_data(
+            f'dashboard:{nom}', scopes=SECTIONS[nom], variant=variant or ('all',), build=build,
+            # Les prochains horaires dépendent aussi de l'heure : durée de vie courte
+            timeout=_setting('DASHBOARD_HORAIRES_TIMEOUT', 60) if nom == 'horaires' else timeout,
+        )
+
+    if 'overview' in result:
+        result['overview'] = avec_age(result['overview'])
+    if 'horaires' in result:
+        # Retire ceux terminés depuis la mise en cache
+        now = timezone.now()
+        result['horaires'] = [row for row in result['horaires'] if _pas_termine(row, now)]
+    return result
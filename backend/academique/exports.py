@@ -0,0 +1,94 @@
+from academique.models import Cours, Horaire
+from core.exports import chunk_size
+from users.models import User
+
+
+USER_HEADER = [
+    'id', 'email', 'prenom', 'nom', 'telephone', 'role', 'promotion', 'actif', 'date_inscription',
+]
+COURS_HEADER = ['id', 'titre', 'description', 'promotions', 'encadreurs', 'date_creation']
+HORAIRE_HEADER = [
+    'id', 'titre', 'cours', 'promotion', 'date_debut', 'date_fin', 'lieu', 'description',
+]
+
+
+def user_rows(queryset):
+    """Lignes d'export des utilisateurs : projection values_list, lecture par blocs"""
+    return queryset.order_by('id').values_list(
+        'id', 'email', 'first_name', 'last_name', 'telephone',
+        'role', 'promotion__name', 'is_active', 'date_joined',
+    ).iterator(chunk_size=chunk_size())
+
+
+def horaire_rows(queryset):
+    return queryset.order_by('date_debut', 'id').values_list(
+        'id', 'titre', 'cours__titre', 'promotion__name',
+        'date_debut', 'date_fin', 'lieu', 'description',
+    ).iterator(chunk_size=chunk_size())
+
+
+def _links(through, ids, column, label):
+    """{cours_id: 'a, b'} pour un bloc de cours, en une requête"""
+    names = {}
+    rows = through.objects.filter(cours_id__in=ids).values_list('cours_id', *label).order_by(column)
+    for cours_id, *parts in rows:
+        names.setdefault(cours_id, []).append(' '.join(part or '' for part in parts).strip())
+    return {cours_id: ', '.join(values) for cours_id, values in names.items()}
+
+
+def cours_rows(queryset):
+    """Lignes d'export des cours ; promotions et encadreurs chargés bloc par bloc
+    (deux requêtes par bloc au lieu d'un prefetch sur tout le queryset)"""
+    size = chunk_size()
+    rows = queryset.order_by('id').values_list(
+        'id', 'titre', 'description', 'date_creation'
+    ).iterator(chunk_size=size)
+
+    def flush(block):
+        ids = [row[0] for row in block]
+        promotions = _links(
+            Cours.promotions.through, ids, 'promotion__name', ['promotion__name'],
+        )
+        encadreurs = _links(
+            Cours.encadreurs.through, ids, 'user__last_name', ['user__first_name', 'user__last_name'],
+        )
+        for cours_id, titre, description, date_creation in block:
+            yield (
+                cours_id, titre, description,
+                promotions.get(cours_id, ''), encadreurs.get(cours_id, ''), date_creation,
+            )
+
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= size:
+            yield from flush(block)
+            block = []
+    if block:
+        yield from flush(block)
+
+
+def users_queryset(user, role=None, promotion_id=None):
+    """Utilisateurs exportables : tout pour l'admin, les étudiants de sa promotion pour un coordonnateur"""
+    queryset = User.objects.all()
+    if user.role == 'COORDON':
+        queryset = queryset.filter(role='ETUDIANT', promotion_id=user.promotion_id)
+    if role:
+        queryset = queryset.filter(role=role)
+    if promotion_id:
+        queryset = queryset.filter(promotion_id=promotion_id)
+    return queryset
+
+
+def cours_queryset(promotion_id=None):
+    queryset = Cours.objects.all()
+    if promotion_id:
+        queryset = queryset.filter(promotions=promotion_id)
+    return queryset
+
+
+def horaires_queryset(promotion_id=None):
+    queryset = Horaire.objects.all()
+    if promotion_id:
+        queryset = queryset.filter(promotion_id=promotion_id)
+    return queryset
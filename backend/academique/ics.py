@@ -0,0 +1,202 @@
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string
+
+from academique.models import AbonnementIcs, Horaire, Promotion
+from academique.queries import horaires_fenetre
+from core import response_cache
+from users.models import User
+
+
+SALT = 'academique.ics'
+PROMOTION = 'promotion'
+ENCADREUR = 'encadreur'
+TYPES = (PROMOTION, ENCADREUR)
+PRODID = '-//Ecole des Excellents//Horaires//FR'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ============================================
+# JETONS
+# ============================================
+
+def abonne_scope(user_id):
+    return f'ics-abonne:{user_id}'
+
+
+def _abonne(user_id):
+    """(actif, rôle, promotion, secret) de l'abonné, () s'il n'existe pas.
+
+    Lu depuis le cache des réponses : un flux chaud ne coûte aucune requête.
+    Le scope est invalidé par academique.signals quand l'utilisateur change
+    de rôle, de promotion ou d'état, ou que son secret est remplacé.
+    """
+    return response_cache.cached_data(
+        'ics-abonne',
+        scopes=(abonne_scope(user_id),),
+        variant=(user_id,),
+        build=lambda: User.objects.filter(pk=user_id).values_list(
+            'is_active', 'role', 'promotion_id', 'abonnement_ics__secret',
+        ).first() or (),
+        timeout=_setting('ICS_CACHE_TIMEOUT', 24 * 3600),
+    )
+
+
+def _autorise(kind, obj_id, user_id, role, promotion_id):
+    """Même règle que ics_links : sa promotion (toutes pour le staff), son propre flux d'encadreur"""
+    if kind == PROMOTION:
+        return role in ('ADMIN', 'COORDON') or promotion_id == obj_id
+    return role == 'ENCADREUR' and user_id == obj_id
+
+
+def _signature(kind, obj_id, user_id, secret):
+    return signing.Signer(salt=SALT).signature(f'{kind}:{obj_id}:{user_id}:{secret}')
+
+
+def token_for(kind, obj_id, user):
+    """Jeton HMAC (SECRET_KEY + secret de l'abonné) sans expiration : les agendas
+    interrogent le flux indéfiniment, tant que l'abonné y a droit"""
+    abonne = _abonne(user.pk)
+    if not abonne or not abonne[3]:
+        AbonnementIcs.objects.get_or_create(user_id=user.pk, defaults={'secret': get_random_string(32)})
+        response_cache.bump(abonne_scope(user.pk))
+        abonne = _abonne(user.pk)
+    return f'{user.pk}.{_signature(kind, obj_id, user.pk, abonne[3])}'
+
+
+def verify_token(kind, obj_id, token):
+    """Jeton de cet abonné pour ce flux, abonné toujours actif et autorisé"""
+    user_id, _, signature = token.partition('.')
+    if kind not in TYPES or not user_id.isdigit():
+        return False
+    user_id = int(user_id)
+    abonne = _abonne(user_id)
+    if not abonne:
+        return False
+    actif, role, promotion_id, secret = abonne
+    if not actif or not secret or not _autorise(kind, obj_id, user_id, role, promotion_id):
+        return False
+    return constant_time_compare(signature, _signature(kind, obj_id, user_id, secret))
+
+
+def feed_path(kind, obj_id, user):
+    return f'/api/academique/ics/{kind}/{obj_id}/{token_for(kind, obj_id, user)}.ics'
+
+
+def revoquer(*user_ids):
+    """Nouveau secret pour ces abonnés : leurs URLs déjà distribuées répondent 404"""
+    for user_id in set(user_ids):
+        if AbonnementIcs.objects.filter(user_id=user_id).update(secret=get_random_string(32)):
+            response_cache.bump(abonne_scope(user_id))
+
+
+# ============================================
+# INVALIDATION
+# ============================================
+
+def scope(kind, obj_id):
+    return f'ics:{kind}:{obj_id}'
+
+
+def invalider(promotion_ids=(), encadreur_ids=()):
+    """Rend obsolètes les flux concernés (générations du cache des réponses)"""
+    scopes = [scope(PROMOTION, pk) for pk in set(promotion_ids) if pk]
+    scopes += [scope(ENCADREUR, pk) for pk in set(encadreur_ids) if pk]
+    if scopes:
+        response_cache.bump(*scopes)
+
+
+# ============================================
+# RENDU
+# ============================================
+
+def _escape(text):
+    return (
+        str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Lignes de 75 octets max (RFC 5545 §3.1), suite préfixée d'un espace"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return data + b'\r\n'
+    parts = []
+    while data:
+        size = 75 if not parts else 74
+        # Ne pas couper au milieu d'un caractère UTF-8
+        while size < len(data) and (data[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(data[:size])
+        data = data[size:]
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _lines(nom, rows):
+    yield 'BEGIN:VCALENDAR'
+    yield 'VERSION:2.0'
+    yield f'PRODID:{PRODID}'
+    yield 'CALSCALE:GREGORIAN'
+    yield f'X-WR-CALNAME:{_escape(nom)}'
+    for horaire_id, titre, description, debut, fin, lieu, cours, created_at in rows:
+        yield 'BEGIN:VEVENT'
+        yield f'UID:horaire-{horaire_id}@ecole-des-excellents'
+        yield f'DTSTAMP:{_utc(created_at)}'
+        yield f'DTSTART:{_utc(debut)}'
+        if fin:
+            yield f'DTEND:{_utc(fin)}'
+        yield f'SUMMARY:{_escape(f"{cours} — {titre}" if cours else titre)}'
+        if lieu:
+            yield f'LOCATION:{_escape(lieu)}'
+        if description:
+            yield f'DESCRIPTION:{_escape(description)}'
+        yield 'END:VEVENT'
+    yield 'END:VCALENDAR'
+
+
+def _queryset(kind, obj_id):
+    if kind == PROMOTION:
+        return Horaire.objects.filter(promotion_id=obj_id)
+    return Horaire.objects.filter(cours__encadreurs=obj_id)
+
+
+def _nom(kind, obj_id):
+    if kind == PROMOTION:
+        promotion = Promotion.objects.filter(pk=obj_id).values_list('name', flat=True).first()
+        return f'Horaires {promotion or ""}'.strip()
+    encadreur = User.objects.filter(pk=obj_id).values_list('first_name', 'last_name').first()
+    return 'Horaires ' + ' '.join(encadreur or ())
+
+
+def render(kind, obj_id):
+    """(etag, octets) du flux : lecture en flux des horaires depuis ICS_HISTORIQUE_JOURS"""
+    debut = timezone.now() - timedelta(days=_setting('ICS_HISTORIQUE_JOURS', 90))
+    rows = horaires_fenetre(_queryset(kind, obj_id), start=debut).order_by('date_debut', 'id').values_list(
+        'id', 'titre', 'description', 'date_debut', 'date_fin', 'lieu', 'cours__titre', 'created_at',
+    ).iterator(chunk_size=500)
+    body = b''.join(_fold(line) for line in _lines(_nom(kind, obj_id), rows))
+    return hashlib.sha1(body).hexdigest(), body
+
+
+def feed(kind, obj_id):
+    """Flux pré-rendu depuis le cache ; rendu seulement après un changement pertinent"""
+    return response_cache.cached_data(
+        'ics',
+        scopes=(scope(kind, obj_id),),
+        variant=(kind, obj_id),
+        build=lambda: render(kind, obj_id),
+        # Fait aussi glisser la fenêtre d'historique
+        timeout=_setting('ICS_CACHE_TIMEOUT', 24 * 3600),
+    )
@@ -0,0 +1,278 @@
+import codecs
+import csv
+import io
+import pickle
+import tempfile
+from collections import Counter
+from zipfile import BadZipFile
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from academique import compteurs, tendances
+from academique.models import Promotion
+from academique.serializer.etudiant_import import EtudiantImportSerializer
+from core import response_cache, versions
+from users.models import User
+from users.serializers.create import check_creator_rules
+
+try:
+    import openpyxl
+    from openpyxl.utils.exceptions import InvalidFileException
+except ImportError:  # dépendance optionnelle : import XLSX indisponible
+    openpyxl = None
+    InvalidFileException = None
+
+
+BATCH_SIZE = 500
+# Au-delà, les erreurs sont comptées mais plus détaillées (mémoire bornée)
+MAX_ERRORS = 1000
+COLUMNS = ('email', 'first_name', 'last_name', 'telephone', 'password', 'promotion')
+
+
+class ImportFileError(Exception):
+    """Fichier illisible : format inconnu, en-tête manquant, dépendance absente"""
+
+
+def _normalize_header(cells):
+    return [str(cell or '').strip().lower() for cell in cells]
+
+
+def _check_header(header):
+    missing = {'email', 'first_name', 'last_name'} - set(header)
+    if missing:
+        raise ImportFileError(f"Colonnes manquantes : {', '.join(sorted(missing))}")
+
+
+def _encoding(fileobj):
+    """utf-8-sig si le fichier entier est de l'UTF-8 valide, sinon cp1252 (CSV « Excel » français).
+
+    Lu par blocs sans rien garder en mémoire, puis rembobiné.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        for chunk in iter(lambda: fileobj.read(64 * 1024), b''):
+            decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'cp1252'
+    fileobj.seek(0)
+    return encoding
+
+
+def _csv_rows(fileobj):
+    encoding = _encoding(fileobj)
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline='')
+    reader = csv.reader(text)
+    try:
+        header = _normalize_header(next(reader, []))
+        _check_header(header)
+        for cells in reader:
+            yield dict(zip(header, cells))
+    except UnicodeDecodeError:
+        raise ImportFileError("Encodage non reconnu : enregistrer le CSV en UTF-8")
+    except csv.Error as exc:
+        raise ImportFileError(f"CSV invalide (ligne {reader.line_num}) : {exc}")
+    finally:
+        # Rend le fichier binaire à l'appelant au lieu de le fermer
+        text.detach()
+
+
+def _xlsx_rows(fileobj):
+    if openpyxl is None:
+        raise ImportFileError("Import XLSX indisponible : installer openpyxl")
+    # read_only : les lignes sont lues en flux depuis l'archive
+    try:
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except (BadZipFile, InvalidFileException, KeyError):
+        raise ImportFileError("Fichier XLSX illisible ou corrompu")
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = _normalize_header(next(rows, []))
+        _check_header(header)
+        for cells in rows:
+            yield {
+                column: '' if value is None else str(value)
+                for column, value in zip(header, cells)
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename):
+    """Itère les lignes (dict colonne → texte) d'un fichier CSV ou XLSX ouvert en binaire"""
+    name = (filename or '').lower()
+    if name.endswith('.xlsx'):
+        return _xlsx_rows(fileobj)
+    if name.endswith('.csv'):
+        return _csv_rows(fileobj)
+    raise ImportFileError("Format non pris en charge (CSV ou XLSX attendu)")
+
+
+class _Promotions:
+    """Promotions par id et par nom, chargées en une requête"""
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_name = {}
+        for promotion_id, name in Promotion.objects.values_list('id', 'name'):
+            self.by_id[promotion_id] = promotion_id
+            self.by_name[name.strip().lower()] = promotion_id
+
+    def resolve(self, value):
+        value = (value or '').strip()
+        if not value:
+            return None
+        if value.isdigit() and int(value) in self.by_id:
+            return int(value)
+        promotion_id = self.by_name.get(value.lower())
+        if promotion_id is None:
+            raise serializers.ValidationError({'promotion': [f"Promotion inconnue : {value}"]})
+        return promotion_id
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, detail):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'ligne': line, 'erreurs': detail})
+
+    def as_dict(self):
+        return {
+            'lignes': self.rows,
+            'crees': self.created,
+            'nb_erreurs': self.error_count,
+            'erreurs': self.errors,
+            'erreurs_tronquees': self.error_count > len(self.errors),
+        }
+
+
+def _champs(data, promotion_id, dry_run):
+    """Champs du futur User ; le mot de passe est haché ici, hors transaction"""
+    password = data.get('password')
+    return {
+        'email': data['email'],
+        'first_name': data['first_name'],
+        'last_name': data['last_name'],
+        'telephone': data.get('telephone') or None,
+        'role': 'ETUDIANT',
+        'promotion_id': promotion_id,
+        # Même résultat que set_password / set_unusable_password
+        'password': None if dry_run else make_password(password or None),
+    }
+
+
+def _relire(spool):
+    spool.seek(0)
+    while True:
+        try:
+            yield pickle.load(spool)
+        except EOFError:
+            return
+
+
+def _flush(batch, per_promotion, report, dry_run):
+    # Emails créés par ailleurs depuis la validation
+    pris = set(User.objects.filter(email__in=[champs['email'] for _, champs in batch]).values_list('email', flat=True))
+    users = []
+    for line, champs in batch:
+        if champs['email'] in pris:
+            report.add_error(line, {'email': ["Un utilisateur avec cet email existe déjà."]})
+        else:
+            users.append(User(**champs))
+    if users and not dry_run:
+        User.objects.bulk_create(users)
+    for user in users:
+        per_promotion[user.promotion_id] += 1
+    report.created += len(users)
+    batch.clear()
+
+
+def _apply_side_effects(per_promotion):
+    """bulk_create n'émet pas post_save : compteurs, agrégats et caches à la main"""
+    total = sum(per_promotion.values())
+    if not total:
+        return
+    compteurs.incrementer(compteurs.cle_role('ETUDIANT'), total)
+    mois = tendances.mois_de(timezone.now())
+    for promotion_id, count in per_promotion.items():
+        tendances.appliquer(tendances.ETUDIANTS, mois, promotion_id, count)
+    response_cache.bump('user')
+    versions.bump('user')
+
+
+def _valider(rows, spool, report, promotions, creator, promotion_id, dry_run):
+    """Première passe, hors transaction : validation et hachage, lignes prêtes dans `spool`"""
+    emails = set(User.objects.values_list('email', flat=True))
+    # Ligne 1 : l'en-tête
+    for line, row in enumerate(rows, start=2):
+        if not any((value or '').strip() for value in row.values()):
+            continue
+        report.rows += 1
+
+        serializer = EtudiantImportSerializer(data={
+            column: row[column] for column in COLUMNS if column in row
+        })
+        if not serializer.is_valid():
+            report.add_error(line, serializer.errors)
+            continue
+        data = serializer.validated_data
+
+        try:
+            row_promotion_id = promotions.resolve(data.get('promotion')) or promotion_id
+            if creator is not None:
+                check_creator_rules(creator, 'ETUDIANT', row_promotion_id)
+        except serializers.ValidationError as exc:
+            report.add_error(line, exc.detail)
+            continue
+
+        if data['email'] in emails:
+            report.add_error(line, {'email': ["Un utilisateur avec cet email existe déjà."]})
+            continue
+        emails.add(data['email'])
+
+        pickle.dump((line, _champs(data, row_promotion_id, dry_run)), spool)
+
+
+def import_etudiants(rows, creator=None, promotion_id=None, batch_size=BATCH_SIZE, dry_run=False):
+    """Crée des comptes ETUDIANT depuis un itérable de lignes (voir read_rows).
+
+    Deux passes : les lignes sont d'abord validées et leurs mots de passe
+    hachés (PBKDF2, le plus long) hors transaction, dans un fichier
+    temporaire ; la transaction ne couvre ensuite que les bulk_create par
+    lots. Seuls un lot de `batch_size` utilisateurs et l'ensemble des
+    emails existants sont gardés en mémoire, pas le fichier. `creator`
+    (None pour une commande d'administration) est soumis aux mêmes règles
+    que UserCreateSerializer. Retourne un ImportReport avec une erreur par
+    ligne rejetée.
+    """
+    report = ImportReport()
+    promotions = _Promotions()
+    if promotion_id is not None and promotion_id not in promotions.by_id:
+        raise ImportFileError(f"Promotion inconnue : {promotion_id}")
+    per_promotion = Counter()
+    batch = []
+
+    with tempfile.TemporaryFile() as spool:
+        _valider(rows, spool, report, promotions, creator, promotion_id, dry_run)
+
+        with transaction.atomic():
+            for entree in _relire(spool):
+                batch.append(entree)
+                if len(batch) >= batch_size:
+                    _flush(batch, per_promotion, report, dry_run)
+            if batch:
+                _flush(batch, per_promotion, report, dry_run)
+            if not dry_run:
+                _apply_side_effects(per_promotion)
+
+    return report
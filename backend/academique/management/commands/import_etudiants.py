@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from academique import imports
+
+
+class Command(BaseCommand):
+    help = "Crée des comptes étudiants en masse depuis un fichier CSV ou XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help="Chemin du fichier CSV ou XLSX")
+        parser.add_argument('--promotion', type=int, help="Promotion par défaut (id)")
+        parser.add_argument('--batch-size', type=int, default=imports.BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Valide sans rien créer")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['fichier'], 'rb') as f:
+                report = imports.import_etudiants(
+                    imports.read_rows(f, options['fichier']),
+                    promotion_id=options['promotion'],
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, imports.ImportFileError) as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stderr.write(f"Ligne {error['ligne']} : {error['erreurs']}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... {report.error_count - len(report.errors)} erreur(s) non détaillée(s)")
+
+        verb = "à créer" if options['dry_run'] else "créé(s)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{report.created} étudiant(s) {verb}, {report.error_count} ligne(s) rejetée(s)"
+        ))
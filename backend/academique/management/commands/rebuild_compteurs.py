@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from academique import compteurs
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs du tableau de bord depuis les tables de base"
+
+    def handle(self, *args, **options):
+        valeurs = compteurs.recalculer()
+        for cle, valeur in sorted(valeurs.items()):
+            self.stdout.write(f"{cle}: {valeur}")
+        self.stdout.write(self.style.SUCCESS("Compteurs recalculés"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from academique import tendances
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les agrégats mensuels (étudiants inscrits, cours créés) depuis les tables de base"
+
+    def handle(self, *args, **options):
+        nombre = tendances.reconstruire()
+        self.stdout.write(self.style.SUCCESS(f"{nombre} agrégats mensuels reconstruits"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from academique import ics
+
+
+class Command(BaseCommand):
+    help = "Révoque les URLs d'abonnement ICS d'utilisateurs (lien divulgué)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='+', type=int)
+
+    def handle(self, *args, **options):
+        ics.revoquer(*options['user_ids'])
+        self.stdout.write(self.style.SUCCESS("Abonnements révoqués : de nouvelles URLs seront distribuées"))
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0006_remove_cours_encadreur_remove_cours_promotion_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Compteur',
+            fields=[
+                ('cle', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('valeur', models.IntegerField(default=0)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('date_recalcul', models.DateTimeField()),
+            ],
+        ),
+    ]
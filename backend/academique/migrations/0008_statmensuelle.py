@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0007_compteur'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mois', models.DateField()),
+                ('entite', models.CharField(choices=[('etudiants', 'Étudiants'), ('cours', 'Cours')], max_length=20)),
+                ('nombre', models.IntegerField(default=0)),
+                ('promotion', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='academique.promotion')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entite', 'mois'], name='academique__entite_098e2e_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('promotion__isnull', False)), fields=('mois', 'entite', 'promotion'), name='stat_mensuelle_unique_detail'), models.UniqueConstraint(condition=models.Q(('promotion__isnull', True)), fields=('mois', 'entite'), name='stat_mensuelle_unique_total')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0008_statmensuelle'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='horaire',
+            index=models.Index(fields=['promotion', 'date_debut'], name='horaire_promotion_debut'),
+        ),
+        migrations.AddIndex(
+            model_name='horaire',
+            index=models.Index(fields=['date_debut'], name='horaire_debut'),
+        ),
+    ]
@@ -48,5 +48,80 @@ class Horaire(models.Model):
 	promotion = models.ForeignKey(Promotion, on_delete=models.SET_NULL, null=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 
+	class Meta:
+		indexes = [
+			# Fenêtres de calendrier : promotion puis plage sur date_debut
+			models.Index(fields=['promotion', 'date_debut'], name='horaire_promotion_debut'),
+			models.Index(fields=['date_debut'], name='horaire_debut'),
+		]
+
 	def __str__(self):
 		return f"{self.titre} — {self.promotion}"
+
+
+class Compteur(models.Model):
+    """Compteur matérialisé pour le tableau de bord (ex: 'user:ETUDIANT', 'cours').
+
+    Maintenu par les signaux de academique.signals, recalculé par
+    `python manage.py rebuild_compteurs`.
+    """
+    cle = models.CharField(max_length=50, primary_key=True)
+    valeur = models.IntegerField(default=0)
+    date_maj = models.DateTimeField(auto_now=True)
+    date_recalcul = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.cle} = {self.valeur}"
+
+
+class StatMensuelle(models.Model):
+    """Agrégat mensuel des créations (étudiants inscrits, cours créés).
+
+    Une ligne sans promotion porte le total du mois ; les lignes avec
+    promotion portent le détail par promotion. Les lectures somment les
+    lignes, maintenues par academique.signals et reconstruites par
+    `python manage.py rebuild_stats_mensuelles`.
+    """
+    ENTITE_CHOICES = [
+        ('etudiants', 'Étudiants'),
+        ('cours', 'Cours'),
+    ]
+    mois = models.DateField()
+    entite = models.CharField(max_length=20, choices=ENTITE_CHOICES)
+    promotion = models.ForeignKey(Promotion, on_delete=models.CASCADE, null=True, blank=True)
+    nombre = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entite', 'mois']),
+        ]
+        # Une seule ligne par (mois, entité, promotion), total compris (promotion NULL)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['mois', 'entite', 'promotion'],
+                condition=models.Q(promotion__isnull=False),
+                name='stat_mensuelle_unique_detail',
+            ),
+            models.UniqueConstraint(
+                fields=['mois', 'entite'],
+                condition=models.Q(promotion__isnull=True),
+                name='stat_mensuelle_unique_total',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.entite} {self.mois:%Y-%m} ({self.promotion_id or 'total'}) = {self.nombre}"
+
+
+class AbonnementIcs(models.Model):
+    """Secret des URLs d'abonnement ICS d'un utilisateur, signé dans ses jetons.
+
+    Chaque abonné a ses propres jetons : le remplacer (`academique.ics.revoquer`,
+    `python manage.py revoquer_ics`) ne révoque que ses URLs.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='abonnement_ics')
+    secret = models.CharField(max_length=64)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ICS {self.user_id}"
@@ -1,5 +1,17 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from academique import acces
+
+
+def has_cours_access(request, cours_id):
+    """Droit de la requête sur un cours à partir de son id seul.
+
+    Promotions et encadreurs sont lus dans l'index en mémoire
+    (academique.acces) : pas de requête, pas besoin de charger le cours.
+    """
+    write = request.method not in SAFE_METHODS
+    return acces.can_access(request.user, cours_id, write=write)
+
 
 class CoursPermission(BasePermission):
     def has_permission(self, request, view):
@@ -19,27 +31,7 @@ class CoursPermission(BasePermission):
         return True
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-
-        # Lecture
-        if request.method in SAFE_METHODS:
-            if user.role == 'ETUDIANT':
-                return obj.promotions.filter(id=user.promotion_id).exists()
-            return True
-
-        # ADMIN → tout
-        if user.role == 'ADMIN':
-            return True
-
-        # COORDON → autorisé (logique promotion extensible)
-        if user.role == 'COORDON':
-            return True
-
-        # ENCADREUR → seulement s’il est affilié
-        if user.role == 'ENCADREUR':
-            return obj.encadreurs.filter(id=user.id).exists()
-
-        return False
+        return has_cours_access(request, obj.pk)
     
 
 class HorairePermission(BasePermission):
@@ -55,14 +47,14 @@ class HorairePermission(BasePermission):
 
         # COORDON → autorisé (logique promotion extensible)
         if user.role == 'COORDON':
-            return obj.promotion == user.promotion
+            return obj.promotion_id == user.promotion_id
 
         # ENCADREUR → seulement s’il est affilié
         if user.role == 'ENCADREUR':
-            return obj.promotion == user.promotion
+            return obj.promotion_id == user.promotion_id
         
         if user.role == 'ETUDIANT' :
-            return obj.promotion == user.promotion and request.method in SAFE_METHODS
+            return obj.promotion_id == user.promotion_id and request.method in SAFE_METHODS
 
         return False
 
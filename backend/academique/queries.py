@@ -0,0 +1,94 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from academique.models import Cours, Horaire, Promotion
+from users.models import User
+
+
+def cours_prefetches():
+    """Prefetch des relations lues par CoursListSerializer / CoursDetailSerializer.
+
+    Chaque relation est chargée en une seule requête pour tous les cours,
+    en ne sélectionnant que les colonnes réellement sérialisées.
+    """
+    return (
+        Prefetch(
+            'encadreurs',
+            queryset=User.objects.only('id', 'first_name', 'last_name'),
+        ),
+        Prefetch(
+            'promotions',
+            queryset=Promotion.objects.only('id', 'name'),
+        ),
+    )
+
+
+def cours_queryset():
+    """Queryset de base des cours avec encadreurs et promotions préchargés"""
+    return Cours.objects.prefetch_related(*cours_prefetches())
+
+
+def cours_list_queryset(user):
+    """Cours visibles par l'utilisateur pour la liste"""
+    queryset = cours_queryset()
+
+    if user.role == 'ETUDIANT':
+        queryset = queryset.filter(promotions=user.promotion_id)
+
+    return queryset
+
+
+def cours_detail_queryset():
+    """Queryset utilisé pour le détail d'un cours"""
+    return cours_queryset()
+
+
+def duree_max_horaire():
+    """Durée maximale d'un horaire, bornant la recherche en arrière des fenêtres"""
+    return timedelta(days=getattr(settings, 'HORAIRE_DUREE_MAX_JOURS', 31))
+
+
+def parse_instant(value):
+    """Date (`2025-10-06`, minuit local) ou datetime ISO ; None si absent, ValueError si invalide"""
+    if not value:
+        return None
+    instant = parse_datetime(value)
+    if instant is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        instant = datetime.combine(day, time.min)
+    if timezone.is_naive(instant):
+        instant = timezone.make_aware(instant)
+    return instant
+
+
+def horaires_visibles(user, promotion_id=None):
+    """Horaires visibles par l'utilisateur (même règle que horaires_list_create)"""
+    if user.role in ('ETUDIANT', 'ENCADREUR'):
+        return Horaire.objects.filter(promotion_id=user.promotion_id)
+    if promotion_id:
+        return Horaire.objects.filter(promotion_id=promotion_id)
+    return Horaire.objects.all()
+
+
+def horaires_fenetre(queryset, start=None, end=None):
+    """Horaires qui chevauchent [start, end[.
+
+    Un horaire chevauche la fenêtre s'il commence avant `end` et finit
+    après `start` (sans date_fin : s'il commence dans la fenêtre). La
+    borne basse sur date_debut (start - durée max) garde la requête sur
+    l'index (promotion, date_debut) au lieu de parcourir tout le passé.
+    """
+    if end is not None:
+        queryset = queryset.filter(date_debut__lt=end)
+    if start is not None:
+        queryset = queryset.filter(
+            Q(date_debut__gte=start) | Q(date_fin__gt=start),
+            date_debut__gte=start - duree_max_horaire(),
+        )
+    return queryset
@@ -1,12 +1,30 @@
 from rest_framework import serializers
-from academique.models import Cours
+from academique.models import Cours, Promotion
+from core.fieldsets import SparseFieldsMixin, prefetch
+from documents.models import Document
 from documents.serializer.document import DocumentListSerializer
+from users.models import User
 
 
-class CoursDetailSerializer(serializers.ModelSerializer):
+class CoursDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     encadreurs = serializers.SerializerMethodField()
     promotions = serializers.SerializerMethodField()
-    documents = DocumentListSerializer(many=True, read_only=True)
+
+    # Documents du cours sur demande : ?expand=documents (ou documents.fichiers)
+    expandable = {
+        'documents': lambda selection: DocumentListSerializer(
+            source='document_set', many=True, read_only=True, selection=selection,
+        ),
+    }
+    relations = {
+        'encadreurs': prefetch(
+            'encadreurs', lambda selection: User.objects.only('id', 'first_name', 'last_name').order_by('id'),
+        ),
+        'promotions': prefetch('promotions', lambda selection: Promotion.objects.only('id', 'name').order_by('id')),
+        'documents': prefetch('document_set', lambda selection: DocumentListSerializer.optimize(
+            Document.objects.order_by('id'), selection, extra=('cours',),
+        )),
+    }
 
     class Meta:
         model = Cours
@@ -1,12 +1,27 @@
 # academique/serializers/cours_list.py
 from rest_framework import serializers
-from academique.models import Cours
+from academique.models import Cours, Promotion
+from core.fieldsets import SparseFieldsMixin, prefetch
+from core.projections import many
+from users.models import User
 
 
-class CoursListSerializer(serializers.ModelSerializer):
+class CoursListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     encadreurs = serializers.SerializerMethodField()
     promotions = serializers.SerializerMethodField()
 
+    relations = {
+        'encadreurs': prefetch(
+            'encadreurs', lambda selection: User.objects.only('id', 'first_name', 'last_name').order_by('id'),
+        ),
+        'promotions': prefetch('promotions', lambda selection: Promotion.objects.only('id', 'name').order_by('id')),
+    }
+    # Lecture par values() (core.projections)
+    projections = {
+        'encadreurs': many('encadreurs', 'id', 'first_name', 'last_name'),
+        'promotions': many('promotions', 'id', 'name'),
+    }
+
     class Meta:
         model = Cours
         fields = [
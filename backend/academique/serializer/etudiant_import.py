@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from users.models import User
+
+
+class EtudiantImportSerializer(serializers.Serializer):
+    """Une ligne du fichier d'import d'étudiants.
+
+    Pas de ModelSerializer : l'unicité de l'email et la promotion sont
+    vérifiées par academique.imports contre des données chargées une fois,
+    pas par une requête à chaque ligne.
+    """
+    email = serializers.EmailField(max_length=User._meta.get_field('email').max_length)
+    first_name = serializers.CharField(max_length=50)
+    last_name = serializers.CharField(max_length=50)
+    telephone = serializers.CharField(max_length=15, required=False, allow_blank=True, allow_null=True)
+    password = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    # Id ou nom de la promotion ; sinon la promotion par défaut de l'import
+    promotion = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value.strip())
@@ -1,7 +1,25 @@
+from django.db import transaction
 from rest_framework import serializers
 from academique.models import Horaire
+from academique.conflits import ConflitHoraire, conflits_horaire, verrouiller
+from academique.queries import duree_max_horaire
+from core.fieldsets import SparseFieldsMixin
 
-class HoraireSerializer(serializers.ModelSerializer):
+
+# Champs qui déplacent un horaire ou changent ses ressources
+CHAMPS_CRENEAU = ('date_debut', 'date_fin', 'lieu', 'promotion', 'cours')
+
+
+def valider_duree(debut, fin):
+    if debut and fin:
+        if fin < debut:
+            raise serializers.ValidationError({'date_fin': "La fin doit suivre le début."})
+        # Au-delà, les fenêtres de calendrier (queries.horaires_fenetre) ne le verraient pas
+        if fin - debut > duree_max_horaire():
+            raise serializers.ValidationError({'date_fin': "Horaire trop long."})
+
+
+class HoraireSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Horaire
         fields = [
@@ -14,3 +32,60 @@ class HoraireSerializer(serializers.ModelSerializer):
             'lieu',
             'promotion'
         ]
+
+    def validate(self, attrs):
+        valider_duree(
+            attrs.get('date_debut', getattr(self.instance, 'date_debut', None)),
+            attrs.get('date_fin', getattr(self.instance, 'date_fin', None)),
+        )
+        return attrs
+
+    def _creneau_modifie(self, data):
+        if self.instance is None:
+            return True
+        # Clés étrangères comparées par id : pas de chargement de l'objet lié
+        return any(
+            champ in data
+            and getattr(data[champ], 'pk', data[champ]) != getattr(self.instance, Horaire._meta.get_field(champ).attname)
+            for champ in CHAMPS_CRENEAU
+        )
+
+    def _verifier_conflits(self, data):
+        debut = data.get('date_debut', getattr(self.instance, 'date_debut', None))
+        promotion = data.get('promotion', getattr(self.instance, 'promotion', None))
+        cours = data.get('cours', getattr(self.instance, 'cours', None))
+        conflits = conflits_horaire(
+            debut, data.get('date_fin', getattr(self.instance, 'date_fin', None)),
+            lieu=data.get('lieu', getattr(self.instance, 'lieu', None)),
+            promotion_id=promotion.id if promotion else None,
+            cours_id=cours.id if cours else None,
+            exclude_id=getattr(self.instance, 'pk', None),
+        )
+        if conflits:
+            raise ConflitHoraire(conflits)
+
+    def save(self, **kwargs):
+        """Contrôle des conflits sous verrou : deux créations concurrentes ne passent
+        pas toutes deux. Lève ConflitHoraire (409) ; un changement sans effet sur
+        le créneau (titre, description) n'est pas contrôlé."""
+        data = {**self.validated_data, **kwargs}
+        with transaction.atomic():
+            if self._creneau_modifie(data):
+                verrouiller()
+                self._verifier_conflits(data)
+            return super().save(**kwargs)
+
+
+class HorairePlanSerializer(serializers.Serializer):
+    """Une ligne d'un plan à vérifier (academique.conflits.conflits_plan)"""
+    id = serializers.IntegerField(required=False, help_text="Horaire existant remplacé par cette ligne")
+    titre = serializers.CharField(required=False, allow_blank=True)
+    date_debut = serializers.DateTimeField()
+    date_fin = serializers.DateTimeField(required=False, allow_null=True)
+    lieu = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    promotion = serializers.IntegerField(required=False, allow_null=True)
+    cours = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        valider_duree(attrs['date_debut'], attrs.get('date_fin'))
+        return attrs
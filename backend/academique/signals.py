@@ -0,0 +1,359 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from academique import acces, compteurs, ics, tendances
+from academique.models import Cours, Horaire, Promotion
+from core import response_cache, versions
+from users.models import User
+
+
+# ============================================
+# COMPTEURS DU TABLEAU DE BORD
+# ============================================
+
+CHAMPS_ETAT = {'role', 'promotion', 'promotion_id'}
+
+
+@receiver(pre_save, sender=User)
+def user_memoriser_etat(sender, instance, update_fields=None, **kwargs):
+    """Mémorise l'ancien rôle et l'ancienne promotion avant la sauvegarde.
+
+    Sans requête dans le cas courant : valeurs chargées (`User.from_db`) ou
+    inchangées quand `update_fields` ne les contient pas (last_login, ...).
+    """
+    if update_fields is not None and not CHAMPS_ETAT & set(update_fields):
+        # Rôle et promotion non écrits : rien ne change en base, l'état
+        # mémorisé reste celui de la base (modifs en mémoire non sauvées)
+        instance._role_precedent, instance._promotion_precedente = instance.role, instance.promotion_id
+        return
+    if instance.pk is None:
+        precedent = None
+    elif hasattr(instance, '_etat_charge'):
+        precedent = instance._etat_charge
+    else:
+        precedent = (
+            User.objects.filter(pk=instance.pk)
+            .values_list('role', 'promotion_id')
+            .first()
+        )
+    instance._role_precedent, instance._promotion_precedente = precedent or (None, None)
+    # État en base après cette sauvegarde, pour la suivante : seuls les champs écrits changent
+    ecrits = CHAMPS_ETAT if update_fields is None else set(update_fields)
+    instance._etat_charge = (
+        instance.role if 'role' in ecrits else instance._role_precedent,
+        instance.promotion_id if ecrits & {'promotion', 'promotion_id'} else instance._promotion_precedente,
+    )
+
+
+@receiver(post_save, sender=User)
+def user_compteurs_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    precedent = getattr(instance, '_role_precedent', None)
+    if created or precedent is None:
+        compteurs.incrementer(compteurs.cle_role(instance.role), 1)
+    elif precedent != instance.role:
+        compteurs.incrementer(compteurs.cle_role(precedent), -1)
+        compteurs.incrementer(compteurs.cle_role(instance.role), 1)
+
+
+@receiver(post_delete, sender=User)
+def user_compteurs_delete(sender, instance, **kwargs):
+    compteurs.incrementer(compteurs.cle_role(instance.role), -1)
+
+
+@receiver(post_save, sender=Cours)
+def cours_compteurs_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        compteurs.incrementer(compteurs.CLE_COURS, 1)
+
+
+@receiver(post_delete, sender=Cours)
+def cours_compteurs_delete(sender, instance, **kwargs):
+    compteurs.incrementer(compteurs.CLE_COURS, -1)
+
+
+# ============================================
+# AGRÉGATS MENSUELS (enrollment_trend)
+# ============================================
+
+@receiver(post_save, sender=User)
+def user_tendances_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    mois = tendances.mois_de(instance.date_joined)
+    if getattr(instance, '_role_precedent', None) == 'ETUDIANT' and not created:
+        if (instance.role, instance.promotion_id) == ('ETUDIANT', instance._promotion_precedente):
+            return
+        tendances.appliquer(tendances.ETUDIANTS, mois, instance._promotion_precedente, -1)
+    if instance.role == 'ETUDIANT':
+        tendances.appliquer(tendances.ETUDIANTS, mois, instance.promotion_id, 1)
+
+
+@receiver(post_delete, sender=User)
+def user_tendances_delete(sender, instance, **kwargs):
+    if instance.role == 'ETUDIANT':
+        mois = tendances.mois_de(instance.date_joined)
+        tendances.appliquer(tendances.ETUDIANTS, mois, instance.promotion_id, -1)
+
+
+@receiver(post_save, sender=Cours)
+def cours_tendances_save(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        tendances.appliquer(tendances.COURS, tendances.mois_de(instance.date_creation), None, 1)
+
+
+@receiver(pre_delete, sender=Cours)
+def cours_tendances_delete(sender, instance, **kwargs):
+    # Les liens vers les promotions sont supprimés en cascade sans m2m_changed
+    mois = tendances.mois_de(instance.date_creation)
+    tendances.appliquer(tendances.COURS, mois, None, -1)
+    promotion_ids = list(instance.promotions.values_list('id', flat=True))
+    tendances.appliquer_detail(tendances.COURS, mois, promotion_ids, -1)
+
+
+@receiver(m2m_changed, sender=Cours.promotions.through)
+def cours_promotions_tendances(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Mémorise les liens avant qu'ils disparaissent
+        if reverse:
+            instance._liens_cours = list(instance.cours.values_list('id', 'date_creation'))
+        else:
+            instance._liens_promotions = list(instance.promotions.values_list('id', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    delta = 1 if action == 'post_add' else -1
+
+    if not reverse:
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_liens_promotions', [])
+        mois = tendances.mois_de(instance.date_creation)
+        tendances.appliquer_detail(tendances.COURS, mois, pk_set or [], delta)
+        return
+
+    # promotion.cours.add(...) : un lien par cours, chacun dans son mois
+    if action == 'post_clear':
+        liens = getattr(instance, '_liens_cours', [])
+    else:
+        liens = Cours.objects.filter(pk__in=pk_set or []).values_list('id', 'date_creation')
+    for _, date_creation in liens:
+        tendances.appliquer_detail(tendances.COURS, tendances.mois_de(date_creation), [instance.pk], delta)
+
+
+# ============================================
+# INVALIDATION : cache des réponses + versions de tables (ETag)
+# ============================================
+
+def _invalider(*scopes):
+    response_cache.bump(*scopes)
+    versions.bump(*scopes)
+
+
+@receiver(post_save, sender=Cours)
+def cours_invalider(sender, **kwargs):
+    _invalider('cours')
+
+
+@receiver(post_delete, sender=Cours)
+def cours_invalider_delete(sender, **kwargs):
+    # Les horaires du cours passent à cours=NULL sans signal
+    _invalider('cours', 'horaire')
+
+
+@receiver(m2m_changed, sender=Cours.promotions.through)
+@receiver(m2m_changed, sender=Cours.encadreurs.through)
+def cours_relations_invalider(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalider('cours')
+
+
+@receiver([post_save, post_delete], sender=Horaire)
+def horaire_invalider(sender, **kwargs):
+    _invalider('horaire')
+
+
+@receiver([post_save, post_delete], sender=Promotion)
+def promotion_invalider(sender, **kwargs):
+    _invalider('promotion')
+
+
+CHAMPS_NOM = {'first_name', 'last_name'}
+
+
+@receiver(pre_save, sender=User)
+def user_memoriser_nom(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not CHAMPS_NOM & set(update_fields):
+        # Nom non écrit : l'état mémorisé reste celui de la base
+        instance._nom_modifie = False
+        return
+    charge = getattr(instance, '_nom_charge', None)
+    ecrits = CHAMPS_NOM if update_fields is None else set(update_fields)
+    nom = (
+        instance.first_name if 'first_name' in ecrits or charge is None else charge[0],
+        instance.last_name if 'last_name' in ecrits or charge is None else charge[1],
+    )
+    instance._nom_modifie = charge != nom
+    instance._nom_charge = nom
+
+
+@receiver(post_save, sender=User)
+def user_invalider(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = ['user']
+    # La liste des cours affiche le nom des encadreurs : seuls un changement
+    # de nom ou de rôle la modifient (pas last_login à chaque connexion)
+    role_precedent = getattr(instance, '_role_precedent', None)
+    if not created and 'ENCADREUR' in (instance.role, role_precedent):
+        if getattr(instance, '_nom_modifie', True) or instance.role != role_precedent:
+            scopes.append('cours')
+    _invalider(*scopes)
+
+
+@receiver(post_delete, sender=User)
+def user_invalider_delete(sender, instance, **kwargs):
+    # Les liens vers les cours sont supprimés en cascade sans m2m_changed
+    _invalider(*(['user', 'cours'] if instance.role == 'ENCADREUR' else ['user']))
+
+
+# ============================================
+# INDEX DES DROITS D'ACCÈS AUX COURS (academique.acces)
+# ============================================
+
+@receiver(m2m_changed, sender=Cours.promotions.through)
+@receiver(m2m_changed, sender=Cours.encadreurs.through)
+def cours_acces_invalider(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        acces.invalider(instance.pk)
+    elif pk_set:
+        acces.invalider(*pk_set)
+    else:
+        # promotion.cours.clear() / user.cours_encadres.clear() : cours inconnus
+        acces.invalider()
+
+
+@receiver([post_save, post_delete], sender=Cours)
+def cours_acces_save_delete(sender, instance, **kwargs):
+    # Un id réutilisé après suppression ne doit pas hériter d'anciens liens
+    acces.invalider(instance.pk)
+
+
+@receiver(post_delete, sender=Promotion)
+@receiver(post_delete, sender=User)
+def cours_acces_cascade(sender, **kwargs):
+    # Les liens sont supprimés en cascade sans m2m_changed
+    acces.invalider()
+
+
+# ============================================
+# FLUX ICS (academique.ics) : seuls les flux concernés sont régénérés
+# ============================================
+
+def _encadreurs_du_cours(cours_id):
+    # Table de liaison plutôt que acces.index : l'index peut encore refléter
+    # un état antérieur à l'écriture en cours
+    if not cours_id:
+        return frozenset()
+    return frozenset(
+        Cours.encadreurs.through.objects.filter(cours_id=cours_id).values_list('user_id', flat=True)
+    )
+
+
+@receiver(pre_save, sender=Horaire)
+def horaire_memoriser_flux(sender, instance, **kwargs):
+    instance._flux_precedent = None
+    if instance.pk is not None:
+        instance._flux_precedent = (
+            Horaire.objects.filter(pk=instance.pk).values_list('promotion_id', 'cours_id').first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Horaire)
+def horaire_invalider_flux(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    promotion_ids = [instance.promotion_id]
+    encadreur_ids = set(_encadreurs_du_cours(instance.cours_id))
+    precedent = getattr(instance, '_flux_precedent', None)
+    if precedent:
+        promotion_ids.append(precedent[0])
+        encadreur_ids |= _encadreurs_du_cours(precedent[1])
+    ics.invalider(promotion_ids, encadreur_ids)
+
+
+@receiver(post_save, sender=Cours)
+def cours_invalider_flux(sender, instance, created, raw=False, **kwargs):
+    # Le titre du cours apparaît dans chaque événement
+    if created or raw:
+        return
+    promotion_ids = Horaire.objects.filter(cours=instance).values_list('promotion_id', flat=True).distinct()
+    ics.invalider(list(promotion_ids), _encadreurs_du_cours(instance.pk))
+
+
+@receiver(pre_delete, sender=Cours)
+def cours_supprime_invalider_flux(sender, instance, **kwargs):
+    # Les horaires passent à cours=NULL sans signal
+    promotion_ids = Horaire.objects.filter(cours=instance).values_list('promotion_id', flat=True).distinct()
+    ics.invalider(list(promotion_ids), _encadreurs_du_cours(instance.pk))
+
+
+@receiver(m2m_changed, sender=Cours.encadreurs.through)
+def cours_encadreurs_invalider_flux(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and not reverse:
+        instance._encadreurs_flux = set(instance.encadreurs.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # user.cours_encadres.add(...) : un seul flux, celui de l'encadreur
+        ics.invalider(encadreur_ids=[instance.pk])
+    elif action == 'post_clear':
+        ics.invalider(encadreur_ids=getattr(instance, '_encadreurs_flux', ()))
+    else:
+        ics.invalider(encadreur_ids=pk_set or ())
+
+
+@receiver(post_save, sender=Promotion)
+def promotion_invalider_flux(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ics.invalider(promotion_ids=[instance.pk])
+
+
+@receiver(post_save, sender=User)
+def encadreur_invalider_flux(sender, instance, raw=False, **kwargs):
+    # Le nom de l'encadreur est le nom du calendrier : pas à chaque last_login
+    if raw or 'ENCADREUR' not in (instance.role, getattr(instance, '_role_precedent', None)):
+        return
+    if getattr(instance, '_nom_modifie', True) or instance.role != instance._role_precedent:
+        ics.invalider(encadreur_ids=[instance.pk])
+
+
+@receiver(pre_save, sender=User)
+def user_memoriser_actif(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'is_active' not in update_fields:
+        instance._actif_modifie = False
+        return
+    instance._actif_modifie = getattr(instance, '_actif_charge', None) != instance.is_active
+    instance._actif_charge = instance.is_active
+
+
+@receiver(post_save, sender=User)
+def user_abonne_invalider(sender, instance, created, raw=False, **kwargs):
+    """Droits de l'abonné relus au prochain accès à ses flux (rôle, promotion, compte actif)"""
+    if created or raw:
+        return
+    if (
+        getattr(instance, '_actif_modifie', True)
+        or getattr(instance, '_role_precedent', None) != instance.role
+        or getattr(instance, '_promotion_precedente', None) != instance.promotion_id
+    ):
+        response_cache.bump(ics.abonne_scope(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def user_supprime_abonne_invalider(sender, instance, **kwargs):
+    response_cache.bump(ics.abonne_scope(instance.pk))
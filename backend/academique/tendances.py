@@ -0,0 +1,121 @@
+from datetime import date, datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from academique.models import Cours, StatMensuelle
+from users.models import User
+
+
+ETUDIANTS = 'etudiants'
+COURS = 'cours'
+
+
+def mois_de(dt):
+    """Premier jour du mois (heure locale) d'un datetime"""
+    return timezone.localtime(dt).date().replace(day=1)
+
+
+def mois_decale(mois, delta):
+    """Ajoute `delta` mois (éventuellement négatif) au premier jour d'un mois"""
+    index = mois.year * 12 + (mois.month - 1) + delta
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _ajouter(entite, mois, promotion_ids, delta):
+    for promotion_id in promotion_ids:
+        lignes = StatMensuelle.objects.filter(mois=mois, entite=entite, promotion_id=promotion_id)
+        if lignes.update(nombre=F('nombre') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                StatMensuelle.objects.create(
+                    mois=mois, entite=entite, promotion_id=promotion_id, nombre=delta
+                )
+        except IntegrityError:
+            # Ligne créée entre-temps par une écriture concurrente
+            lignes.update(nombre=F('nombre') + delta)
+
+
+def appliquer(entite, mois, promotion_id, delta):
+    """Ajoute `delta` au total du mois et, si fournie, au détail de la promotion"""
+    if delta == 0:
+        return
+    cibles = [None] if promotion_id is None else [None, promotion_id]
+    _ajouter(entite, mois, cibles, delta)
+
+
+def appliquer_detail(entite, mois, promotion_ids, delta):
+    """Ajoute `delta` au seul détail par promotion (le total ne bouge pas)"""
+    if delta == 0:
+        return
+    _ajouter(entite, mois, promotion_ids, delta)
+
+
+@transaction.atomic
+def reconstruire():
+    """Recalcule tous les agrégats depuis les tables de base (backfill)"""
+    StatMensuelle.objects.all().delete()
+    lignes = []
+
+    etudiants = User.objects.filter(role='ETUDIANT').annotate(m=TruncMonth('date_joined'))
+    for row in etudiants.values('m').annotate(n=Count('id')):
+        lignes.append(StatMensuelle(mois=row['m'].date(), entite=ETUDIANTS, nombre=row['n']))
+    for row in etudiants.exclude(promotion=None).values('m', 'promotion_id').annotate(n=Count('id')):
+        lignes.append(StatMensuelle(
+            mois=row['m'].date(), entite=ETUDIANTS,
+            promotion_id=row['promotion_id'], nombre=row['n'],
+        ))
+
+    cours = Cours.objects.annotate(m=TruncMonth('date_creation'))
+    for row in cours.values('m').annotate(n=Count('id')):
+        lignes.append(StatMensuelle(mois=row['m'].date(), entite=COURS, nombre=row['n']))
+
+    liens = Cours.promotions.through.objects.annotate(m=TruncMonth('cours__date_creation'))
+    for row in liens.values('m', 'promotion_id').annotate(n=Count('id')):
+        lignes.append(StatMensuelle(
+            mois=row['m'].date(), entite=COURS,
+            promotion_id=row['promotion_id'], nombre=row['n'],
+        ))
+
+    StatMensuelle.objects.bulk_create(lignes, batch_size=500)
+    return len(lignes)
+
+
+def lire(entite, debut, promotion_id=None, par_promotion=False):
+    """Séries mensuelles depuis `debut` : O(mois) lignes lues, sans toucher aux tables de base.
+
+    Retourne [{'month': datetime, 'count': n}] (total ou une promotion),
+    ou avec `par_promotion` [{'month', 'promotion_id', 'count'}].
+    """
+    return lire_series([entite], debut, promotion_id, par_promotion)[entite]
+
+
+def lire_series(entites, debut, promotion_id=None, par_promotion=False):
+    """Comme `lire` pour plusieurs entités en une seule requête : {entite: série}"""
+    queryset = StatMensuelle.objects.filter(entite__in=entites, mois__gte=debut)
+    if par_promotion:
+        queryset = queryset.exclude(promotion=None)
+        if promotion_id is not None:
+            queryset = queryset.filter(promotion_id=promotion_id)
+        rows = queryset.values('entite', 'mois', 'promotion_id').annotate(count=Sum('nombre'))
+        rows = rows.order_by('entite', 'mois', 'promotion_id')
+    else:
+        queryset = queryset.filter(promotion_id=promotion_id)
+        rows = queryset.values('entite', 'mois').annotate(count=Sum('nombre')).order_by('entite', 'mois')
+
+    result = {entite: [] for entite in entites}
+    for row in rows:
+        if not row['count']:
+            continue
+        item = {
+            # Même format que l'ancien TruncMonth : datetime au début du mois
+            'month': timezone.make_aware(datetime.combine(row['mois'], time.min)),
+            'count': row['count'],
+        }
+        if par_promotion:
+            item['promotion_id'] = row['promotion_id']
+        result[row['entite']].append(item)
+    return result
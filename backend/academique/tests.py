@@ -1,3 +1,1011 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.db import OperationalError, connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from academique import acces, compteurs, ics, tendances
+from academique.conflits import ConflitHoraire
+from academique.models import Cours, Horaire, Promotion, StatMensuelle
+from academique.serializer.horaire import HoraireSerializer
+from core import response_cache
+from users.models import User
+
+
+class CacheClearingTestCase(TestCase):
+    """Vide les caches (réponses, index d'accès) qui survivent au rollback de chaque test"""
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+        acces.index.clear()
+
+
+class CoursListQueriesTests(CacheClearingTestCase):
+    """Le nombre de requêtes de la liste des cours ne dépend pas du nombre de cours"""
+
+    def setUp(self):
+        super().setUp()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.encadreur = User.objects.create_user(
+            email='enc@example.com', password='x',
+            first_name='En', last_name='Cadreur', role='ENCADREUR',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _create_cours(self, count):
+        for i in range(count):
+            cours = Cours.objects.create(titre=f'Cours {i}', description='desc')
+            cours.encadreurs.add(self.encadreur)
+            cours.promotions.add(self.promotion)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_cours_list_query_count_is_constant(self):
+        self._create_cours(2)
+        small, _ = self._count_queries('/api/academique/cours/')
+
+        self._create_cours(20)
+        large, response = self._count_queries('/api/academique/cours/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(response.data), 22)
+        self.assertEqual(
+            response.data[0]['encadreurs'],
+            [{'id': self.encadreur.id, 'first_name': 'En', 'last_name': 'Cadreur'}],
+        )
+        self.assertEqual(
+            response.data[0]['promotions'],
+            [{'id': self.promotion.id, 'name': 'B1'}],
+        )
+
+    def test_cours_list_etudiant_filtered_by_promotion(self):
+        self._create_cours(3)
+        Cours.objects.create(titre='Autre', description='desc')
+        etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT',
+            promotion=self.promotion,
+        )
+        self.client.force_authenticate(etudiant)
+
+        _, response = self._count_queries('/api/academique/cours/')
+
+        self.assertEqual(len(response.data), 3)
+
+
+class CursorPaginationTests(CacheClearingTestCase):
+    """Pagination par curseur opt-in sur les listes"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        for i in range(5):
+            Cours.objects.create(titre=f'Cours {i}', description='desc')
+
+    def test_without_cursor_returns_full_list(self):
+        response = self.client.get('/api/academique/cours/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 5)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        seen = []
+        url = '/api/academique/cours/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['results']), 2)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(seen, sorted(Cours.objects.values_list('id', flat=True)))
+
+    def test_page_size_is_capped(self):
+        response = self.client.get('/api/academique/cours/?page_size=100000')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+
+class CompteursTests(TestCase):
+    """Compteurs matérialisés du tableau de bord"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_counters_follow_saves_and_deletes(self):
+        etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT',
+        )
+        cours = Cours.objects.create(titre='Cours', description='desc')
+
+        response = self.client.get('/api/academique/stats/overview/')
+        self.assertEqual(response.data['etudiants'], 1)
+        self.assertEqual(response.data['cours'], 1)
+        self.assertIn('age_secondes', response.data)
+
+        etudiant.role = 'ENCADREUR'
+        etudiant.save()
+        cours.delete()
+
+        response = self.client.get('/api/academique/stats/overview/')
+        self.assertEqual(response.data['etudiants'], 0)
+        self.assertEqual(response.data['encadreurs'], 1)
+        self.assertEqual(response.data['cours'], 0)
+
+    def test_user_save_does_not_reselect_previous_state(self):
+        etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT',
+        )
+        etudiant = User.objects.get(pk=etudiant.pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            etudiant.last_login = timezone.now()
+            etudiant.save(update_fields=['last_login'])
+            etudiant.role = 'ENCADREUR'
+            etudiant.save()
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertFalse([sql for sql in selects if 'FROM "users_user"' in sql])
+
+        response = self.client.get('/api/academique/stats/overview/')
+        self.assertEqual(response.data['etudiants'], 0)
+        self.assertEqual(response.data['encadreurs'], 1)
+
+    def test_unsaved_role_change_is_counted_when_saved(self):
+        etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT',
+        )
+        etudiant = User.objects.get(pk=etudiant.pk)
+
+        # Rôle modifié en mémoire, sauvegarde partielle qui ne l'écrit pas
+        etudiant.role = 'ENCADREUR'
+        etudiant.last_login = timezone.now()
+        etudiant.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get('/api/academique/stats/overview/').data['etudiants'], 1)
+
+        etudiant.save()
+        response = self.client.get('/api/academique/stats/overview/')
+        self.assertEqual(response.data['etudiants'], 0)
+        self.assertEqual(response.data['encadreurs'], 1)
+
+    def test_overview_is_a_single_query(self):
+        self.client.get('/api/academique/stats/overview/')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/academique/stats/overview/')
+
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+
+class EnrollmentTrendTests(TestCase):
+    """Agrégats mensuels maintenus par signaux"""
+
+    def setUp(self):
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.b2 = Promotion.objects.create(name='B2', annee=2025)
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _trend(self, query=''):
+        response = self.client.get('/api/academique/stats/enrollment-trend/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_rollups_follow_changes_and_match_rebuild(self):
+        etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT', promotion=self.b1,
+        )
+        cours = Cours.objects.create(titre='Cours', description='desc')
+        cours.promotions.add(self.b1, self.b2)
+        self.b2.cours.remove(cours)
+        etudiant.promotion = self.b2
+        etudiant.save()
+
+        data = self._trend()
+        self.assertEqual([row['count'] for row in data['etudiants']], [1])
+        self.assertEqual([row['count'] for row in data['cours']], [1])
+
+        data = self._trend(f'?promotion_id={self.b1.id}')
+        self.assertEqual(data['etudiants'], [])
+        self.assertEqual([row['count'] for row in data['cours']], [1])
+
+        data = self._trend('?par_promotion=1')
+        self.assertEqual(
+            [(row['promotion_id'], row['count']) for row in data['etudiants']],
+            [(self.b2.id, 1)],
+        )
+
+        before = self._trend('?par_promotion=1')
+        tendances.reconstruire()
+        self.assertEqual(self._trend('?par_promotion=1'), before)
+
+        cours.delete()
+        etudiant.delete()
+        data = self._trend('?par_promotion=1')
+        self.assertEqual(data, {'etudiants': [], 'cours': []})
+
+
+    def test_concurrent_first_write_does_not_duplicate_month(self):
+        mois = tendances.mois_de(timezone.now())
+        tendances.appliquer(tendances.COURS, mois, None, 1)
+        update = QuerySet.update
+        appels = []
+
+        def update_perdu(queryset, **kwargs):
+            # Première mise à jour : la ligne n'existait pas encore pour cet écrivain
+            appels.append(kwargs)
+            return 0 if len(appels) == 1 else update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update_perdu):
+            tendances.appliquer(tendances.COURS, mois, None, 1)
+
+        lignes = StatMensuelle.objects.filter(mois=mois, entite=tendances.COURS, promotion=None)
+        self.assertEqual(list(lignes.values_list('nombre', flat=True)), [2])
+
+
+class ResponseCacheTests(CacheClearingTestCase):
+    """Cache des réponses par promotion, invalidé par générations"""
+
+    def setUp(self):
+        super().setUp()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.etudiants = [
+            User.objects.create_user(
+                email=f'etu{i}@example.com', password='x',
+                first_name='E', last_name='Tu', role='ETUDIANT',
+                promotion=self.promotion,
+            )
+            for i in range(2)
+        ]
+        cours = Cours.objects.create(titre='Cours', description='desc')
+        cours.promotions.add(self.promotion)
+        self.client = APIClient()
+
+    def _get(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/academique/cours/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_same_promotion_shares_cache_entry(self):
+        self._get(self.etudiants[0])
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self._get(self.etudiants[1])
+
+        self.assertEqual(len(data), 1)
+        # Seule la lecture des versions de tables (ETag) touche la base
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(response_cache.metrics()['cours_list'], {
+            'hits': 1, 'misses': 1, 'hit_ratio': 0.5,
+        })
+
+    def test_writes_invalidate_cached_list(self):
+        self._get(self.etudiants[0])
+
+        nouveau = Cours.objects.create(titre='Nouveau', description='desc')
+        nouveau.promotions.add(self.promotion)
+        self.assertEqual(len(self._get(self.etudiants[0])), 2)
+
+        self.promotion.name = 'B2'
+        self.promotion.save()
+        self.assertEqual(self._get(self.etudiants[0])[0]['promotions'][0]['name'], 'B2')
+
+
+    def test_encadreur_login_keeps_cours_list_cached(self):
+        encadreur = User.objects.create_user(
+            email='enc@example.com', password='x',
+            first_name='En', last_name='Cadreur', role='ENCADREUR',
+        )
+        encadreur = User.objects.get(pk=encadreur.pk)
+        generation = response_cache.generation('cours')
+
+        encadreur.last_login = timezone.now()
+        encadreur.save(update_fields=['last_login'])
+        encadreur.telephone = '0600000000'
+        encadreur.save()
+        self.assertEqual(response_cache.generation('cours'), generation)
+
+        # Nom modifié en mémoire mais non écrit : la sauvegarde suivante le voit
+        encadreur.last_name = 'Nouveau'
+        encadreur.save(update_fields=['last_login'])
+        self.assertEqual(response_cache.generation('cours'), generation)
+        encadreur.save()
+        self.assertGreater(response_cache.generation('cours'), generation)
+
+
+class ConditionalGetTests(CacheClearingTestCase):
+    """ETag / Last-Modified calculés depuis les versions de tables"""
+
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        # Versions incrémentées au commit
+        with self.captureOnCommitCallbacks(execute=True):
+            Promotion.objects.create(name='B1', annee=2025)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_if_none_match_returns_304_until_a_write(self):
+        response = self.client.get('/api/academique/promotions/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get('/api/academique/promotions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Promotion.objects.create(name='B2', annee=2025)
+        response = self.client.get('/api/academique/promotions/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_negotiated_format(self):
+        response = self.client.get('/api/academique/promotions/')
+        self.assertIn('Accept', response['Vary'])
+
+        response = self.client.get(
+            '/api/academique/promotions/', HTTP_IF_NONE_MATCH=response['ETag'], HTTP_ACCEPT='text/html',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        etag = self.client.get('/api/auth/users/me/')['ETag']
+        other = User.objects.create_user(
+            email='other@example.com', password='x',
+            first_name='O', last_name='Ther', role='ADMIN',
+        )
+        self.client.force_authenticate(other)
+
+        response = self.client.get('/api/auth/users/me/', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'other@example.com')
+
+
+class CoursAccessIndexTests(CacheClearingTestCase):
+    """Droits sur les cours lus dans l'index en mémoire"""
+
+    def setUp(self):
+        super().setUp()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.autre = Promotion.objects.create(name='B2', annee=2025)
+        self.etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT', promotion=self.promotion,
+        )
+        self.encadreur = User.objects.create_user(
+            email='enc@example.com', password='x',
+            first_name='En', last_name='Cadreur', role='ENCADREUR',
+        )
+        self.cours = []
+        for i in range(5):
+            cours = Cours.objects.create(titre=f'Cours {i}', description='desc')
+            cours.promotions.add(self.promotion if i % 2 == 0 else self.autre)
+            self.cours.append(cours)
+        self.cours[1].encadreurs.add(self.encadreur)
+
+    def test_get_many_answers_in_two_queries(self):
+        ids = [cours.id for cours in self.cours]
+
+        with self.assertNumQueries(2):
+            entries = acces.index.get_many(ids)
+        with self.assertNumQueries(0):
+            self.assertEqual(acces.index.get_many(ids), entries)
+
+        self.assertEqual(entries[ids[0]], (frozenset([self.promotion.id]), frozenset()))
+        self.assertEqual(entries[ids[1]], (frozenset([self.autre.id]), frozenset([self.encadreur.id])))
+
+    def test_accessible_cours_answers_many_courses_in_one_call(self):
+        ids = [cours.id for cours in self.cours]
+
+        with self.assertNumQueries(2):
+            lisibles = acces.accessible_cours(self.etudiant, ids)
+        with self.assertNumQueries(0):
+            modifiables = acces.accessible_cours(self.encadreur, ids, write=True)
+            self.assertEqual(acces.accessible_cours(self.encadreur, ids), set(ids))
+
+        self.assertEqual(lisibles, {ids[0], ids[2], ids[4]})
+        self.assertEqual(modifiables, {ids[1]})
+        self.assertEqual(acces.accessible_cours(self.etudiant, ids, write=True), set())
+
+    def test_entry_reloaded_before_commit_is_dropped_at_commit(self):
+        cours = self.cours[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            cours.promotions.add(self.promotion)
+            # Lecteur concurrent qui recharge les anciens liens avant le commit
+            acces.index._data[cours.id] = (float('inf'), (frozenset([self.autre.id]), frozenset()))
+
+        self.assertTrue(acces.can_access(self.etudiant, cours.id))
+
+    def test_m2m_change_invalidates_entry(self):
+        cours = self.cours[1]
+        self.assertFalse(acces.can_access(self.etudiant, cours.id))
+
+        cours.promotions.add(self.promotion)
+        self.assertTrue(acces.can_access(self.etudiant, cours.id))
+
+        self.promotion.cours.remove(cours)
+        self.assertFalse(acces.can_access(self.etudiant, cours.id))
+
+    def test_detail_authorizes_from_warm_index(self):
+        client = APIClient()
+        client.force_authenticate(self.etudiant)
+        url = f'/api/academique/cours/{self.cours[1].id}/'
+        acces.index.clear()
+        with CaptureQueriesContext(connection) as cold:
+            client.get(url)
+
+        with CaptureQueriesContext(connection) as warm:
+            response = client.get(url)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(warm), len(cold) - 2)
+
+
+class EtudiantsImportTests(CacheClearingTestCase):
+    """Import en masse d'étudiants depuis un CSV"""
+
+    url = '/api/academique/etudiants/import/'
+
+    def setUp(self):
+        super().setUp()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.autre = Promotion.objects.create(name='B2', annee=2025)
+        self.coordon = User.objects.create_user(
+            email='coord@example.com', password='x',
+            first_name='Co', last_name='Ord', role='COORDON', promotion=self.promotion,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.coordon)
+
+    def _post(self, lines, **data):
+        contenu = '\n'.join(['email,first_name,last_name,promotion'] + lines).encode()
+        data['fichier'] = SimpleUploadedFile('etudiants.csv', contenu, content_type='text/csv')
+        return self.client.post(self.url, data, format='multipart')
+
+    def test_import_reports_errors_per_row(self):
+        response = self._post([
+            'a@example.com,A,Un,',
+            'coord@example.com,Deja,La,',
+            'a@example.com,Double,Ligne,',
+            'pas-un-email,X,Y,',
+            'b@example.com,B,Deux,B2',
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['crees'], 1)
+        self.assertEqual([e['ligne'] for e in response.data['erreurs']], [3, 4, 5, 6])
+        etudiant = User.objects.get(email='a@example.com')
+        self.assertEqual((etudiant.role, etudiant.promotion_id), ('ETUDIANT', self.promotion.id))
+        self.assertFalse(etudiant.has_usable_password())
+
+    def test_import_updates_counters_and_trend(self):
+        compteurs.recalculer()
+        self._post([f'e{i}@example.com,E,{i},' for i in range(3)])
+
+        valeurs, _, _ = compteurs.lire()
+        self.assertEqual(valeurs[compteurs.cle_role('ETUDIANT')], 3)
+        mois = tendances.mois_de(timezone.now())
+        serie = tendances.lire(tendances.ETUDIANTS, mois, promotion_id=self.promotion.id)
+        self.assertEqual([row['count'] for row in serie], [3])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # Premier import : crée les lignes d'agrégats du mois
+        self._post(['w@example.com,W,0,'])
+        with CaptureQueriesContext(connection) as small:
+            self._post([f's{i}@example.com,S,{i},' for i in range(2)])
+        with CaptureQueriesContext(connection) as large:
+            self._post([f'l{i}@example.com,L,{i},' for i in range(40)])
+
+        self.assertEqual(len(small), len(large))
+
+    def _post_bytes(self, contenu, filename='etudiants.csv'):
+        fichier = SimpleUploadedFile(filename, contenu, content_type='text/csv')
+        return self.client.post(self.url, {'fichier': fichier}, format='multipart')
+
+    def test_excel_fr_csv_falls_back_to_cp1252(self):
+        response = self._post_bytes('email,first_name,last_name\ne@example.com,Élodie,Nœud\n'.encode('cp1252'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(email='e@example.com').first_name, 'Élodie')
+
+    def test_unreadable_files_are_400(self):
+        self.assertEqual(self._post_bytes(b'email,first_name,last_name\n\x81,A,B\n').status_code, 400)
+        trop_long = b'email,first_name,last_name\n"' + b'x' * 200000 + b'",A,B\n'
+        self.assertEqual(self._post_bytes(trop_long).status_code, 400)
+        self.assertEqual(self._post_bytes(b'pas un zip', 'etudiants.xlsx').status_code, 400)
+
+    def test_passwords_are_hashed_outside_the_transaction(self):
+        profondeur = len(connection.atomic_blocks)
+        appels = []
+
+        def make_password(password):
+            appels.append(len(connection.atomic_blocks))
+            return '!'
+
+        with mock.patch('academique.imports.make_password', make_password):
+            self._post([f'p{i}@example.com,P,{i},' for i in range(3)])
+
+        self.assertEqual(appels, [profondeur] * 3)
+
+
+class ExportTests(CacheClearingTestCase):
+    """Exports CSV en flux"""
+
+    def setUp(self):
+        super().setUp()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.autre = Promotion.objects.create(name='B2', annee=2025)
+        self.coordon = User.objects.create_user(
+            email='coord@example.com', password='x',
+            first_name='Co', last_name='Ord', role='COORDON', promotion=self.promotion,
+        )
+        self.encadreur = User.objects.create_user(
+            email='enc@example.com', password='x',
+            first_name='En', last_name='Cadreur', role='ENCADREUR',
+        )
+        for i, promotion in enumerate([self.promotion, self.autre]):
+            User.objects.create_user(
+                email=f'etu{i}@example.com', password='x',
+                first_name='Étienne', last_name=str(i), role='ETUDIANT', promotion=promotion,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.coordon)
+
+    def _lines(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+
+    def test_coordon_exports_own_students_only(self):
+        lines = self._lines('/api/academique/exports/users/')
+
+        self.assertEqual(lines[0].split(',')[:3], ['id', 'email', 'prenom'])
+        self.assertEqual(len(lines), 2)
+        self.assertIn('etu0@example.com,Étienne,0', lines[1])
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_cours_export_loads_relations_per_block(self):
+        for i in range(5):
+            cours = Cours.objects.create(titre=f'Cours {i}', description='desc')
+            cours.promotions.add(self.promotion, self.autre)
+            cours.encadreurs.add(self.encadreur)
+
+        with CaptureQueriesContext(connection) as ctx:
+            lines = self._lines('/api/academique/exports/cours/')
+
+        self.assertEqual(len(lines), 6)
+        self.assertIn('Cours 0,desc,"B1, B2",En Cadreur,', lines[1])
+        # 3 blocs × 2 relations
+        through = [q for q in ctx.captured_queries if '_cours_promotions' in q['sql'] or '_cours_encadreurs' in q['sql']]
+        self.assertEqual(len(through), 6)
+
+    def test_formulas_are_exported_as_text(self):
+        Cours.objects.create(titre='=HYPERLINK("http://example.com","clic")', description='-1+2')
+
+        lines = self._lines('/api/academique/exports/cours/')
+
+        self.assertIn('"\'=HYPERLINK(""http://example.com"",""clic"")",\'-1+2,', lines[1])
+
+    def test_unknown_type_is_rejected(self):
+        response = self.client.get('/api/academique/exports/horaires/?type=pdf')
+
+        self.assertEqual(response.status_code, 400)
+
+
+class CalendrierTests(CacheClearingTestCase):
+    """Fenêtres start/end et vues semaine / mois des horaires"""
+
+    def setUp(self):
+        super().setUp()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.autre = Promotion.objects.create(name='B2', annee=2025)
+        self.etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT', promotion=self.promotion,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.etudiant)
+
+    def _horaire(self, titre, debut, fin=None, promotion=None):
+        return Horaire.objects.create(
+            titre=titre, date_debut=self._at(debut), date_fin=self._at(fin) if fin else None,
+            promotion=promotion or self.promotion,
+        )
+
+    def _at(self, value):
+        return timezone.make_aware(timezone.datetime.fromisoformat(value))
+
+    def test_window_includes_overlapping_events(self):
+        self._horaire('Avant', '2025-10-05 08:00', '2025-10-05 10:00')
+        self._horaire('Chevauche', '2025-10-05 22:00', '2025-10-06 02:00')
+        self._horaire('Dedans', '2025-10-07 08:00')
+        self._horaire('Après', '2025-10-13 08:00', '2025-10-13 10:00')
+        self._horaire('Autre promo', '2025-10-07 08:00', promotion=self.autre)
+
+        response = self.client.get('/api/academique/horaires/', {'start': '2025-10-06', 'end': '2025-10-13'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(h['titre'] for h in response.data), ['Chevauche', 'Dedans'])
+
+    def test_week_view_returns_grid_fields_only(self):
+        self._horaire('Lundi', '2025-10-06 08:00', '2025-10-06 10:00')
+        self._horaire('Dimanche', '2025-10-12 20:00', '2025-10-12 21:00')
+        self._horaire('Semaine suivante', '2025-10-13 08:00')
+
+        response = self.client.get('/api/academique/horaires/semaine/', {'date': '2025-10-09'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([h['titre'] for h in response.data['horaires']], ['Lundi', 'Dimanche'])
+        self.assertEqual(
+            set(response.data['horaires'][0]),
+            {'id', 'titre', 'date_debut', 'date_fin', 'lieu', 'cours_id', 'cours__titre'},
+        )
+
+    def test_month_view(self):
+        self._horaire('Octobre', '2025-10-31 08:00')
+        self._horaire('Novembre', '2025-11-01 08:00')
+
+        response = self.client.get('/api/academique/horaires/mois/', {'date': '2025-10-15'})
+
+        self.assertEqual([h['titre'] for h in response.data['horaires']], ['Octobre'])
+
+    def test_end_before_start_is_rejected(self):
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='A', last_name='D', role='ADMIN',
+        ))
+        response = self.client.post('/api/academique/horaires/', {
+            'titre': 'Inversé', 'date_debut': '2025-10-06T10:00:00Z', 'date_fin': '2025-10-06T08:00:00Z',
+            'promotion': self.promotion.id,
+        })
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_fin', response.data)
+
+
+class ConflitsHorairesTests(CacheClearingTestCase):
+    """Détection des doubles réservations (lieu, promotion, encadreur)"""
+
+    def setUp(self):
+        super().setUp()
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.b2 = Promotion.objects.create(name='B2', annee=2025)
+        self.encadreur = User.objects.create_user(
+            email='enc@example.com', password='x', first_name='En', last_name='C', role='ENCADREUR',
+        )
+        self.cours = Cours.objects.create(titre='Anatomie', description='desc')
+        self.cours.encadreurs.add(self.encadreur)
+        self.autre_cours = Cours.objects.create(titre='Histologie', description='desc')
+        self.autre_cours.encadreurs.add(self.encadreur)
+        self.existant = Horaire.objects.create(
+            titre='Existant', date_debut='2025-10-06T08:00:00Z', date_fin='2025-10-06T10:00:00Z',
+            lieu='Amphi A', promotion=self.b1, cours=self.cours,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@example.com', password='x', first_name='A', last_name='D', role='ADMIN',
+        ))
+
+    def _post(self, **data):
+        payload = {'titre': 'Nouveau', 'date_debut': '2025-10-06T09:00:00Z', 'date_fin': '2025-10-06T11:00:00Z'}
+        payload.update(data)
+        return self.client.post('/api/academique/horaires/', payload)
+
+    def test_same_room_is_rejected_case_insensitively(self):
+        response = self._post(lieu=' amphi a', promotion=self.b2.id)
+
+        self.assertEqual(response.status_code, 409)
+        conflit = response.json()['conflits'][0]
+        self.assertEqual(conflit['horaire'], self.existant.id)
+        self.assertEqual(conflit['date_debut'], '2025-10-06T08:00:00Z')
+        self.assertEqual(conflit['ressources'], ['lieu'])
+
+    def test_shared_encadreur_is_rejected(self):
+        response = self._post(lieu='Salle 2', promotion=self.b2.id, cours=self.autre_cours.id)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['conflits'][0]['ressources'], ['encadreur'])
+
+    def test_just_assigned_encadreur_is_checked_despite_warm_index(self):
+        cours = Cours.objects.create(titre='Embryologie', description='desc')
+        acces.index.get(cours.id)
+        # Liaison faite par un autre processus : l'index local n'est pas invalidé
+        Cours.encadreurs.through.objects.create(cours=cours, user=self.encadreur)
+
+        response = self._post(lieu='Salle 2', promotion=self.b2.id, cours=cours.id)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['conflits'][0]['ressources'], ['encadreur'])
+
+    def test_conflicts_are_rechecked_on_save(self):
+        serializer = HoraireSerializer(data={
+            'titre': 'Nouveau', 'date_debut': '2025-10-07T09:00:00Z', 'lieu': 'Salle 3',
+        })
+        self.assertTrue(serializer.is_valid())
+        # Création concurrente entre la validation et l'enregistrement
+        Horaire.objects.create(titre='Concurrent', date_debut='2025-10-07T08:00:00Z',
+                               date_fin='2025-10-07T10:00:00Z', lieu='Salle 3')
+
+        with self.assertRaises(ConflitHoraire):
+            serializer.save()
+        self.assertFalse(Horaire.objects.filter(titre='Nouveau').exists())
+
+    def test_title_change_of_double_booked_horaire_is_accepted(self):
+        doublon = Horaire.objects.create(
+            titre='Doublon', date_debut='2025-10-06T09:00:00Z', date_fin='2025-10-06T11:00:00Z', lieu='Amphi A',
+        )
+        url = f'/api/academique/horaires/{doublon.id}/'
+
+        self.assertEqual(self.client.put(url, {'titre': 'Doublon renommé', 'lieu': 'Amphi A'}).status_code, 200)
+        self.assertEqual(self.client.put(url, {'date_fin': '2025-10-06T11:30:00Z'}).status_code, 409)
+
+    def test_locked_database_is_503(self):
+        with mock.patch(
+            'academique.serializer.horaire.conflits_horaire',
+            side_effect=OperationalError('database is locked'),
+        ):
+            response = self._post(lieu='Salle 9')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+    def test_too_long_horaire_is_rejected_in_plans(self):
+        response = self.client.post('/api/academique/horaires/verifier/', {'horaires': [
+            {'date_debut': '2025-10-06T09:00:00Z', 'date_fin': '2025-12-06T09:00:00Z'},
+        ]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_back_to_back_and_other_resources_are_accepted(self):
+        self.assertEqual(self._post(lieu='Amphi A', date_debut='2025-10-06T10:00:00Z').status_code, 201)
+        self.assertEqual(self._post(lieu='Salle 2', promotion=self.b2.id).status_code, 201)
+
+    def test_update_does_not_conflict_with_itself(self):
+        response = self.client.put(
+            f'/api/academique/horaires/{self.existant.id}/', {'date_fin': '2025-10-06T10:30:00Z'},
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_plan_check_reports_internal_and_existing_conflicts(self):
+        plan = [
+            {'date_debut': '2025-10-06T09:30:00Z', 'date_fin': '2025-10-06T10:30:00Z', 'lieu': 'Labo', 'promotion': self.b1.id},
+            {'date_debut': '2025-10-07T08:00:00Z', 'date_fin': '2025-10-07T10:00:00Z', 'lieu': 'Labo', 'promotion': self.b2.id},
+            {'date_debut': '2025-10-07T09:00:00Z', 'lieu': 'labo', 'promotion': self.b1.id},
+            {'date_debut': '2025-10-08T08:00:00Z', 'date_fin': '2025-10-08T09:00:00Z', 'lieu': 'Labo'},
+        ]
+
+        # Index des droits froid : horaires de la période + deux lectures d'index
+        acces.index.clear()
+        with self.assertNumQueries(3):
+            response = self.client.post('/api/academique/horaires/verifier/', {'horaires': plan}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        paires = sorted(
+            (c['ressource'], sorted(map(str, [c['a'], c['b']]))) for c in response.data['conflits']
+        )
+        self.assertEqual(paires, [
+            ('lieu', sorted(["{'plan': 1}", "{'plan': 2}"])),
+            ('promotion', sorted(["{'horaire': %d}" % self.existant.id, "{'plan': 0}"])),
+        ])
+
+
+class IcsFeedTests(CacheClearingTestCase):
+    """Flux ICS pré-rendus, régénérés seulement si un horaire concerné change"""
+
+    def setUp(self):
+        super().setUp()
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.b2 = Promotion.objects.create(name='B2', annee=2025)
+        self.cours = Cours.objects.create(titre='Anatomie', description='desc')
+        debut = timezone.now() + timezone.timedelta(days=1)
+        self.horaire = Horaire.objects.create(
+            titre='CM 1', date_debut=debut, date_fin=debut + timezone.timedelta(hours=2),
+            lieu='Amphi A, bâtiment 2', promotion=self.b1, cours=self.cours,
+        )
+        self.etudiant = User.objects.create_user(
+            email='etu@example.com', password='x', role='ETUDIANT', promotion=self.b1,
+        )
+        self.url = ics.feed_path(ics.PROMOTION, self.b1.id, self.etudiant)
+
+    def test_feed_renders_events(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertIn(f'UID:horaire-{self.horaire.id}@ecole-des-excellents\r\n', body)
+        self.assertIn('SUMMARY:Anatomie — CM 1\r\n', body)
+        self.assertIn('LOCATION:Amphi A\\, bâtiment 2\r\n', body)
+
+    def test_bad_token_is_404(self):
+        self.assertEqual(self.client.get(self.url.replace('/ics/promotion/', '/ics/encadreur/')).status_code, 404)
+
+    def test_warm_feed_costs_no_query_and_supports_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_only_relevant_changes_regenerate(self):
+        etag = self.client.get(self.url)['ETag']
+
+        Horaire.objects.create(titre='Autre', date_debut=timezone.now(), promotion=self.b2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url)['ETag'], etag)
+
+        self.horaire.titre = 'CM 1 bis'
+        self.horaire.save()
+        response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('CM 1 bis', response.content.decode())
+
+    def test_revoked_or_foreign_token_is_404(self):
+        token = self.url.rsplit('/', 1)[1]
+        self.assertEqual(
+            self.client.get(f'/api/academique/ics/promotion/{self.b2.id}/{token}').status_code, 404,
+        )
+
+        ics.revoquer(self.etudiant.id)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        nouvelle = ics.feed_path(ics.PROMOTION, self.b1.id, self.etudiant)
+        self.assertEqual(self.client.get(nouvelle).status_code, 200)
+
+    def test_student_leaving_promotion_loses_only_own_subscription(self):
+        camarade = User.objects.create_user(
+            email='camarade@example.com', password='x', role='ETUDIANT', promotion=self.b1,
+        )
+        url_camarade = ics.feed_path(ics.PROMOTION, self.b1.id, camarade)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        etudiant = User.objects.get(pk=self.etudiant.pk)
+        etudiant.promotion = self.b2
+        etudiant.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(url_camarade).status_code, 200)
+
+        camarade.delete()
+        self.assertEqual(self.client.get(url_camarade).status_code, 404)
+
+    def test_deactivated_encadreur_feed_is_revoked(self):
+        encadreur = User.objects.create_user(email='enc@example.com', password='x', role='ENCADREUR')
+        url = ics.feed_path(ics.ENCADREUR, encadreur.id, encadreur)
+        etag = self.client.get(url)['ETag']
+
+        # Connexion : ni droits ni nom changés, flux toujours en cache
+        encadreur = User.objects.get(pk=encadreur.pk)
+        encadreur.last_login = timezone.now()
+        encadreur.save(update_fields=['last_login'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url)['ETag'], etag)
+
+        encadreur.is_active = False
+        encadreur.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_newly_assigned_encadreur_feed_is_regenerated(self):
+        encadreur = User.objects.create_user(email='enc@example.com', password='x', role='ENCADREUR')
+        url = ics.feed_path(ics.ENCADREUR, encadreur.id, encadreur)
+        self.assertNotIn('CM 1', self.client.get(url).content.decode())
+        acces.index.get(self.cours.id)  # index chaud, encore sans l'encadreur
+
+        Cours.encadreurs.through.objects.create(cours=self.cours, user=encadreur)
+        self.horaire.save()
+
+        self.assertIn('CM 1', self.client.get(url).content.decode())
+
+
+class DashboardTests(CacheClearingTestCase):
+    """Tableau de bord composé : sections au choix, chacune en cache"""
+
+    def setUp(self):
+        super().setUp()
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.b2 = Promotion.objects.create(name='B2', annee=2025)
+        self.coordon = User.objects.create_user(
+            email='coordon@example.com', password='x',
+            first_name='Co', last_name='Ord', role='COORDON', promotion=self.b1,
+        )
+        User.objects.create_user(
+            email='enc@example.com', password='x',
+            first_name='En', last_name='Cad', role='ENCADREUR', promotion=self.b1,
+        )
+        User.objects.create_user(
+            email='enc2@example.com', password='x',
+            first_name='En', last_name='Deux', role='ENCADREUR', promotion=self.b2,
+        )
+        debut = timezone.now() + timezone.timedelta(days=1)
+        Horaire.objects.create(titre='CM', date_debut=debut, promotion=self.b1)
+        Horaire.objects.create(titre='TD', date_debut=debut, promotion=self.b2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.coordon)
+
+    def test_matches_separate_endpoints(self):
+        data = self.client.get('/api/academique/dashboard/').data
+
+        for section, url in [
+            ('coordons', 'stats/coordons/'),
+            ('encadreurs', 'stats/encadreurs/'),
+            ('horaires', 'stats/horaires/'),
+            ('promotions', 'promotions/'),
+            ('enrollment_trend', 'stats/enrollment-trend/'),
+        ]:
+            self.assertEqual(data[section], self.client.get(f'/api/academique/{url}').data, section)
+        self.assertEqual([row['titre'] for row in data['horaires']], ['CM'])
+        self.assertEqual(data['overview']['encadreurs'], 2)
+        self.assertIn('age_secondes', data['overview'])
+
+    def test_sections_are_selectable_and_cached(self):
+        url = '/api/academique/dashboard/?sections=coordons,encadreurs'
+        # Les deux listes de membres : une seule requête
+        with self.assertNumQueries(1):
+            data = self.client.get(url).data
+        self.assertEqual(set(data), {'coordons', 'encadreurs'})
+
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        # Une section déjà en cache n'est pas recalculée avec les autres
+        with self.assertNumQueries(1):
+            self.client.get('/api/academique/dashboard/?sections=coordons,promotions')
+
+    def test_writes_invalidate_only_dependent_sections(self):
+        url = '/api/academique/dashboard/?sections=encadreurs,promotions'
+        self.client.get(url)
+
+        User.objects.create_user(
+            email='enc3@example.com', password='x',
+            first_name='En', last_name='Trois', role='ENCADREUR', promotion=self.b1,
+        )
+        with self.assertNumQueries(1):
+            data = self.client.get(url).data
+        self.assertEqual(len(data['encadreurs']), 2)
+
+    def test_unknown_section_is_rejected(self):
+        response = self.client.get('/api/academique/dashboard/?sections=overview,secret')
+
+        self.assertEqual(response.status_code, 400)
@@ -4,6 +4,10 @@ from academique.views import (
     cours_detail, 
     horaire_detail, 
     horaires_list_create,
+    horaires_semaine,
+    horaires_mois,
+    horaires_verifier,
+    stats_dashboard,
     stats_overview,
     enrollment_trend,
     coordons_list,
@@ -12,10 +16,16 @@ from academique.views import (
     encadreurs_crud,
     encadreur_detail,
     etudiants_crud,
+    etudiants_import,
     etudiant_detail,
     coordons_crud,
     coordon_detail,
     promotions_list,
+    export_users,
+    export_cours,
+    export_horaires,
+    ics_links,
+    ics_feed,
 )
 
 urlpatterns = [
@@ -23,6 +33,11 @@ urlpatterns = [
     path('cours/<int:pk>/', cours_detail),
     path('horaires/', horaires_list_create),
     path('horaires/<int:pk>/', horaire_detail),
+    path('horaires/semaine/', horaires_semaine),
+    path('horaires/mois/', horaires_mois),
+    path('horaires/verifier/', horaires_verifier),
+    # Tableau de bord complet (toutes les sections stats/ + promotions/)
+    path('dashboard/', stats_dashboard),
     path('stats/overview/', stats_overview),
     path('stats/enrollment-trend/', enrollment_trend),
     path('stats/coordons/', coordons_list),
@@ -35,8 +50,16 @@ urlpatterns = [
     path('encadreurs/<int:pk>/', encadreur_detail),
     # CRUD Étudiants
     path('etudiants/', etudiants_crud),
+    path('etudiants/import/', etudiants_import),
     path('etudiants/<int:pk>/', etudiant_detail),
     # CRUD Coordons
     path('coordons/', coordons_crud),
     path('coordons/<int:pk>/', coordon_detail),
+    # Exports CSV / XLSX
+    path('exports/users/', export_users),
+    path('exports/cours/', export_cours),
+    path('exports/horaires/', export_horaires),
+    # Flux ICS
+    path('ics/', ics_links),
+    path('ics/<str:kind>/<int:obj_id>/<str:token>.ics', ics_feed),
 ]
@@ -11,28 +11,64 @@ from academique.serializer.cours_list import CoursListSerializer
 from academique.serializer.cours_create import CoursCreateSerializer
 from academique.serializer.cours_detail import CoursDetailSerializer
 from academique.serializer.cours_update import CoursUpdateSerializer
-from academique.serializer.horaire import HoraireSerializer
+from academique.serializer.horaire import HoraireSerializer, HorairePlanSerializer
+from academique.conflits import ConflitHoraire, conflits_plan, ecriture_concurrente
 from academique.permissions import CoursPermission, HorairePermission
+from academique.queries import (
+    cours_list_queryset,
+    cours_detail_queryset,
+    horaires_fenetre,
+    horaires_visibles,
+    parse_instant,
+)
+from datetime import datetime, time, timedelta
 from django.shortcuts import get_object_or_404
 from users.models import User
 from users.serializers import UserListSerializer, UserCreateSerializer, UserAdminDetailSerializer
-from django.db.models import Count
+from django.utils import timezone
+from django.conf import settings
+from django.db import OperationalError
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_safe
+from core import batch, response_cache
+from core.conditional import versioned
+from core.fieldsets import Selection
+from core.pagination import paginated_data, paginated_response
+from core import exports
+from users.permissions import IsRole
+from academique import compteurs, dashboard, ics, imports, tendances
+from academique import exports as academique_exports
+
+
+# Taille maximale d'un plan vérifié en une fois (un semestre)
+HORAIRES_PLAN_MAX = 5000
+
+
+def _promotion_key_cours(request):
+    # Tous les étudiants d'une promotion voient la même liste, le staff voit tout
+    user = request.user
+    return user.promotion_id if user.role == 'ETUDIANT' else 'all'
+
+
+def _promotion_key_horaires(request):
+    user = request.user
+    return user.promotion_id if user.role in ('ETUDIANT', 'ENCADREUR') else 'all'
 
 
 @api_view(['GET', 'POST'])
 @permission_classes([CoursPermission])
+@versioned('cours', 'promotion', variant=_promotion_key_cours)
 def cours_list_create(request):
 
     if request.method == 'GET':
-        user = request.user
-
-        if user.role == 'ETUDIANT':
-            cours = Cours.objects.filter(promotions=user.promotion)
-        else:
-            cours = Cours.objects.all()
-
-        serializer = CoursListSerializer(cours, many=True)
-        return Response(serializer.data)
+        data = response_cache.cached_data(
+            'cours_list',
+            scopes=('cours', 'promotion'),
+            variant=(_promotion_key_cours(request), request.get_host(), request.query_params.urlencode()),
+            build=lambda: paginated_data(request, cours_list_queryset(request.user), CoursListSerializer),
+        )
+        return Response(data)
 
     serializer = CoursCreateSerializer(data=request.data)
     if serializer.is_valid():
@@ -49,7 +85,11 @@ def cours_list_create(request):
 @permission_classes([CoursPermission])
 def cours_detail(request, pk):
 
-    cours = get_object_or_404(Cours, pk=pk)
+    selection = Selection.from_request(request)
+    queryset = cours_detail_queryset()
+    if request.method == 'GET':
+        queryset = CoursDetailSerializer.optimize(queryset, selection)
+    cours = get_object_or_404(queryset, pk=pk)
     request.user  # force auth
 
     # permission objet
@@ -61,7 +101,7 @@ def cours_detail(request, pk):
         )
 
     if request.method == 'GET':
-        serializer = CoursDetailSerializer(cours)
+        serializer = CoursDetailSerializer(cours, selection=selection, context={'request': request})
         return Response(serializer.data)
 
     if request.method == 'PUT':
@@ -86,26 +126,80 @@ def cours_detail(request, pk):
 
 @api_view(['GET', 'POST'])
 @permission_classes([HorairePermission])
+@versioned('horaire', 'promotion', variant=_promotion_key_horaires)
 def horaires_list_create(request):
     user = request.user
 
     if request.method == 'GET':
         if user.role == 'ETUDIANT' or user.role == 'ENCADREUR':
-            horaires = Horaire.objects.filter(promotion=user.promotion)
+            horaires = Horaire.objects.filter(promotion_id=user.promotion_id)
         else:
             horaires = Horaire.objects.all()
 
-        serializer = HoraireSerializer(horaires, many=True)
-        return Response(serializer.data)
+        # Fenêtre optionnelle `start` / `end` (date ou datetime ISO)
+        try:
+            start = parse_instant(request.query_params.get('start'))
+            end = parse_instant(request.query_params.get('end'))
+        except ValueError:
+            return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+        horaires = horaires_fenetre(horaires, start, end)
+
+        data = response_cache.cached_data(
+            'horaires_list',
+            scopes=('horaire', 'promotion'),
+            variant=(_promotion_key_horaires(request), request.get_host(), request.query_params.urlencode()),
+            build=lambda: paginated_data(request, horaires, HoraireSerializer),
+        )
+        return Response(data)
 
     # POST
     serializer = HoraireSerializer(data=request.data)
     if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return _enregistrer_horaire(serializer, status.HTTP_201_CREATED)
     return Response(serializer.errors, status=400)
 
 
+def _enregistrer_horaire(serializer, code):
+    """Enregistre un horaire validé : 409 si le créneau est pris, 503 si une
+    écriture concurrente tient la base (SQLite)"""
+    try:
+        serializer.save()
+    except ConflitHoraire as exc:
+        return Response(
+            {"detail": "Conflit d'horaire", "conflits": exc.conflits},
+            status=status.HTTP_409_CONFLICT
+        )
+    except OperationalError as exc:
+        if not ecriture_concurrente(exc):
+            raise
+        return Response(
+            {"detail": "Horaires en cours de modification, réessayez"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+    return Response(serializer.data, status=code)
+
+
+@api_view(['POST'])
+@permission_classes([IsRole(['ADMIN', 'COORDON'])])
+def horaires_verifier(request):
+    """POST {"horaires": [...]} : conflits d'un plan (lieu, promotion, encadreur)
+    entre ses lignes et avec les horaires existants, sans rien enregistrer"""
+    lignes = request.data.get('horaires')
+    if not isinstance(lignes, list) or len(lignes) > HORAIRES_PLAN_MAX:
+        return Response(
+            {"detail": f"Liste 'horaires' attendue ({HORAIRES_PLAN_MAX} lignes max)"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = HorairePlanSerializer(data=lignes, many=True)
+    if not serializer.is_valid():
+        return Response({'horaires': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    conflits = conflits_plan(serializer.validated_data)
+    return Response({'nb_conflits': len(conflits), 'conflits': conflits})
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([HorairePermission])
 def horaire_detail(request, pk):
@@ -119,14 +213,13 @@ def horaire_detail(request, pk):
         return Response({"detail": "Accès interdit"}, status=403)
 
     if request.method == 'GET':
-        serializer = HoraireSerializer(horaire)
+        serializer = HoraireSerializer(horaire, selection=Selection.from_request(request))
         return Response(serializer.data)
 
     if request.method == 'PUT':
         serializer = HoraireSerializer(horaire, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            return _enregistrer_horaire(serializer, status.HTTP_200_OK)
         return Response(serializer.errors, status=400)
 
     # DELETE
@@ -136,123 +229,192 @@ def horaire_detail(request, pk):
     return Response(status=204)
 
 
+# ============================================
+# CALENDRIER : VUES SEMAINE / MOIS
+# ============================================
+
+CALENDRIER_CHAMPS = ('id', 'titre', 'date_debut', 'date_fin', 'lieu', 'cours_id', 'cours__titre')
+
+
+def _debut_semaine(jour):
+    return jour - timedelta(days=jour.weekday())
+
+
+def _debut_mois(jour):
+    return jour.replace(day=1)
+
+
+def _fenetre_calendrier(request, debut_de, duree):
+    """(début, fin) de la période contenant `date` (aujourd'hui par défaut), en heure locale"""
+    jour = parse_instant(request.query_params.get('date')) or timezone.now()
+    debut = debut_de(timezone.localtime(jour).date())
+    fin = duree(debut)
+    return (
+        timezone.make_aware(datetime.combine(debut, time.min)),
+        timezone.make_aware(datetime.combine(fin, time.min)),
+    )
+
+
+def _calendrier(request, debut_de, duree):
+    try:
+        debut, fin = _fenetre_calendrier(request, debut_de, duree)
+        promotion_id = request.query_params.get('promotion_id')
+        promotion_id = int(promotion_id) if promotion_id else None
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+
+    horaires = horaires_fenetre(horaires_visibles(request.user, promotion_id), debut, fin)
+    return Response({
+        'debut': debut,
+        'fin': fin,
+        # Seulement ce que la grille affiche, sans sérialiseur
+        'horaires': list(horaires.order_by('date_debut', 'id').values(*CALENDRIER_CHAMPS)),
+    })
+
+
+def _variant_calendrier(request):
+    # La période par défaut change avec la date du jour
+    return (_promotion_key_horaires(request), timezone.localdate())
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@versioned('horaire', variant=_variant_calendrier)
+def horaires_semaine(request):
+    """Horaires de la semaine (lundi → lundi) contenant `date`
+    (aujourd'hui par défaut) ; `promotion_id` pour le staff"""
+    return _calendrier(request, _debut_semaine, lambda debut: debut + timedelta(days=7))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@versioned('horaire', variant=_variant_calendrier)
+def horaires_mois(request):
+    """Horaires du mois contenant `date` (aujourd'hui par défaut) ; `promotion_id` pour le staff"""
+    return _calendrier(
+        request, _debut_mois, lambda debut: tendances.mois_decale(debut, 1),
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@versioned('promotion')
 def promotions_list(request):
     """Retourne la liste de toutes les promotions"""
-    promotions = Promotion.objects.all().values('id', 'name', 'annee')
-    return Response(list(promotions))
+    return Response(dashboard.promotions())
+
+
+def _promotion_tableau(request):
+    """Promotion des listes du tableau de bord : `promotion_id` (listes admin),
+    sinon celle de l'utilisateur. ValueError si le paramètre est invalide."""
+    promotion_id = request.query_params.get('promotion_id')
+    if promotion_id:
+        return int(promotion_id)
+    return request.user.promotion_id
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stats_dashboard(request):
+    """Tableau de bord complet en une requête (au lieu de stats/* + promotions/)
+
+    Paramètres optionnels :
+    - `sections` : liste séparée par des virgules parmi overview,
+      enrollment_trend, coordons, encadreurs, horaires, promotions (toutes par défaut)
+    - `promotion_id`, `mois`, `par_promotion` : comme sur les endpoints stats/
+    Chaque section est mise en cache séparément (academique.dashboard).
+    """
+    params = request.query_params
+    noms = [nom for nom in params.get('sections', '').split(',') if nom] or list(dashboard.SECTIONS)
+    inconnues = [nom for nom in noms if nom not in dashboard.SECTIONS]
+    if inconnues:
+        return Response(
+            {"detail": f"Sections inconnues : {', '.join(inconnues)}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        promotion_id = _promotion_tableau(request)
+        tendance_promotion_id = int(params['promotion_id']) if params.get('promotion_id') else None
+        nb_mois = min(max(int(params.get('mois', 6)), 1), 120)
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(dashboard.tableau(
+        list(dict.fromkeys(noms)),
+        promotion_id=promotion_id,
+        tendance_promotion_id=tendance_promotion_id,
+        nb_mois=nb_mois,
+        par_promotion=params.get('par_promotion') in ('1', 'true'),
+    ))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def stats_overview(request):
-    """Retourne les stats globales du tableau de bord admin"""
-    # Compter les utilisateurs par rôle
-    coordons = User.objects.filter(role='COORDON').count()
-    encadreurs = User.objects.filter(role='ENCADREUR').count()
-    etudiants = User.objects.filter(role='ETUDIANT').count()
-    
-    # Compter les cours
-    cours = Cours.objects.count()
-    
-    return Response({
-        'coordons': coordons,
-        'encadreurs': encadreurs,
-        'etudiants': etudiants,
-        'cours': cours,
-    })
+    """Retourne les stats globales du tableau de bord admin
+
+    Lues depuis la table des compteurs matérialisés (academique.compteurs)
+    au lieu de compter les tables à chaque appel.
+    """
+    return Response(dashboard.avec_age(dashboard.overview()))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def enrollment_trend(request):
-    """Retourne l'évolution des inscriptions par mois"""
-    from django.db.models.functions import TruncMonth
-    from django.utils import timezone
-    from datetime import timedelta
-    
-    # Dernier 6 mois
-    six_months_ago = timezone.now() - timedelta(days=180)
-    
-    # Étudiants par mois
-    etudiants_by_month = User.objects.filter(
-        role='ETUDIANT',
-        date_joined__gte=six_months_ago
-    ).annotate(month=TruncMonth('date_joined')).values('month').annotate(count=Count('id')).order_by('month')
-    
-    # Cours par mois
-    cours_by_month = Cours.objects.filter(
-        date_creation__gte=six_months_ago
-    ).annotate(month=TruncMonth('date_creation')).values('month').annotate(count=Count('id')).order_by('month')
-    
-    return Response({
-        'etudiants': list(etudiants_by_month),
-        'cours': list(cours_by_month),
-    })
+    """Retourne l'évolution des inscriptions par mois
+
+    Lue depuis les agrégats mensuels (academique.tendances).
+    Paramètres optionnels :
+    - `mois` : taille de la fenêtre en mois (6 par défaut, 120 max)
+    - `promotion_id` : limiter à une promotion
+    - `par_promotion=1` : détail par promotion
+    """
+    try:
+        nb_mois = min(max(int(request.query_params.get('mois', 6)), 1), 120)
+        promotion_id = request.query_params.get('promotion_id')
+        promotion_id = int(promotion_id) if promotion_id else None
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+
+    par_promotion = request.query_params.get('par_promotion') in ('1', 'true')
+    return Response(dashboard.tendance(dashboard.debut_tendance(nb_mois), promotion_id, par_promotion))
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def coordons_list(request):
     """Retourne la liste des coordons avec leurs infos"""
-    user = request.user
-    queryset = User.objects.filter(role='COORDON')
-    
-    # Support filtrage par promotion en query param (pour les listes admin)
-    promotion_id = request.query_params.get('promotion_id')
-    if promotion_id:
-        queryset = queryset.filter(promotion_id=promotion_id)
-    # Sinon, si c'est depuis le dashboard, filtrer par promotion de l'utilisateur
-    elif user.promotion:
-        queryset = queryset.filter(promotion=user.promotion)
-    
-    coordons = queryset.values(
-        'id', 'email', 'first_name', 'last_name', 'telephone', 'photo'
-    )
-    return Response(list(coordons))
+    try:
+        promotion_id = _promotion_tableau(request)
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(dashboard.membres(['COORDON'], promotion_id)['COORDON'])
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def encadreurs_list(request):
     """Retourne la liste des encadreurs"""
-    user = request.user
-    queryset = User.objects.filter(role='ENCADREUR')
-    
-    # Support filtrage par promotion en query param (pour les listes admin)
-    promotion_id = request.query_params.get('promotion_id')
-    if promotion_id:
-        queryset = queryset.filter(promotion_id=promotion_id)
-    # Sinon, si c'est depuis le dashboard, filtrer par promotion de l'utilisateur
-    elif user.promotion:
-        queryset = queryset.filter(promotion=user.promotion)
-    
-    encadreurs = queryset.values(
-        'id', 'email', 'first_name', 'last_name', 'telephone', 'photo'
-    )
-    return Response(list(encadreurs))
+    try:
+        promotion_id = _promotion_tableau(request)
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(dashboard.membres(['ENCADREUR'], promotion_id)['ENCADREUR'])
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def horaires_list(request):
-    """Retourne les horaires de la semaine"""
-    user = request.user
-    queryset = Horaire.objects.all()
-    
-    # Support filtrage par promotion en query param (pour les listes admin)
-    promotion_id = request.query_params.get('promotion_id')
-    if promotion_id:
-        queryset = queryset.filter(promotion_id=promotion_id)
-    # Sinon, si c'est depuis le dashboard, filtrer par promotion de l'utilisateur
-    elif user.promotion:
-        queryset = queryset.filter(promotion=user.promotion)
-    
-    horaires = queryset.values(
-        'id', 'titre', 'date_debut', 'date_fin', 'lieu', 'cours__titre', 'promotion__name', 'promotion_id'
-    ).order_by('date_debut')[:10]
-    return Response(list(horaires))
+    """Retourne les prochains horaires (10 max)
+    `start` / `end` optionnels : fenêtre de dates, à partir de maintenant par défaut"""
+    try:
+        start = parse_instant(request.query_params.get('start'))
+        end = parse_instant(request.query_params.get('end'))
+        promotion_id = _promotion_tableau(request)
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(dashboard.prochains_horaires(promotion_id, start, end))
 
 
 # ============================================
@@ -267,8 +429,7 @@ def encadreurs_crud(request):
     
     if request.method == 'GET':
         encadreurs = User.objects.filter(role='ENCADREUR')
-        serializer = UserListSerializer(encadreurs, many=True)
-        return Response(serializer.data)
+        return paginated_response(request, encadreurs, UserListSerializer)
     
     # POST - Créer un encadreur
     if request.user.role not in ['ADMIN', 'COORDON']:
@@ -294,7 +455,7 @@ def encadreur_detail(request, pk):
         return Response({"detail": "Encadreur non trouvé"}, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        serializer = UserListSerializer(encadreur)
+        serializer = UserListSerializer(encadreur, selection=Selection.from_request(request))
         return Response(serializer.data)
     
     if request.method == 'PATCH':
@@ -325,15 +486,14 @@ def etudiants_crud(request):
         if user.role == 'ADMIN':
             etudiants = User.objects.filter(role='ETUDIANT')
         elif user.role == 'COORDON':
-            etudiants = User.objects.filter(role='ETUDIANT', promotion=user.promotion)
+            etudiants = User.objects.filter(role='ETUDIANT', promotion_id=user.promotion_id)
         else:
             return Response(
                 {"detail": "Accès non autorisé"},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        serializer = UserListSerializer(etudiants, many=True)
-        return Response(serializer.data)
+        return paginated_response(request, etudiants, UserListSerializer)
     
     # POST - Créer un étudiant
     if request.user.role not in ['ADMIN', 'COORDON']:
@@ -349,6 +509,44 @@ def etudiants_crud(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def etudiants_import(request):
+    """POST multipart : `fichier` (CSV ou XLSX), `promotion` (id, optionnel)
+    Crée les étudiants en masse (academique.imports) et renvoie le rapport
+    ligne par ligne. `dry_run=1` valide sans rien créer."""
+    if request.user.role not in ['ADMIN', 'COORDON']:
+        return Response(
+            {"detail": "Accès non autorisé"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    fichier = request.FILES.get('fichier')
+    if fichier is None:
+        return Response({"detail": "Fichier requis"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        promotion_id = request.data.get('promotion')
+        promotion_id = int(promotion_id) if promotion_id else None
+    except ValueError:
+        return Response({"detail": "Promotion invalide"}, status=status.HTTP_400_BAD_REQUEST)
+    if promotion_id is None and request.user.role == 'COORDON':
+        # Un coordonnateur importe dans sa promotion par défaut
+        promotion_id = request.user.promotion_id
+
+    try:
+        report = imports.import_etudiants(
+            imports.read_rows(fichier, fichier.name),
+            creator=request.user,
+            promotion_id=promotion_id,
+            dry_run=request.data.get('dry_run') in ('1', 'true'),
+        )
+    except imports.ImportFileError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
 @api_view(['GET', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def etudiant_detail(request, pk):
@@ -359,7 +557,7 @@ def etudiant_detail(request, pk):
         return Response({"detail": "Étudiant non trouvé"}, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        serializer = UserListSerializer(etudiant)
+        serializer = UserListSerializer(etudiant, selection=Selection.from_request(request))
         return Response(serializer.data)
     
     if request.method == 'PATCH':
@@ -393,8 +591,7 @@ def coordons_crud(request):
             )
         
         coordons = User.objects.filter(role='COORDON')
-        serializer = UserListSerializer(coordons, many=True)
-        return Response(serializer.data)
+        return paginated_response(request, coordons, UserListSerializer)
     
     # POST - Créer un coordon
     if request.user.role not in ['ADMIN']:
@@ -423,7 +620,7 @@ def coordon_detail(request, pk):
         if request.user.role != 'ADMIN':
             return Response({"detail": "Accès non autorisé"}, status=status.HTTP_403_FORBIDDEN)
         
-        serializer = UserListSerializer(coordon)
+        serializer = UserListSerializer(coordon, selection=Selection.from_request(request))
         return Response(serializer.data)
     
     if request.method == 'PATCH':
@@ -441,3 +638,107 @@ def coordon_detail(request, pk):
             return Response({"detail": "Accès non autorisé"}, status=status.HTTP_403_FORBIDDEN)
         coordon.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# ============================================
+# EXPORTS CSV / XLSX (flux, mémoire constante)
+# ============================================
+
+def _export(request, filename, header, rows_for):
+    file_format = request.query_params.get('type', exports.CSV)
+    if file_format not in exports.formats():
+        return Response({"detail": "Type d'export non pris en charge"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        promotion_id = request.query_params.get('promotion_id')
+        promotion_id = int(promotion_id) if promotion_id else None
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+    return exports.export_response(filename, header, rows_for(promotion_id), file_format)
+
+
+@batch.hors_lot
+@api_view(['GET'])
+@permission_classes([IsRole(['ADMIN', 'COORDON'])])
+def export_users(request):
+    """Export des utilisateurs (`role`, `promotion_id` optionnels, `type=csv|xlsx`)
+    Un coordonnateur n'exporte que les étudiants de sa promotion."""
+    role = request.query_params.get('role')
+    return _export(request, 'utilisateurs', academique_exports.USER_HEADER, lambda promotion_id: (
+        academique_exports.user_rows(
+            academique_exports.users_queryset(request.user, role, promotion_id)
+        )
+    ))
+
+
+@batch.hors_lot
+@api_view(['GET'])
+@permission_classes([IsRole(['ADMIN', 'COORDON'])])
+def export_cours(request):
+    """Export des cours avec promotions et encadreurs (`promotion_id` optionnel)"""
+    return _export(request, 'cours', academique_exports.COURS_HEADER, lambda promotion_id: (
+        academique_exports.cours_rows(academique_exports.cours_queryset(promotion_id))
+    ))
+
+
+@batch.hors_lot
+@api_view(['GET'])
+@permission_classes([IsRole(['ADMIN', 'COORDON'])])
+def export_horaires(request):
+    """Export de l'emploi du temps (`promotion_id` optionnel)"""
+    return _export(request, 'horaires', academique_exports.HORAIRE_HEADER, lambda promotion_id: (
+        academique_exports.horaire_rows(academique_exports.horaires_queryset(promotion_id))
+    ))
+
+
+# ============================================
+# FLUX ICS (abonnement depuis un agenda)
+# ============================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def ics_links(request):
+    """URLs d'abonnement ICS de l'utilisateur, propres à lui
+    (staff : `promotion_id` pour le flux d'une autre promotion)"""
+    user = request.user
+    flux = []
+    promotion_id = user.promotion_id
+    if user.role in ('ADMIN', 'COORDON') and request.query_params.get('promotion_id'):
+        try:
+            promotion_id = int(request.query_params['promotion_id'])
+        except ValueError:
+            return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+    if promotion_id:
+        flux.append((ics.PROMOTION, promotion_id))
+    if user.role == 'ENCADREUR':
+        flux.append((ics.ENCADREUR, user.id))
+
+    return Response({'flux': [
+        {'type': kind, 'id': obj_id, 'url': request.build_absolute_uri(ics.feed_path(kind, obj_id, user))}
+        for kind, obj_id in flux
+    ]})
+
+
+@batch.hors_lot
+@require_safe
+def ics_feed(request, kind, obj_id, token):
+    """Flux iCalendar d'une promotion ou d'un encadreur.
+
+    Vue Django simple : le jeton HMAC de l'abonné tient lieu
+    d'authentification (les agendas n'envoient pas de JWT), ses droits
+    sont revérifiés à chaque accès. Sur un cache chaud, aucune requête en
+    base : octets pré-rendus et ETag viennent du cache des réponses.
+    """
+    if not ics.verify_token(kind, obj_id, token):
+        raise Http404()
+
+    etag, body = ics.feed(kind, obj_id)
+    response = get_conditional_response(request, etag=f'"{etag}"')
+    if response is None:
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = f'"{etag}"'
+    patch_cache_control(response, private=True, max_age=ics_max_age())
+    return response
+
+
+def ics_max_age():
+    return getattr(settings, 'ICS_CLIENT_MAX_AGE', 900)
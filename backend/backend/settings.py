@@ -1,6 +1,10 @@
+import importlib.util
+import os
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,6 +37,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'academique',
     'documents',
+    'recherche',
 ]
 
 MIDDLEWARE = [
@@ -88,6 +93,47 @@ DATABASES = {
 }
 
 
+# Cache
+# 'reponses' stocke les réponses des endpoints de lecture (core.response_cache).
+# Backend choisi par RESPONSE_CACHE_BACKEND : locmem (défaut), file ou redis.
+# Le backend redis parle le protocole RESP : tout serveur compatible
+# (redis, valkey, ou un stand-in local) convient via RESPONSE_CACHE_URL.
+
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'reponses',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'reponses',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('RESPONSE_CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem')
+if RESPONSE_CACHE_BACKEND not in RESPONSE_CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f"RESPONSE_CACHE_BACKEND={RESPONSE_CACHE_BACKEND!r} : choix possibles {', '.join(RESPONSE_CACHE_BACKENDS)}"
+    )
+# RedisCache importe le client redis à la première requête : échouer dès le démarrage
+if RESPONSE_CACHE_BACKEND == 'redis' and importlib.util.find_spec('redis') is None:
+    raise ImproperlyConfigured(
+        "RESPONSE_CACHE_BACKEND=redis demande le paquet redis (pip install redis)"
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reponses': RESPONSE_CACHE_BACKENDS[RESPONSE_CACHE_BACKEND],
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -132,17 +178,61 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Service des fichiers de documents (documents.serving)
+# None : Django sert le fichier (avec Range / 206).
+# 'x-accel-redirect' (nginx) ou 'x-sendfile' (apache, lighttpd) : Django
+# vérifie les permissions puis délègue le transfert au serveur frontal.
+DOCUMENTS_SENDFILE = os.environ.get('DOCUMENTS_SENDFILE') or None
+# Location nginx `internal` qui pointe vers le dossier des médias
+DOCUMENTS_SENDFILE_PREFIX = '/protected-media/'
+# view_url des fichiers : URL signée HMAC et temporaire au lieu de l'URL
+# authentifiée par JWT. URL au porteur, mise en cache par un CDN : validité
+# courte, entre MAX_AGE et 2 × MAX_AGE secondes
+DOCUMENTS_SIGNED_URLS = False
+DOCUMENTS_SIGNED_URL_MAX_AGE = 60
+# Envoi découpé (documents.uploads) : taille max d'un morceau et d'un fichier,
+# dossier des fichiers partiels (jamais servi : hors de MEDIA_ROOT)
+DOCUMENTS_UPLOAD_MAX_CHUNK = 8 * 1024 * 1024
+DOCUMENTS_UPLOAD_MAX_SIZE = 500 * 1024 * 1024
+DOCUMENTS_UPLOAD_DIR = BASE_DIR / 'uploads'
+
+# Extraction du texte des PDF (documents.extraction, `manage.py run_extractions`) :
+# tâches verrouillées en même temps tous workers confondus, durée du verrou,
+# nombre d'essais et délai initial (doublé à chaque échec), en secondes
+EXTRACTION_MAX_CONCURRENCY = 2
+EXTRACTION_LEASE = 600
+EXTRACTION_MAX_ATTEMPTS = 3
+EXTRACTION_RETRY_DELAY = 60
+
 from datetime import timedelta
 
+# Rendu / analyse JSON par orjson (core.renderers, core.parsers), repli sur
+# json s'il manque ; MessagePack proposé seulement si msgpack est installé
+MSGPACK_DISPONIBLE = importlib.util.find_spec('msgpack') is not None
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.ORJSONRenderer',
+        *(['core.renderers.MessagePackRenderer'] if MSGPACK_DISPONIBLE else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.ORJSONParser',
+        *(['core.parsers.MessagePackParser'] if MSGPACK_DISPONIBLE else []),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
         'users.authentication.CookieJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Proxys inverses devant Django : l'IP du client est lue dans X-Forwarded-For
+    # à cette profondeur (0 : REMOTE_ADDR, l'en-tête n'est pas de confiance)
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
  
 
@@ -159,6 +249,52 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_HTTP_ONLY": True,
     "AUTH_COOKIE_PATH": "/",
     "AUTH_COOKIE_SAMESITE": "Lax", # 'Lax' or 'Strict' or 'None'
+
+    "TOKEN_OBTAIN_SERIALIZER": "users.tokens.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.tokens.RoleTokenRefreshSerializer",
 }
 
+# Cache jeton → utilisateur partagé par les classes d'authentification
+# (users.authentication.user_cache), par processus
+JWT_USER_CACHE_SIZE = 1024
+JWT_USER_CACHE_TTL = 60
+# Mode sans état : en lecture, rôle et promotion viennent des claims signés
+# du jeton (valables jusqu'à son expiration) au lieu de la table users
+JWT_STATELESS_USER = False
+
+# Index des droits sur les cours (academique.acces) : durée de vie des entrées
+# en secondes, borne le retard entre processus
+COURS_ACCES_TTL = 60
+
+# Durée maximale d'un horaire (jours) : borne la recherche en arrière des
+# fenêtres de calendrier (academique.queries.horaires_fenetre)
+HORAIRE_DUREE_MAX_JOURS = 31
+
+# Flux ICS (academique.ics) : historique inclus (jours), durée de vie du flux
+# pré-rendu dans le cache des réponses, max-age annoncé aux agendas (secondes)
+ICS_HISTORIQUE_JOURS = 90
+ICS_CACHE_TIMEOUT = 24 * 3600
+ICS_CLIENT_MAX_AGE = 900
+
+# Tableau de bord (academique.dashboard) : durée de vie des sections en
+# cache (secondes), plus courte pour les prochains horaires qui suivent l'heure
+DASHBOARD_CACHE_TIMEOUT = 300
+DASHBOARD_HORAIRES_TIMEOUT = 60
+
+# Requêtes groupées (core.batch) : threads pour les lectures parallèles
+BATCH_MAX_WORKERS = 4
+
+# Exports CSV / XLSX (core.exports) : lignes lues par bloc depuis la base
+EXPORT_CHUNK_SIZE = 2000
+
+# Connexion (users.login) : au plus LOGIN_MAX_CONCURRENT hachages simultanés
+# par processus (refus immédiat en 503 au-delà), compteurs d'échecs par
+# (compte, IP) et par IP (429) sur une fenêtre glissante en secondes. L'IP
+# est celle du client derrière REST_FRAMEWORK['NUM_PROXIES'] proxys de
+# confiance ; le plafond par IP reste large (NAT du campus : une adresse pour de nombreux postes)
+LOGIN_MAX_CONCURRENT = 4
+LOGIN_MAX_FAILURES_PER_ACCOUNT = 5
+LOGIN_MAX_FAILURES_PER_IP = 200
+LOGIN_FAILURE_WINDOW = 900
+
 
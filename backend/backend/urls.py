@@ -8,4 +8,5 @@ urlpatterns = [
     path('api/auth/', include('users.urls')),
     path('api/', include('documents.urls')),
     path("api/academique/", include('academique.urls')),
+    path('api/recherche/', include('recherche.urls')),
 ]
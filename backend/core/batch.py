@@ -0,0 +1,230 @@
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, connections
+from django.http import Http404
+from django.urls import Resolver404, resolve
+
+from academique import acces
+
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PREFIX = '/api/'
+EN_TETES_CONSERVES = ('HTTP_HOST', 'HTTP_X_FORWARDED_FOR')
+# En-têtes jamais repris d'une sous-requête : l'authentification est celle du lot
+EN_TETES_REFUSES = {'AUTHORIZATION', 'COOKIE', 'HOST', 'CONTENT_TYPE', 'CONTENT_LENGTH'}
+# Routes d'un cours (/api/academique/cours/<id>/, /api/cours/<id>/documents/)
+COURS_RE = re.compile(r'/cours/(\d+)/')
+# En-têtes de réponse renvoyés par élément (le corps est déjà du JSON dans le lot)
+EN_TETES_REPONSE = ('etag', 'last-modified', 'cache-control', 'location', 'retry-after')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=_setting('BATCH_MAX_WORKERS', 4),
+    thread_name_prefix='batch',
+)
+
+
+class BatchError(Exception):
+    """Sous-requête refusée avant tout dispatch (chemin hors API, lot imbriqué, fichier)"""
+
+
+def hors_lot(view):
+    """Vue servant un fichier ou un flux (téléchargement, export, ICS) : refusée
+    dans un lot avant exécution, le corps ne pourrait pas y être renvoyé.
+    À placer au-dessus de @api_view / @require_safe."""
+    view.hors_lot = True
+    return view
+
+
+def batch_path():
+    return f'{PREFIX}batch/'
+
+
+# ============================================
+# CONSTRUCTION DES SOUS-REQUÊTES
+# ============================================
+
+def sub_request(request, item):
+    """Requête Django pour un élément du lot, déjà authentifiée.
+
+    Reprend l'environnement de la requête du lot (hôte, IP, ...) ; le
+    corps est du JSON. L'utilisateur du lot est imposé à DRF
+    (`_force_auth_user`) : pas de nouvelle vérification du jeton.
+    """
+    parts = urlsplit(item['path'])
+    if not parts.path.startswith(PREFIX) or parts.path.startswith(batch_path()):
+        raise BatchError(f"Chemin non autorisé : {parts.path}")
+
+    data = b''
+    if item.get('body') is not None:
+        data = json.dumps(item['body']).encode('utf-8')
+
+    # Environnement du lot (serveur, IP, hôte pour ALLOWED_HOSTS), sans ses autres en-têtes
+    environ = {
+        key: value for key, value in request.META.items()
+        if key in EN_TETES_CONSERVES or not (key.startswith('HTTP_') or key in ('CONTENT_TYPE', 'CONTENT_LENGTH'))
+    }
+    for name, value in (item.get('headers') or {}).items():
+        key = name.upper().replace('-', '_')
+        if key not in EN_TETES_REFUSES:
+            environ[f'HTTP_{key}'] = value
+    environ.update({
+        'REQUEST_METHOD': item['method'],
+        'PATH_INFO': parts.path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': parts.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(data)),
+        'wsgi.input': BytesIO(data),
+    })
+
+    sub = WSGIRequest(environ)
+    sub.user = request.user
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+# ============================================
+# EXÉCUTION
+# ============================================
+
+def _body(response):
+    if getattr(response, 'streaming', False):
+        # Flux non marqué hors_lot : non lu, fermé par execute()
+        return None
+    if hasattr(response, 'data'):
+        return response.data
+    content = response.content.decode(response.charset or 'utf-8', errors='replace')
+    if response.get('Content-Type', '').startswith('application/json'):
+        return json.loads(content) if content else None
+    return content
+
+
+def _error(status_code, detail):
+    return {'status': status_code, 'headers': {}, 'body': {'detail': detail}}
+
+
+def execute(request, item):
+    """Résout et exécute une sous-requête, sans passer par le réseau"""
+    try:
+        sub = sub_request(request, item)
+        match = resolve(sub.path_info)
+        if getattr(match.func, 'hors_lot', False):
+            raise BatchError(f"Fichier ou flux : à demander directement ({sub.path_info})")
+    except BatchError as exc:
+        return _error(400, str(exc))
+    except Resolver404:
+        return _error(404, "Introuvable.")
+
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Http404:
+        return _error(404, "Introuvable.")
+    except PermissionDenied:
+        return _error(403, "Vous n'avez pas la permission d'effectuer cette action.")
+    except Exception:
+        logger.exception("Sous-requête %s %s en échec", item['method'], item['path'])
+        return _error(500, "Erreur interne.")
+
+    try:
+        headers = {
+            name: value for name, value in response.items()
+            if name.lower() in EN_TETES_REPONSE
+        }
+        return {'status': response.status_code, 'headers': headers, 'body': _body(response)}
+    finally:
+        # Comme le gestionnaire WSGI : fichiers ouverts et ressources de la réponse libérés
+        response.close()
+
+
+def _cours(item):
+    match = COURS_RE.search(urlsplit(item['path']).path)
+    return int(match.group(1)) if match else None
+
+
+def _refus(request, items, indexes):
+    """Éléments visant un cours interdit : droits de tout le groupe en un appel à l'index"""
+    refus = {}
+    for write in (False, True):
+        cibles = {
+            index: cours_id for index in indexes
+            if (cours_id := _cours(items[index])) is not None
+            and (items[index]['method'] not in SAFE_METHODS) == write
+        }
+        if not cibles:
+            continue
+        permis = acces.accessible_cours(request.user, cibles.values(), write=write)
+        for index, cours_id in cibles.items():
+            if cours_id not in permis:
+                refus[index] = _error(403, "Vous n'avez pas la permission d'effectuer cette action.")
+    return refus
+
+
+def _execute_thread(request, item):
+    try:
+        return execute(request, item)
+    finally:
+        # Connexions propres au thread du pool
+        connections.close_all()
+
+
+def _groupes(items):
+    """Suites de lectures consécutives (exécutables ensemble) ; chaque écriture seule, dans l'ordre"""
+    groupe = []
+    for index, item in enumerate(items):
+        if item['method'] in SAFE_METHODS:
+            groupe.append(index)
+            continue
+        if groupe:
+            yield groupe
+            groupe = []
+        yield [index]
+    if groupe:
+        yield groupe
+
+
+def run(request, items):
+    """Résultats du lot, dans l'ordre des éléments.
+
+    Les lectures consécutives partent en parallèle dans le pool ; une
+    écriture attend les éléments précédents et bloque les suivants. Les
+    éléments visant un cours interdit sont refusés (403) sans être exécutés,
+    les droits du groupe étant lus en un appel (academique.acces).
+    Dans une transaction (ATOMIC_REQUESTS, tests) tout reste dans le
+    thread courant : une autre connexion ne verrait pas ses écritures.
+    """
+    resultats = [None] * len(items)
+    parallele = _setting('BATCH_MAX_WORKERS', 4) > 1 and not connection.in_atomic_block
+    for groupe in _groupes(items):
+        # Droits relus au moment du groupe : après les écritures qui le précèdent
+        refus = _refus(request, items, groupe)
+        for index, resultat in refus.items():
+            resultats[index] = resultat
+        groupe = [index for index in groupe if index not in refus]
+        if parallele and len(groupe) > 1:
+            futures = {index: _executor.submit(_execute_thread, request, items[index]) for index in groupe}
+            for index, future in futures.items():
+                resultats[index] = future.result()
+        else:
+            for index in groupe:
+                resultats[index] = execute(request, items[index])
+
+    for item, resultat in zip(items, resultats):
+        if item.get('id') is not None:
+            resultat['id'] = item['id']
+    return resultats
@@ -0,0 +1,83 @@
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.utils import timezone
+
+from academique.models import Cours, Horaire, Promotion
+from academique.serializer.cours_list import CoursListSerializer
+from academique.serializer.horaire import HoraireSerializer
+from users.models import User
+from users.serializers import UserListSerializer
+
+
+class _Rollback(Exception):
+    """Annule les données de mesure"""
+
+
+def generer(nombre):
+    """Données de mesure : promotions, étudiants, cours liés, horaires (bulk_create, sans signaux)"""
+    promotions = Promotion.objects.bulk_create(
+        [Promotion(name=f'Bench {i}', annee=2025) for i in range(10)]
+    )
+    encadreurs = User.objects.bulk_create([
+        User(email=f'bench-enc{i}@example.com', first_name='Enc', last_name=str(i), role='ENCADREUR', password='!')
+        for i in range(20)
+    ])
+    User.objects.bulk_create([
+        User(
+            email=f'bench-etu{i}@example.com', first_name='Etu', last_name=str(i), role='ETUDIANT',
+            promotion=promotions[i % len(promotions)], bio='bio ' * 20, password='!',
+        )
+        for i in range(nombre)
+    ])
+    cours = Cours.objects.bulk_create(
+        [Cours(titre=f'Cours {i}', description='desc ' * 20) for i in range(nombre)]
+    )
+    Cours.encadreurs.through.objects.bulk_create([
+        Cours.encadreurs.through(cours=c, user=encadreurs[(i + k) % len(encadreurs)])
+        for i, c in enumerate(cours) for k in range(2)
+    ])
+    Cours.promotions.through.objects.bulk_create([
+        Cours.promotions.through(cours=c, promotion=promotions[i % len(promotions)])
+        for i, c in enumerate(cours)
+    ])
+    debut = timezone.now()
+    Horaire.objects.bulk_create([
+        Horaire(
+            titre=f'H {i}', date_debut=debut + timezone.timedelta(hours=i),
+            promotion=promotions[i % len(promotions)], cours=cours[i],
+        )
+        for i in range(nombre)
+    ])
+
+
+def mesurer(fonction, repetitions):
+    meilleur = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        fonction()
+        duree = time.perf_counter() - start
+        meilleur = duree if meilleur is None else min(meilleur, duree)
+    return meilleur
+
+
+@contextmanager
+def donnees(nombre):
+    """Données de mesure générées dans une transaction toujours annulée"""
+    try:
+        with transaction.atomic():
+            generer(nombre)
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+def listes():
+    """Listes mesurées : (nom, serializer, queryset)"""
+    return [
+        ('etudiants', UserListSerializer, User.objects.filter(role='ETUDIANT')),
+        ('cours', CoursListSerializer, Cours.objects.all()),
+        ('horaires', HoraireSerializer, Horaire.objects.all()),
+    ]
@@ -0,0 +1,57 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core import versions as table_versions
+
+
+def _versions(request, scopes):
+    """Versions des scopes, lues une seule fois par requête"""
+    memo = getattr(request, '_versions_memo', None)
+    if memo is None:
+        memo = request._versions_memo = {}
+    key = tuple(scopes)
+    if key not in memo:
+        memo[key] = table_versions.lire(scopes)
+    return memo[key]
+
+
+def versioned(*scopes, variant=None):
+    """GET conditionnel (If-None-Match / If-Modified-Since) basé sur les versions de tables.
+
+    L'ETag est calculé à partir des versions des scopes (core.versions, une
+    lecture par clé primaire), de la variante de l'utilisateur et du format
+    négocié (JSON, MessagePack) : un 304 est renvoyé avant toute sérialisation. À placer sous @api_view / @permission_classes
+    pour disposer de l'utilisateur authentifié.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        versions = _versions(request, scopes)
+        parts = [request.path, request.META.get('QUERY_STRING', ''), getattr(request, 'accepted_media_type', '')]
+        parts += [f'{scope}={versions[scope][0]}@{versions[scope][1]}' for scope in scopes]
+        if variant is not None:
+            parts.append(str(variant(request)))
+        return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        dates = [date for _, date in _versions(request, scopes).values() if date]
+        return max(dates) if dates else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # Réponse propre à l'utilisateur, toujours revalidée
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ['Accept'])
+            return response
+        return wrapper
+    return decorator
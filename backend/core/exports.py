@@ -0,0 +1,94 @@
+import csv
+import datetime
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+try:
+    import openpyxl
+except ImportError:  # dépendance optionnelle : export XLSX indisponible
+    openpyxl = None
+
+
+CSV = 'csv'
+XLSX = 'xlsx'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def formats():
+    return (CSV, XLSX) if openpyxl is not None else (CSV,)
+
+
+class _Echo:
+    """Pseudo-fichier : csv.writer écrit une ligne, on la renvoie telle quelle"""
+
+    def write(self, value):
+        return value
+
+
+# Premier caractère lu comme une formule par Excel / LibreOffice
+DEBUTS_FORMULE = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(DEBUTS_FORMULE):
+        # Texte saisi par les utilisateurs : affiché tel quel, jamais évalué
+        return "'" + value
+    if isinstance(value, datetime.datetime):
+        # Heure locale sans fuseau : lisible dans un tableur, accepté par openpyxl
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.replace(tzinfo=None, microsecond=0)
+    return value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    # BOM : Excel détecte l'UTF-8 (accents des noms)
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def _xlsx_file(header, rows):
+    # write_only : les lignes partent sur disque au fil de l'eau ;
+    # l'archive n'est complète qu'à la fin, d'où un fichier temporaire
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_cell(value) for value in row])
+    tmp = tempfile.TemporaryFile()
+    workbook.save(tmp)
+    tmp.seek(0)
+    return tmp
+
+
+def export_response(filename, header, rows, file_format=CSV):
+    """Réponse de téléchargement pour un itérable de lignes, sans le matérialiser.
+
+    CSV : StreamingHttpResponse, le premier octet part avant la lecture
+    de la dernière ligne. XLSX : écrit en flux dans un fichier temporaire
+    puis servi par FileResponse (mémoire constante, pas de premier octet
+    anticipé, le format zip l'interdit).
+    """
+    if file_format == XLSX:
+        return FileResponse(
+            _xlsx_file(header, rows),
+            as_attachment=True,
+            filename=f'{filename}.xlsx',
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+    response = StreamingHttpResponse(
+        _csv_lines(header, rows),
+        content_type='text/csv; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
@@ -0,0 +1,129 @@
+from collections import namedtuple
+
+from django.db.models import Prefetch
+
+
+def _names(value):
+    return frozenset(part.strip() for part in (value or '').split(',') if part.strip())
+
+
+class Selection:
+    """Champs demandés par `?fields=` et relations ajoutées par `?expand=`.
+
+    Les noms pointés visent une relation imbriquée (`documents.fichiers`,
+    `fields=id,documents.titre`). `fields` à None : tous les champs par
+    défaut du serializer.
+    """
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = None if fields is None else frozenset(fields)
+        self.expand = frozenset(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        return cls(_names(params.get('fields')) or None, _names(params.get('expand')))
+
+    @staticmethod
+    def _racines(names):
+        return {name.split('.', 1)[0] for name in names}
+
+    def includes(self, name):
+        return self.fields is None or name in self._racines(self.fields) or self.expands(name)
+
+    def expands(self, name):
+        return name in self._racines(self.expand)
+
+    def child(self, name):
+        """Sélection d'une relation imbriquée"""
+        prefix = f'{name}.'
+        fields = {n[len(prefix):] for n in self.fields or () if n.startswith(prefix)}
+        expand = {n[len(prefix):] for n in self.expand if n.startswith(prefix)}
+        return Selection(fields or None, expand)
+
+
+# Relation lue par un champ : jointure (`queryset` None) ou préchargement
+Relation = namedtuple('Relation', ['lookup', 'columns', 'queryset'])
+
+
+def select(lookup, *columns):
+    """Relation vers un objet (clé étrangère) : jointure limitée à ces colonnes"""
+    return Relation(lookup, (lookup, *(f'{lookup}__{column}' for column in columns)), None)
+
+
+def prefetch(lookup, queryset):
+    """Relation vers plusieurs objets : une requête de préchargement.
+
+    `queryset(selection)` construit le queryset des objets liés pour la
+    sous-sélection du champ.
+    """
+    return Relation(lookup, (), queryset)
+
+
+class SparseFieldsMixin:
+    """Serializer à champs choisis par l'appelant (`selection=Selection(...)`).
+
+    - `expandable` : champs absents par défaut, ajoutés par `?expand=` ;
+      {nom: fabrique(sous-sélection) -> champ}
+    - `relations` : relation lue par un champ, {nom: select(...) | prefetch(...)}
+    - `columns` : colonnes lues par les champs calculés, {nom: (colonnes,)}
+
+    `optimize()` réduit le queryset aux colonnes, jointures et
+    préchargements des seuls champs sérialisés.
+    """
+    expandable = {}
+    relations = {}
+    columns = {}
+
+    def __init__(self, *args, selection=None, **kwargs):
+        self.selection = selection or Selection()
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name, factory in self.expandable.items():
+            if self.selection.expands(name):
+                fields[name] = factory(self.selection.child(name))
+        for name in list(fields):
+            if not self.selection.includes(name):
+                del fields[name]
+        return fields
+
+    @classmethod
+    def optimize(cls, queryset, selection=None, extra=()):
+        """Queryset limité aux champs de la sélection.
+
+        `extra` : colonnes nécessaires en plus (clé étrangère vers le parent
+        dans un préchargement). Un champ dont la source est inconnue garde
+        toutes les colonnes.
+        """
+        selection = selection or Selection()
+        meta = queryset.model._meta
+        concrete = {f.name for f in meta.concrete_fields} | {f.attname for f in meta.concrete_fields}
+        columns = {meta.pk.name, *extra}
+        toutes_colonnes = False
+        selects, prefetches = [], []
+
+        for name, field in cls(selection=selection).fields.items():
+            relation = cls.relations.get(name)
+            if relation is not None:
+                columns.update(relation.columns)
+                if relation.queryset is None:
+                    selects.append(relation.lookup)
+                else:
+                    prefetches.append(
+                        Prefetch(relation.lookup, queryset=relation.queryset(selection.child(name)))
+                    )
+            elif name in cls.columns:
+                columns.update(cls.columns[name])
+            elif field.source in concrete:
+                columns.add(field.source)
+            else:
+                toutes_colonnes = True
+
+        queryset = queryset.prefetch_related(None).prefetch_related(*prefetches)
+        if selects:
+            queryset = queryset.select_related(*selects)
+        if not toutes_colonnes:
+            queryset = queryset.only(*columns)
+        return queryset
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import donnees, listes, mesurer
+from core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le rendu JSON de DRF, orjson et MessagePack (core.renderers) "
+        "sur la sortie des serializers de liste, données générées puis annulées"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Lignes générées par liste")
+        parser.add_argument('--repeat', type=int, default=5, help="Répétitions (meilleur temps retenu)")
+
+    def handle(self, *args, **options):
+        renderers = [('json', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson', ORJSONRenderer()))
+        else:
+            self.stderr.write("orjson n'est pas installé : ORJSONRenderer retombe sur json")
+        if msgpack is not None:
+            renderers.append(('msgpack', MessagePackRenderer()))
+
+        with donnees(options['rows']):
+            self.stdout.write(f"{'liste':<12}{'rendu':<10}{'temps':>10}{'débit':>12}{'taille':>12}")
+            for nom, serializer_class, queryset in listes():
+                data = serializer_class(serializer_class.optimize(queryset), many=True).data
+                for label, renderer in renderers:
+                    duree = mesurer(lambda: renderer.render(data), options['repeat'])
+                    taille = len(renderer.render(data))
+                    self.stdout.write(
+                        f"{nom:<12}{label:<10}{duree * 1000:>7.1f} ms"
+                        f"{taille / duree / 1e6:>7.1f} Mo/s{taille / 1024:>9.0f} Kio"
+                    )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import donnees, listes, mesurer
+from core.projections import compile_serializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les serializers DRF de liste et leurs projections values() "
+        "(core.projections) sur des données générées puis annulées"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Lignes générées par liste")
+        parser.add_argument('--repeat', type=int, default=5, help="Répétitions (meilleur temps retenu)")
+
+    def handle(self, *args, **options):
+        with donnees(options['rows']):
+            self._comparer(options['repeat'])
+
+    def _comparer(self, repetitions):
+        self.stdout.write(f"{'liste':<12}{'lignes':>8}{'serializer':>14}{'values()':>12}{'gain':>8}")
+        for nom, serializer_class, queryset in listes():
+            projection = compile_serializer(serializer_class)
+            serializer = mesurer(
+                lambda: serializer_class(serializer_class.optimize(queryset), many=True).data, repetitions,
+            )
+            values = mesurer(lambda: projection.render(projection.values(queryset)), repetitions)
+            self.stdout.write(
+                f"{nom:<12}{queryset.count():>8}{serializer * 1000:>11.1f} ms{values * 1000:>9.1f} ms"
+                f"{serializer / values:>7.1f}x"
+            )
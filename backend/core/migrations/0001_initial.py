@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Version',
+            fields=[
+                ('scope', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('valeur', models.IntegerField(default=0)),
+                ('date_maj', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,3 +1,16 @@
 from django.db import models
 
 # Create your models here.
+
+
+class Version(models.Model):
+    """Version d'un scope de données (ex: 'cours', 'horaire'), base des ETag de core.conditional.
+
+    Incrémentée par core.versions.bump après chaque écriture sur le scope.
+    """
+    scope = models.CharField(max_length=50, primary_key=True)
+    valeur = models.IntegerField(default=0)
+    date_maj = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope} = {self.valeur}"
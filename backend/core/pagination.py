@@ -0,0 +1,65 @@
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from core.fieldsets import Selection, SparseFieldsMixin
+from core.projections import compile_serializer
+
+
+class IdCursorPagination(CursorPagination):
+    """Pagination par curseur (keyset) sur une clé stable.
+
+    La page N coûte autant que la page 1 : la position est filtrée par
+    `WHERE id > <dernier id>` au lieu d'un OFFSET.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = 'id'
+
+
+def is_paginated_request(request, paginator):
+    """La pagination est opt-in : activée seulement si `cursor` ou `page_size` est fourni"""
+    params = request.query_params
+    return (
+        paginator.cursor_query_param in params
+        or paginator.page_size_query_param in params
+    )
+
+
+def paginated_data(request, queryset, serializer_class, ordering='id', **serializer_kwargs):
+    """Données sérialisées du queryset, paginées par curseur si le client le demande.
+
+    Sans paramètre de pagination, c'est la liste complète (compatibilité
+    avec le frontend actuel). Avec `?cursor=` ou `?page_size=N`, c'est
+    `{"next": ..., "previous": ..., "results": [...]}`.
+    Les serializers à champs choisis suivent `?fields=` / `?expand=`
+    (core.fieldsets) : colonnes et préchargements réduits d'autant. Ceux
+    compilables en projection (core.projections) sont lus par values(),
+    sans instance de modèle ni champ DRF par ligne.
+    """
+    paginator = IdCursorPagination()
+    paginator.ordering = ordering
+    paginated = is_paginated_request(request, paginator)
+
+    if issubclass(serializer_class, SparseFieldsMixin):
+        selection = serializer_kwargs.setdefault('selection', Selection.from_request(request))
+        projection = compile_serializer(serializer_class, selection)
+        if projection is not None:
+            rows = projection.values(queryset)
+            if not paginated:
+                return projection.render(rows)
+            page = paginator.paginate_queryset(rows, request)
+            return paginator.get_paginated_response(projection.render(page)).data
+        queryset = serializer_class.optimize(queryset, selection)
+
+    if not paginated:
+        return serializer_class(queryset, many=True, **serializer_kwargs).data
+
+    page = paginator.paginate_queryset(queryset, request)
+    serializer = serializer_class(page, many=True, **serializer_kwargs)
+    return paginator.get_paginated_response(serializer.data).data
+
+
+def paginated_response(request, queryset, serializer_class, ordering='id', **serializer_kwargs):
+    """Response construite à partir de paginated_data()"""
+    return Response(paginated_data(request, queryset, serializer_class, ordering, **serializer_kwargs))
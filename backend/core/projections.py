@@ -0,0 +1,153 @@
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from rest_framework import serializers
+
+from core.fieldsets import Selection
+
+
+# Champ calculé d'un serializer, lu depuis values() :
+# - one : objet lié par clé étrangère, {col: valeur} ou None
+# - many : objets liés par plusieurs-à-plusieurs, [{col: valeur}, ...] triés par id
+One = namedtuple('One', ['lookup', 'columns'])
+Many = namedtuple('Many', ['lookup', 'columns'])
+
+
+def one(lookup, *columns):
+    return One(lookup, columns)
+
+
+def many(lookup, *columns):
+    return Many(lookup, columns)
+
+
+# Valeur de values() déjà identique à la sortie DRF
+IDENTITE = (
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+)
+# Conversion par le champ DRF lui-même (fuseau, format)
+CONVERTIS = (
+    serializers.DateTimeField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DecimalField,
+    serializers.FloatField,
+    serializers.UUIDField,
+)
+
+
+class Projection:
+    """Serializer de liste compilé : une requête values() et un mapping plat par ligne.
+
+    `columns` : colonnes de values() ; `mapping` : (clé de sortie, colonne,
+    conversion) ou (clé, One) ; `many` : relations chargées ensuite par une
+    requête values() sur la table de liaison.
+    """
+
+    def __init__(self, model, columns, mapping, many_relations):
+        self.model = model
+        self.columns = columns
+        self.mapping = mapping
+        self.many_relations = many_relations
+
+    def values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def render(self, rows):
+        rows = list(rows)
+        liees = {name: self._many(relation, rows) for name, relation in self.many_relations}
+        pk = self.model._meta.pk.attname
+        result = []
+        for row in rows:
+            item = {}
+            for name, source, convert in self.mapping:
+                if isinstance(source, One):
+                    if row[source.lookup] is None:
+                        item[name] = None
+                    else:
+                        item[name] = {col: row[f'{source.lookup}__{col}'] for col in source.columns}
+                elif isinstance(source, Many):
+                    item[name] = liees[name].get(row[pk], [])
+                else:
+                    value = row[source]
+                    item[name] = value if value is None or convert is None else convert(value)
+            result.append(item)
+        return result
+
+    def _many(self, relation, rows):
+        field = self.model._meta.get_field(relation.lookup)
+        parent, cible = field.m2m_field_name(), field.m2m_reverse_field_name()
+        ids = [row[self.model._meta.pk.attname] for row in rows]
+        if not ids:
+            return {}
+        liens = field.remote_field.through.objects.filter(**{f'{parent}__in': ids}).order_by(f'{cible}_id')
+        groupes = defaultdict(list)
+        colonnes = [f'{cible}__{col}' for col in relation.columns]
+        for lien in liens.values(f'{parent}_id', *colonnes):
+            groupes[lien[f'{parent}_id']].append({
+                col: lien[colonne] for col, colonne in zip(relation.columns, colonnes)
+            })
+        return groupes
+
+
+def _compiler(serializer_class, selection):
+    model = serializer_class.Meta.model
+    concrete = {f.name for f in model._meta.concrete_fields}
+    declarees = getattr(serializer_class, 'projections', {})
+    pk = model._meta.pk.attname
+    columns, mapping, many_relations = [pk], [], []
+
+    for name, field in serializer_class(selection=selection).fields.items():
+        source = declarees.get(name)
+        if isinstance(source, One):
+            columns.append(source.lookup)
+            columns.extend(f'{source.lookup}__{col}' for col in source.columns)
+            mapping.append((name, source, None))
+        elif isinstance(source, Many):
+            many_relations.append((name, source))
+            mapping.append((name, source, None))
+        elif field.source in concrete and isinstance(field, IDENTITE + CONVERTIS):
+            convert = field.to_representation if isinstance(field, CONVERTIS) else None
+            columns.append(field.source)
+            mapping.append((name, field.source, convert))
+        else:
+            # Champ non projetable : le serializer reste nécessaire
+            return None
+    return Projection(model, list(dict.fromkeys(columns)), mapping, many_relations)
+
+
+@lru_cache(maxsize=None)
+def _champs(serializer_class):
+    """Noms des champs par défaut d'un serializer (un calcul par classe)"""
+    return frozenset(serializer_class(selection=Selection()).fields)
+
+
+@lru_cache(maxsize=256)
+def _compiler_selection(serializer_class, fields):
+    return _compiler(serializer_class, Selection(fields))
+
+
+def compile_serializer(serializer_class, selection=None):
+    """Projection d'un serializer de liste pour une sélection, None si non compilable.
+
+    Un serializer n'est compilable que si chaque champ retenu est une
+    colonne simple ou est déclaré dans `projections` ; `?expand=` et les
+    champs calculés non déclarés passent par le serializer.
+
+    Les projections sont mémorisées par sélection réduite aux champs réels
+    du serializer : des `?fields=`/`?expand=` arbitraires ne créent pas de
+    nouvelles entrées.
+    """
+    selection = selection or Selection()
+    if not hasattr(serializer_class, 'Meta'):
+        return None
+    if Selection._racines(selection.expand) & set(getattr(serializer_class, 'expandable', {})):
+        return None
+    fields = selection.fields
+    if fields is not None:
+        fields = frozenset(Selection._racines(fields)) & _champs(serializer_class)
+    return _compiler_selection(serializer_class, fields)
@@ -0,0 +1,58 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    msgpack = None
+
+
+# Types non natifs (Decimal, timedelta, chaînes paresseuses, QuerySet, ...) :
+# même conversion que l'encodeur JSON de DRF
+_drf_default = JSONEncoder().default
+
+if orjson is not None:
+    # Compact et UTF-8 comme DRF ; « Z » pour un décalage nul, clés non-str acceptées
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer de DRF encodé par orjson quand il est installé.
+
+    Sortie identique : dates ISO 8601 (« Z » pour UTC), UUID en chaîne,
+    Decimal en nombre, U+2028/U+2029 échappés. `indent` demandé dans
+    l'Accept, ou donnée refusée par orjson : encodeur de DRF.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Entier hors 64 bits, ... : l'encodeur standard tranche
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Réponse MessagePack (Accept: application/msgpack ou ?format=msgpack).
+
+    Mêmes valeurs que le JSON : les dates restent des chaînes ISO 8601.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_drf_default, use_bin_type=True)
@@ -0,0 +1,85 @@
+from django.core.cache import caches
+from django.db import transaction
+
+
+CACHE_ALIAS = 'reponses'
+ENDPOINTS_KEY = 'metrics:endpoints'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _incr(key, delta=1):
+    """Incrémente un compteur sans expiration, en le créant au besoin"""
+    cache = get_cache()
+    if cache.add(key, delta, timeout=None):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Clé expirée/évincée entre add() et incr()
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+def generation(scope):
+    """Génération courante d'un scope (ex: 'cours', 'horaire', 'promotion')"""
+    return get_cache().get_or_set(f'gen:{scope}', 1, timeout=None)
+
+
+def bump(*scopes):
+    """Invalide toutes les réponses dépendant de ces scopes.
+
+    Incrémente tout de suite puis de nouveau après le commit : une réponse
+    mise en cache entre l'écriture et le commit ne survit pas.
+    """
+    def _bump():
+        for scope in scopes:
+            _incr(f'gen:{scope}')
+    _bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(_bump)
+
+
+def cached_data(endpoint, scopes, variant, build, timeout=300):
+    """Retourne les données de réponse en cache ou les construit via `build()`.
+
+    La clé combine l'endpoint, la variante (promotion, classe de rôle, query
+    string) et la génération de chaque scope : une écriture sur un scope
+    rend toutes les anciennes entrées inaccessibles sans les parcourir.
+    """
+    cache = get_cache()
+    generations = '.'.join(str(generation(scope)) for scope in scopes)
+    variant = ':'.join(str(part) for part in variant)
+    key = f'reponse:{endpoint}:{variant}:{generations}'
+
+    data = cache.get(key)
+    if data is not None:
+        _incr(f'metrics:{endpoint}:hit')
+        return data
+
+    _incr(f'metrics:{endpoint}:miss')
+    endpoints = cache.get(ENDPOINTS_KEY, set())
+    if endpoint not in endpoints:
+        cache.set(ENDPOINTS_KEY, endpoints | {endpoint}, timeout=None)
+
+    data = build()
+    cache.set(key, data, timeout=timeout)
+    return data
+
+
+def metrics():
+    """Compteurs hit/miss par endpoint"""
+    cache = get_cache()
+    result = {}
+    for endpoint in sorted(cache.get(ENDPOINTS_KEY, set())):
+        hits = cache.get(f'metrics:{endpoint}:hit', 0)
+        misses = cache.get(f'metrics:{endpoint}:miss', 0)
+        total = hits + misses
+        result[endpoint] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / total, 3) if total else None,
+        }
+    return result
@@ -0,0 +1,15 @@
+from rest_framework import serializers
+
+
+class BatchItemSerializer(serializers.Serializer):
+    """Une sous-requête du lot (core.batch)"""
+    id = serializers.CharField(required=False, help_text="Repris tel quel dans la réponse")
+    method = serializers.ChoiceField(choices=['GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'])
+    path = serializers.CharField(help_text="Chemin avec query string, ex: /api/academique/cours/3/")
+    body = serializers.JSONField(required=False, allow_null=True)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict) and isinstance(data.get('method'), str):
+            data = {**data, 'method': data['method'].upper()}
+        return super().to_internal_value(data)
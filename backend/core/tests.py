@@ -1,3 +1,310 @@
-from django.test import TestCase
+import datetime
+import io
+import decimal
+import uuid
+import zoneinfo
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.db import connection
+from django.http import FileResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from academique import acces
+from academique.models import Cours, Horaire, Promotion
+from academique.serializer.cours_list import CoursListSerializer
+from academique.serializer.horaire import HoraireSerializer
+from core import batch, response_cache
+from core.fieldsets import Selection
+from core.projections import _compiler_selection, compile_serializer
+from core.renderers import ORJSONRenderer, msgpack
+from documents.serializer.document import DocumentListSerializer
+from documents.serializer.document_file import DocumentFileSerializer
+from documents.models import Document
+from users.models import User
+from users.serializers import UserListSerializer
+
+
+class BatchTests(TestCase):
+    """Requêtes groupées : dispatch interne, un statut par élément"""
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+        acces.index.clear()
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.b2 = Promotion.objects.create(name='B2', annee=2025)
+        self.cours = Cours.objects.create(titre='Anatomie', description='desc')
+        self.cours.promotions.add(self.b1)
+        self.document = Document.objects.create(cours=self.cours, titre='Notes')
+        self.etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT', promotion=self.b1,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.etudiant)
+
+    def _batch(self, *requests):
+        response = self.client.post('/api/batch/', {'requests': list(requests)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['responses']
+
+    def test_course_page_in_one_round_trip(self):
+        paths = [
+            f'/api/academique/cours/{self.cours.id}/',
+            f'/api/cours/{self.cours.id}/documents/',
+            f'/api/documents/{self.document.id}/files/',
+        ]
+        results = self._batch(*[{'id': str(i), 'method': 'get', 'path': path} for i, path in enumerate(paths)])
+
+        self.assertEqual([r['id'] for r in results], ['0', '1', '2'])
+        for result, path in zip(results, paths):
+            self.assertEqual(result['status'], 200, path)
+            self.assertEqual(result['body'], self.client.get(path).data, path)
+
+    def test_per_item_errors_do_not_fail_the_batch(self):
+        autre = Cours.objects.create(titre='Autre', description='desc')
+        autre.promotions.add(self.b2)
+
+        results = self._batch(
+            {'method': 'GET', 'path': f'/api/cours/{autre.id}/documents/'},
+            {'method': 'GET', 'path': '/api/inconnu/'},
+            {'method': 'GET', 'path': '/admin/'},
+            {'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}},
+            {'method': 'GET', 'path': '/api/academique/promotions/'},
+        )
+
+        self.assertEqual([r['status'] for r in results], [403, 404, 400, 400, 200])
+
+    def test_forbidden_courses_are_refused_without_dispatch(self):
+        autres = [Cours.objects.create(titre=f'Autre {i}', description='desc') for i in range(3)]
+        for cours in autres:
+            cours.promotions.add(self.b2)
+        item = {'method': 'GET', 'path': f'/api/cours/{self.cours.id}/documents/'}
+
+        acces.index.clear()
+        with CaptureQueriesContext(connection) as seul:
+            self._batch(item)
+        acces.index.clear()
+        # Droits des quatre cours en un chargement de l'index, refus sans exécuter la vue
+        with CaptureQueriesContext(connection) as lot:
+            results = self._batch(*[
+                {'method': 'GET', 'path': f'/api/cours/{cours.id}/documents/'} for cours in autres
+            ], item)
+
+        self.assertEqual([r['status'] for r in results], [403, 403, 403, 200])
+        self.assertEqual(len(lot), len(seul))
+
+    def test_file_and_stream_routes_are_refused_before_running(self):
+        results = self._batch(
+            {'method': 'GET', 'path': '/api/documents/files/1/view/'},
+            {'method': 'GET', 'path': '/api/academique/exports/cours/'},
+        )
+
+        self.assertEqual([r['status'] for r in results], [400, 400])
+        self.assertIn('à demander directement', results[0]['body']['detail'])
+
+    def test_sub_responses_are_closed(self):
+        fichier = io.BytesIO(b'contenu')
+        match = mock.Mock(func=lambda request: FileResponse(fichier), args=(), kwargs={})
+
+        with mock.patch.object(batch, 'resolve', return_value=match):
+            results = self._batch({'method': 'GET', 'path': '/api/flux/'})
+
+        self.assertEqual(results[0]['body'], None)
+        self.assertTrue(fichier.closed)
+
+    def test_items_run_as_the_batch_user(self):
+        # Un en-tête Authorization dans un élément est ignoré
+        results = self._batch({
+            'method': 'GET', 'path': '/api/auth/users/me/',
+            'headers': {'Authorization': 'Bearer autre', 'Cookie': 'access_token=autre'},
+        })
+
+        self.assertEqual(results[0]['status'], 200)
+        self.assertEqual(results[0]['body']['email'], 'etu@example.com')
+
+    def test_writes_are_applied_in_order(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client.force_authenticate(admin)
+
+        results = self._batch(
+            {'method': 'POST', 'path': '/api/academique/horaires/',
+             'body': {'titre': 'CM', 'date_debut': '2030-10-06T09:00:00Z', 'promotion': self.b1.id}},
+            {'method': 'GET', 'path': f'/api/academique/stats/horaires/?promotion_id={self.b1.id}'},
+        )
+
+        self.assertEqual(results[0]['status'], 201)
+        self.assertEqual([h['titre'] for h in results[1]['body']], ['CM'])
+
+    def test_invalid_payload(self):
+        response = self.client.post('/api/batch/', {'requests': [{'method': 'TRACE', 'path': '/api/'}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/batch/', {'requests': []}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchConcurrencyTests(TransactionTestCase):
+    """Hors transaction, les lectures consécutives passent par le pool de threads"""
+
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_concurrent_reads_match_sequential_results(self):
+        paths = ['/api/academique/promotions/', '/api/academique/stats/overview/', '/api/auth/users/me/'] * 3
+        with mock.patch.object(batch._executor, 'submit', wraps=batch._executor.submit) as submit:
+            response = self.client.post(
+                '/api/batch/', {'requests': [{'method': 'GET', 'path': path} for path in paths]}, format='json',
+            )
+
+        self.assertEqual(submit.call_count, len(paths))
+
+        results = response.data['responses']
+        self.assertEqual([r['status'] for r in results], [200] * len(paths))
+        self.assertEqual(results[0]['body'], [{'id': self.b1.id, 'name': 'B1', 'annee': 2025}])
+        self.assertEqual(results[5]['body']['email'], 'admin@example.com')
+
+
+class ProjectionContractTests(TestCase):
+    """Chaque projection values() rend exactement la sortie de son serializer"""
+
+    def setUp(self):
+        b1 = Promotion.objects.create(name='B1', annee=2025)
+        b2 = Promotion.objects.create(name='B2', annee=2025)
+        enc1 = User.objects.create_user(
+            email='enc1@example.com', password='x', first_name='En', last_name='Un', role='ENCADREUR',
+        )
+        enc2 = User.objects.create_user(
+            email='enc2@example.com', password='x', first_name='En', last_name='Deux', role='ENCADREUR',
+            promotion=b1, bio='Bio',
+        )
+        vide = Cours.objects.create(titre='Vide', description='')
+        cours = Cours.objects.create(titre='Anatomie', description='desc')
+        cours.encadreurs.add(enc2, enc1)
+        cours.promotions.add(b2, b1)
+        debut = timezone.now().replace(microsecond=123456)
+        Horaire.objects.create(titre='CM', date_debut=debut, lieu='Amphi', promotion=b1, cours=cours)
+        Horaire.objects.create(titre='TD', date_debut=debut, date_fin=debut + timezone.timedelta(hours=1))
+        Document.objects.create(cours=vide, titre='Notes', categorie='resume')
+
+        self.cas = [
+            (UserListSerializer, User.objects.all()),
+            (CoursListSerializer, Cours.objects.all()),
+            (HoraireSerializer, Horaire.objects.all()),
+            (DocumentListSerializer, Document.objects.all()),
+        ]
+
+    def _assert_contract(self, selection):
+        for serializer_class, queryset in self.cas:
+            projection = compile_serializer(serializer_class, selection)
+            self.assertIsNotNone(projection, serializer_class.__name__)
+            attendu = serializer_class(serializer_class.optimize(queryset, selection), many=True, selection=selection).data
+            self.assertEqual(projection.render(projection.values(queryset)), attendu, serializer_class.__name__)
+
+    def test_default_schema(self):
+        self._assert_contract(Selection())
+
+    def test_sparse_fields(self):
+        self._assert_contract(Selection({'id', 'promotion', 'promotions', 'date_debut', 'titre'}))
+
+    @override_settings(TIME_ZONE='Europe/Paris')
+    def test_datetimes_follow_current_timezone(self):
+        self._assert_contract(Selection())
+
+    def test_uncompilable_serializers_fall_back(self):
+        # Champ calculé non déclaré (URL du fichier), relation détaillée à la demande
+        self.assertIsNone(compile_serializer(DocumentFileSerializer))
+        self.assertIsNone(compile_serializer(DocumentListSerializer, Selection(expand={'fichiers'})))
+
+    def test_arbitrary_selections_share_compiled_projection(self):
+        projection = compile_serializer(UserListSerializer, Selection({'id', 'last_name'}))
+        taille = _compiler_selection.cache_info().currsize
+
+        for i in range(50):
+            autre = compile_serializer(
+                UserListSerializer, Selection({'id', 'last_name', f'inconnu{i}'}, expand={f'x{i}'}),
+            )
+            self.assertIs(autre, projection)
+        self.assertEqual(_compiler_selection.cache_info().currsize, taille)
+
+    def test_paginated_list_uses_projection(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        page = client.get('/api/academique/encadreurs/?page_size=1').data
+        suite = client.get(page['next']).data
+
+        self.assertEqual([row['last_name'] for row in page['results'] + suite['results']], ['Un', 'Deux'])
+
+
+class RendererTests(TestCase):
+    """orjson rend exactement la sortie de l'encodeur JSON de DRF"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x', first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_output_matches_drf_json(self):
+        paris = zoneinfo.ZoneInfo('Europe/Paris')
+        data = {
+            'utc': datetime.datetime(2025, 10, 6, 9, 0, tzinfo=datetime.timezone.utc),
+            'paris': datetime.datetime(2025, 10, 6, 9, 0, 0, 123456, tzinfo=paris),
+            'naive': datetime.datetime(2025, 10, 6, 9, 0),
+            'jour': datetime.date(2025, 10, 6),
+            'heure': datetime.time(9, 30),
+            'duree': datetime.timedelta(hours=1),
+            'decimal': decimal.Decimal('12.50'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Introuvable'),
+            'erreur': [ErrorDetail('Champ requis', code='required')],
+            'tuple': (1, 2.5, None, True),
+            'texte': 'Amphi « A »\u2028suite',
+            3: 'clé entière',
+        }
+
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_drf(self):
+        data = {'a': [1, 2]}
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_api_uses_orjson_renderer_and_parser(self):
+        response = self.client.get('/api/academique/promotions/')
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+
+        response = self.client.post('/api/batch/', '{"requests": [', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.data['detail'].startswith('JSON parse error'))
+
+    @skipUnless(msgpack is not None, "msgpack n'est pas installé")
+    def test_msgpack_is_content_negotiated(self):
+        Promotion.objects.create(name='B1', annee=2025)
+
+        response = self.client.get('/api/academique/promotions/', HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get('/api/academique/promotions/').json())
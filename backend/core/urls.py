@@ -1,9 +1,11 @@
 from django.urls import path
-from .views import health_check, dashboard_view, delete_etudiant, create_encadreur
+from .views import health_check, dashboard_view, delete_etudiant, create_encadreur, cache_metrics, batch_view
 
 urlpatterns = [
     path("health/", health_check),
     path('dashboard/', dashboard_view),
     path('create-encadreur/', create_encadreur),
     path('delete-etudiant/', delete_etudiant),
+    path('cache/metrics/', cache_metrics),
+    path('batch/', batch_view),
 ]
\ No newline at end of file
@@ -0,0 +1,31 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Version
+
+
+def _incrementer(scopes):
+    now = timezone.now()
+    for scope in scopes:
+        updated = Version.objects.filter(scope=scope).update(valeur=F('valeur') + 1, date_maj=now)
+        if not updated:
+            Version.objects.get_or_create(scope=scope, defaults={'valeur': 1, 'date_maj': now})
+
+
+def bump(*scopes):
+    """Incrémente la version des scopes une fois l'écriture validée.
+
+    Hors de la transaction de l'écriture : le verrou de la ligne
+    `version` n'est tenu que le temps de cet UPDATE, les écritures
+    concurrentes sur un même scope ne s'attendent plus jusqu'au commit.
+    """
+    transaction.on_commit(lambda: _incrementer(scopes))
+
+
+def lire(scopes):
+    """Retourne {scope: (version, date_maj)} en une requête ; (0, None) si jamais écrit"""
+    versions = {scope: (0, None) for scope in scopes}
+    for scope, valeur, date_maj in Version.objects.filter(scope__in=scopes).values_list('scope', 'valeur', 'date_maj'):
+        versions[scope] = (valeur, date_maj)
+    return versions
@@ -4,7 +4,10 @@ from rest_framework.permissions import IsAuthenticated
 # Create your views here.
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework import status
 from users.permissions import IsRole
+from core import batch, response_cache
+from core.serializers import BatchItemSerializer
 
 @api_view(['GET'])
 def health_check(request) :
@@ -40,3 +43,37 @@ def create_encadreur(request):
 def delete_etudiant(request):
     # logique de suppression ici
     return Response({"message": f"{request.user.role} {request.user.first_name} peut supprimer un étudiant."})
+
+
+# Métriques hit/miss du cache des réponses → uniquement admin
+@api_view(['GET'])
+@permission_classes([IsRole(['ADMIN'])])
+def cache_metrics(request):
+    return Response(response_cache.metrics())
+
+
+# Nombre maximal de sous-requêtes par lot
+BATCH_MAX_REQUESTS = 50
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch_view(request):
+    """POST {"requests": [{"method", "path", "body"?, "headers"?, "id"?}, ...]}
+
+    Exécute les sous-requêtes en interne (résolveur d'URL, même
+    utilisateur) et renvoie {"responses": [{"status", "headers", "body"}]}
+    dans le même ordre. Les lectures consécutives sont parallèles.
+    """
+    items = request.data.get('requests')
+    if not isinstance(items, list) or not items or len(items) > BATCH_MAX_REQUESTS:
+        return Response(
+            {"detail": f"Liste 'requests' attendue ({BATCH_MAX_REQUESTS} max)"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    serializer = BatchItemSerializer(data=items, many=True)
+    if not serializer.is_valid():
+        return Response({'requests': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({'responses': batch.run(request, serializer.validated_data)})
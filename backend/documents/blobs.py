@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models import F
+
+from documents.models import Blob, DocumentFile
+
+
+def storage():
+    return DocumentFile._meta.get_field('fichier').storage
+
+
+def add_ref(name, taille=None):
+    """Ajoute une référence au blob `name` (créé au besoin)"""
+    updated = Blob.objects.filter(name=name).update(refs=F('refs') + 1)
+    if not updated:
+        if taille is None:
+            taille = storage().size(name)
+        blob, created = Blob.objects.get_or_create(name=name, defaults={'taille': taille, 'refs': 1})
+        if not created:
+            Blob.objects.filter(name=name).update(refs=F('refs') + 1)
+
+
+def _supprimer_si_orphelin(name):
+    # Un envoi concurrent du même contenu a pu réutiliser le fichier (add_ref) entre-temps
+    if not Blob.objects.filter(name=name).exists():
+        storage().delete(name)
+
+
+def release(name):
+    """Retire une référence ; le fichier est supprimé quand plus rien n'y renvoie.
+
+    La ligne du blob est verrouillée le temps du décompte, et l'absence de
+    blob vérifiée de nouveau après le commit, avant de supprimer le fichier.
+    """
+    with transaction.atomic():
+        blob = Blob.objects.select_for_update().filter(name=name).first()
+        if blob is None:
+            return
+        if blob.refs > 1:
+            Blob.objects.filter(name=name).update(refs=F('refs') - 1)
+            return
+        blob.delete()
+    transaction.on_commit(lambda: _supprimer_si_orphelin(name))
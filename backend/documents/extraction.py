@@ -0,0 +1,194 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Func, Q, Subquery
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+from documents.models import DocumentFile, ExtractionJob, PageTexte
+from documents.serving import content_type_for
+from recherche import index
+
+try:
+    import pypdf
+except ImportError:  # dépendance optionnelle : extraction indisponible
+    pypdf = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def available():
+    return pypdf is not None
+
+
+def is_pdf(name):
+    return content_type_for(name or '') == 'application/pdf'
+
+
+def enqueue(document_file_id):
+    """(Re)met en file l'extraction d'un fichier : un seul INSERT/UPDATE, rien d'autre"""
+    ExtractionJob.objects.update_or_create(
+        document_file_id=document_file_id,
+        defaults={
+            'etat': ExtractionJob.EN_ATTENTE,
+            'tentatives': 0,
+            'prochain_essai': None,
+            'verrou_jusqu_a': None,
+            'erreur': '',
+        },
+    )
+
+
+def extract_pages(fileobj):
+    """Itère (numéro de page, texte) d'un PDF, une page à la fois"""
+    if pypdf is None:
+        raise ExtractionError("pypdf n'est pas installé")
+    try:
+        reader = pypdf.PdfReader(fileobj)
+        for number, page in enumerate(reader.pages, start=1):
+            yield number, page.extract_text() or ''
+    except pypdf.errors.PdfReadError as exc:
+        raise ExtractionError(str(exc)) from exc
+
+
+# Clé du verrou consultatif PostgreSQL qui sérialise les réservations
+VERROU_RESERVATION = 0x65787472
+
+
+def _places_restantes(now):
+    """Condition SQL : moins de EXTRACTION_MAX_CONCURRENCY tâches verrouillées"""
+    actives = ExtractionJob.objects.filter(
+        etat=ExtractionJob.EN_COURS, verrou_jusqu_a__gt=now,
+    ).order_by().annotate(n=Func(F('id'), function='COUNT')).values('n')
+    return LessThan(Subquery(actives), _setting('EXTRACTION_MAX_CONCURRENCY', 2))
+
+
+def claim():
+    """Réserve la prochaine tâche due, ou None.
+
+    Au plus EXTRACTION_MAX_CONCURRENCY tâches verrouillées à la fois, tous
+    workers confondus. Le décompte des tâches actives fait partie de
+    l'UPDATE conditionnel de réservation (une seule instruction) : deux
+    workers ne prennent jamais la même tâche ni une place en trop. SQLite
+    sérialise les écritures ; sous PostgreSQL (READ COMMITTED) un verrou
+    consultatif de transaction sérialise les réservations.
+    """
+    now = timezone.now()
+    dues = ExtractionJob.objects.filter(
+        Q(etat=ExtractionJob.EN_ATTENTE) | Q(etat=ExtractionJob.EN_COURS, verrou_jusqu_a__lte=now),
+        Q(prochain_essai__isnull=True) | Q(prochain_essai__lte=now),
+    ).order_by('date_creation', 'id')
+
+    for job in dues.only('id', 'etat', 'verrou_jusqu_a')[:5]:
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [VERROU_RESERVATION])
+            claimed = ExtractionJob.objects.filter(
+                _places_restantes(now),
+                pk=job.pk, etat=job.etat, verrou_jusqu_a=job.verrou_jusqu_a,
+            ).update(
+                etat=ExtractionJob.EN_COURS,
+                verrou_jusqu_a=now + timedelta(seconds=_setting('EXTRACTION_LEASE', 600)),
+                date_maj=now,
+            )
+        if claimed:
+            return ExtractionJob.objects.select_related('document_file__document').get(pk=job.pk)
+    return None
+
+
+def _fail(job, exc):
+    job.tentatives += 1
+    job.erreur = str(exc)[:2000]
+    job.verrou_jusqu_a = None
+    if job.tentatives < _setting('EXTRACTION_MAX_ATTEMPTS', 3) and not isinstance(exc, ExtractionError):
+        # Nouvel essai avec délai exponentiel
+        delay = _setting('EXTRACTION_RETRY_DELAY', 60) * 2 ** (job.tentatives - 1)
+        job.etat = ExtractionJob.EN_ATTENTE
+        job.prochain_essai = timezone.now() + timedelta(seconds=delay)
+    else:
+        job.etat = ExtractionJob.ECHEC
+    job.save(update_fields=['tentatives', 'erreur', 'verrou_jusqu_a', 'etat', 'prochain_essai', 'date_maj'])
+
+
+def process(job):
+    """Extrait le texte du fichier de la tâche, remplace ses pages et les indexe"""
+    doc_file = job.document_file
+    try:
+        # Lecture et extraction hors transaction : seul le texte compressé reste en mémoire
+        pages = []
+        with doc_file.fichier.open('rb') as f:
+            for number, text in extract_pages(f):
+                text = text.strip()
+                if text:
+                    pages.append((number, PageTexte.compresser(text)))
+    except Exception as exc:
+        _fail(job, exc)
+        return False
+
+    titre = doc_file.nom or doc_file.fichier.name.rsplit('/', 1)[-1]
+    with transaction.atomic():
+        # delete() passe par les signaux : les anciennes pages quittent l'index
+        PageTexte.objects.filter(document_file=doc_file).delete()
+        created = PageTexte.objects.bulk_create(
+            [PageTexte(document_file=doc_file, page=number, texte=data) for number, data in pages],
+            batch_size=200,
+        )
+        index.indexer(*[
+            index.entree_page(page.id, page.page, PageTexte.decompresser(page.texte), titre, doc_file.document.cours_id)
+            for page in created
+        ])
+        job.etat = ExtractionJob.TERMINE
+        job.nb_pages = len(created)
+        job.verrou_jusqu_a = None
+        job.erreur = ''
+        job.save(update_fields=['etat', 'nb_pages', 'verrou_jusqu_a', 'erreur', 'date_maj'])
+    return True
+
+
+def run_pending(max_jobs=None):
+    """Traite les tâches dues jusqu'à épuisement (ou `max_jobs`) ; renvoie (réussies, échouées)"""
+    done = failed = 0
+    while max_jobs is None or done + failed < max_jobs:
+        job = claim()
+        if job is None:
+            break
+        if process(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def run_worker(poll_interval=5):
+    """Boucle du worker : traite la file, attend `poll_interval` secondes quand elle est vide"""
+    while True:
+        done, failed = run_pending()
+        if not done and not failed:
+            time.sleep(poll_interval)
+
+
+def backfill(batch_size=500):
+    """Met en file les PDF existants sans extraction ; renvoie le nombre de tâches créées"""
+    existing = ExtractionJob.objects.values('document_file_id')
+    candidates = DocumentFile.objects.exclude(id__in=existing).values_list('id', 'fichier')
+    total = 0
+    batch = []
+    for file_id, name in candidates.iterator(chunk_size=1000):
+        if not is_pdf(name):
+            continue
+        batch.append(ExtractionJob(document_file_id=file_id))
+        if len(batch) >= batch_size:
+            ExtractionJob.objects.bulk_create(batch)
+            total += len(batch)
+            batch = []
+    ExtractionJob.objects.bulk_create(batch)
+    return total + len(batch)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from documents import extraction
+
+
+class Command(BaseCommand):
+    help = "Met en file l'extraction du texte des PDF déjà envoyés (sans tâche existante)"
+
+    def handle(self, *args, **options):
+        total = extraction.backfill()
+        self.stdout.write(self.style.SUCCESS(f"{total} tâche(s) d'extraction créée(s)"))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents import blobs
+from documents.models import DocumentFile
+
+
+class Command(BaseCommand):
+    help = (
+        "Range les fichiers existants de DocumentFile dans le stockage adressé "
+        "par contenu et supprime les copies en double"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Calcule le gain sans rien modifier")
+
+    def handle(self, *args, **options):
+        storage = blobs.storage()
+        dry_run = options['dry_run']
+        migrated = missing = 0
+        # Octets récupérés = anciens fichiers supprimés - blobs créés
+        legacy_bytes = {}
+        blob_bytes = {}
+
+        queryset = DocumentFile.objects.only('id', 'fichier').order_by('id')
+        for doc_file in queryset.iterator(chunk_size=500):
+            name = doc_file.fichier.name
+            if storage.is_content_addressed(name):
+                continue
+            if name not in legacy_bytes and not storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Fichier manquant : {name} (DocumentFile {doc_file.id})")
+                continue
+
+            size = legacy_bytes.get(name)
+            if size is None:
+                size = legacy_bytes[name] = storage.size(name)
+
+            if dry_run:
+                with storage.open(name, 'rb') as f:
+                    blob_name = storage.blob_name(storage.digest(f), name)
+                if not storage.exists(blob_name):
+                    blob_bytes[blob_name] = size
+                migrated += 1
+                continue
+
+            with storage.open(name, 'rb') as f:
+                blob_name, _, created = storage.store(f, name)
+            if created:
+                blob_bytes[blob_name] = size
+
+            with transaction.atomic():
+                # update() : pas de signal, les références sont comptées ici
+                DocumentFile.objects.filter(pk=doc_file.pk).update(fichier=blob_name)
+                blobs.add_ref(blob_name, size)
+
+            if not DocumentFile.objects.filter(fichier=name).exists():
+                storage.delete(name)
+            migrated += 1
+
+        reclaimed = sum(legacy_bytes.values()) - sum(blob_bytes.values())
+        verb = "à migrer" if dry_run else "migrés"
+        self.stdout.write(f"{migrated} fichier(s) {verb}, {missing} manquant(s)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Octets récupérés{' (estimation)' if dry_run else ''} : {reclaimed}"
+        ))
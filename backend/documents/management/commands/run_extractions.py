@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from documents import extraction
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker d'extraction du texte des PDF : traite la file ExtractionJob. "
+        "Lancer jusqu'à EXTRACTION_MAX_CONCURRENCY processus en parallèle"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Vide la file puis s'arrête")
+        parser.add_argument('--max-jobs', type=int, help="Nombre maximal de tâches (avec --once)")
+        parser.add_argument('--poll', type=float, default=5, help="Attente en secondes quand la file est vide")
+
+    def handle(self, *args, **options):
+        if not extraction.available():
+            raise CommandError("pypdf n'est pas installé : extraction impossible")
+
+        if not options['once']:
+            self.stdout.write("Worker d'extraction démarré")
+            extraction.run_worker(poll_interval=options['poll'])
+            return
+
+        done, failed = extraction.run_pending(max_jobs=options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f"{done} extraction(s) terminée(s), {failed} en échec"))
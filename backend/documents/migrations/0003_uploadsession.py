@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:56
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0002_document_uploaded_by_documentfile_uploaded_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nom', models.CharField(blank=True, max_length=200, null=True)),
+                ('filename', models.CharField(max_length=200)),
+                ('taille', models.BigIntegerField()),
+                ('recu', models.BigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, max_length=64, null=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='documents.document')),
+                ('uploaded_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+import documents.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_uploadsession'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('taille', models.BigIntegerField()),
+                ('refs', models.IntegerField(default=0)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='documentfile',
+            name='fichier',
+            field=models.FileField(storage=documents.storage.documents_storage, upload_to='fichiers/'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_blob_documentfile_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etat', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminé'), ('echec', 'Échec')], default='en_attente', max_length=20)),
+                ('tentatives', models.PositiveIntegerField(default=0)),
+                ('prochain_essai', models.DateTimeField(blank=True, null=True)),
+                ('verrou_jusqu_a', models.DateTimeField(blank=True, null=True)),
+                ('erreur', models.TextField(blank=True, default='')),
+                ('nb_pages', models.PositiveIntegerField(blank=True, null=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_maj', models.DateTimeField(auto_now=True)),
+                ('document_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='extraction', to='documents.documentfile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['etat', 'prochain_essai'], name='documents_e_etat_f32903_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PageTexte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.PositiveIntegerField()),
+                ('texte', models.BinaryField()),
+                ('document_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='documents.documentfile')),
+            ],
+            options={
+                'unique_together': {('document_file', 'page')},
+            },
+        ),
+    ]
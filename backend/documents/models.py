@@ -1,6 +1,10 @@
+import uuid
+import zlib
+
 from django.db import models
 from academique.models import Cours
 from users.models import User
+from documents.storage import documents_storage
 
 # Create your models here.
 class Document(models.Model):
@@ -28,7 +32,7 @@ class DocumentFile(models.Model):
     Exemple d'utilisation : créer un Document, puis plusieurs DocumentFile liés à ce Document.
     """
     document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='fichiers')
-    fichier = models.FileField(upload_to='fichiers/')
+    fichier = models.FileField(upload_to='fichiers/', storage=documents_storage)
     nom = models.CharField(max_length=200, blank=True, null=True)
     date_ajout = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -37,3 +41,90 @@ class DocumentFile(models.Model):
     def __str__(self):
         return f"{self.nom or self.fichier.name} ({self.document.titre})"
 
+
+
+class Blob(models.Model):
+    """Fichier stocké une seule fois (documents.storage), compté par DocumentFile"""
+    name = models.CharField(max_length=255, primary_key=True)
+    taille = models.BigIntegerField()
+    refs = models.IntegerField(default=0)
+    date_creation = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refs} réf.)"
+
+
+class UploadSession(models.Model):
+    """Envoi découpé en morceaux d'un DocumentFile (init → PUT morceaux → finalize).
+
+    Les morceaux sont ajoutés à un fichier partiel sur disque ; `recu` est
+    l'offset atteint, ce qui permet de reprendre après une interruption.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='uploads')
+    nom = models.CharField(max_length=200, blank=True, null=True)
+    filename = models.CharField(max_length=200)
+    taille = models.BigIntegerField()
+    recu = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.recu}/{self.taille})"
+
+
+class PageTexte(models.Model):
+    """Texte extrait d'une page d'un PDF, compressé (zlib), indexé par recherche"""
+    document_file = models.ForeignKey(DocumentFile, on_delete=models.CASCADE, related_name='pages')
+    page = models.PositiveIntegerField()
+    texte = models.BinaryField()
+
+    class Meta:
+        unique_together = ('document_file', 'page')
+
+    def __str__(self):
+        return f"{self.document_file_id} p.{self.page}"
+
+    @staticmethod
+    def compresser(texte):
+        return zlib.compress(texte.encode('utf-8'), 6)
+
+    @staticmethod
+    def decompresser(data):
+        return zlib.decompress(bytes(data)).decode('utf-8')
+
+
+class ExtractionJob(models.Model):
+    """Tâche d'extraction de texte d'un DocumentFile (file d'attente en base).
+
+    Réclamée par un worker (`python manage.py run_extractions`) pour une
+    durée limitée (`verrou_jusqu_a`) : une tâche dont le worker a disparu
+    redevient disponible à l'expiration du verrou.
+    """
+    EN_ATTENTE = 'en_attente'
+    EN_COURS = 'en_cours'
+    TERMINE = 'termine'
+    ECHEC = 'echec'
+    ETAT_CHOICES = [
+        (EN_ATTENTE, 'En attente'),
+        (EN_COURS, 'En cours'),
+        (TERMINE, 'Terminé'),
+        (ECHEC, 'Échec'),
+    ]
+    document_file = models.OneToOneField(DocumentFile, on_delete=models.CASCADE, related_name='extraction')
+    etat = models.CharField(max_length=20, choices=ETAT_CHOICES, default=EN_ATTENTE)
+    tentatives = models.PositiveIntegerField(default=0)
+    prochain_essai = models.DateTimeField(null=True, blank=True)
+    verrou_jusqu_a = models.DateTimeField(null=True, blank=True)
+    erreur = models.TextField(blank=True, default='')
+    nb_pages = models.PositiveIntegerField(null=True, blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_maj = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['etat', 'prochain_essai'])]
+
+    def __str__(self):
+        return f"Extraction {self.document_file_id} ({self.etat})"
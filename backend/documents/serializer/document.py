@@ -1,8 +1,20 @@
 from rest_framework import serializers
-from documents.models import Document
+from core.fieldsets import SparseFieldsMixin, prefetch
+from documents.models import Document, DocumentFile
+from documents.serializer.document_file import DocumentFileSerializer
 
 
-class DocumentListSerializer(serializers.ModelSerializer):
+class DocumentListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # Fichiers du document sur demande : ?expand=fichiers
+    expandable = {
+        'fichiers': lambda selection: DocumentFileSerializer(many=True, read_only=True, selection=selection),
+    }
+    relations = {
+        'fichiers': prefetch('fichiers', lambda selection: DocumentFileSerializer.optimize(
+            DocumentFile.objects.order_by('id'), selection, extra=('document',),
+        )),
+    }
+
     class Meta:
         model = Document
         fields = [
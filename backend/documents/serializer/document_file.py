@@ -1,16 +1,27 @@
+from django.conf import settings
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin
+from documents.signing import sign_file
 from documents.models import DocumentFile
 
 
-class DocumentFileSerializer(serializers.ModelSerializer):
+class DocumentFileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     view_url = serializers.SerializerMethodField()
 
+    columns = {'view_url': ('id',)}
+
     class Meta:
         model = DocumentFile
         fields = ['id', 'nom', 'view_url']
 
     def get_view_url(self, obj):
         request = self.context.get('request')
+        if getattr(settings, 'DOCUMENTS_SIGNED_URLS', False):
+            # URL signée et temporaire : lue sans JWT ni requête en base
+            token = sign_file(obj)
+            return request.build_absolute_uri(
+                f"/api/documents/files/{obj.id}/signed/{token}/"
+            )
         return request.build_absolute_uri(
             f"/api/documents/files/{obj.id}/view/"
         )
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+from documents.models import UploadSession
+from documents.uploads import max_chunk_size, max_file_size
+
+
+class UploadSessionCreateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ['nom', 'filename', 'taille', 'sha256']
+
+    def validate_taille(self, taille):
+        if taille <= 0 or taille > max_file_size():
+            raise serializers.ValidationError("Taille de fichier invalide.")
+        return taille
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'nom', 'filename', 'taille', 'recu', 'chunk_size']
+        read_only_fields = fields
+
+    def get_chunk_size(self, obj):
+        return max_chunk_size()
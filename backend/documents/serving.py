@@ -0,0 +1,134 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def content_type_for(name):
+    """Type MIME déduit de l'extension du fichier"""
+    content_type, _ = mimetypes.guess_type(name)
+    return content_type or 'application/octet-stream'
+
+
+def parse_range(header, size):
+    """Analyse un en-tête Range à une seule plage.
+
+    Retourne (debut, fin) inclusifs, None si l'en-tête est absent ou non
+    géré (plusieurs plages, autre unité : on renvoie alors le fichier
+    entier), ou False si la plage est insatisfiable.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if start == '' and end == '':
+        return None
+
+    if start == '':
+        # bytes=-N : les N derniers octets
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _iter_range(fichier, start, length):
+    with fichier.open('rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            data = f.read(min(CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def _sendfile_response(fichier, mode):
+    """Délègue le transfert au serveur frontal (nginx / apache / lighttpd).
+
+    Le chemin est encodé en URL (accents, espaces des anciens noms de
+    fichiers) : nginx et mod_xsendfile le décodent avant de l'ouvrir.
+    """
+    response = HttpResponse()
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'DOCUMENTS_SENDFILE_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = quote(prefix.rstrip('/') + '/' + fichier.name)
+    else:
+        response['X-Sendfile'] = quote(fichier.path)
+    # Le serveur frontal fixe lui-même Content-Type et Content-Length
+    del response['Content-Type']
+    return response
+
+
+def serve_file(request, fichier, last_modified=None):
+    """Réponse de lecture inline d'un fichier, avec prise en charge de Range.
+
+    Selon settings.DOCUMENTS_SENDFILE ('x-accel-redirect', 'x-sendfile' ou
+    None), le transfert est délégué au serveur frontal ou fait par Django :
+    200 complet, 206 partiel ou 416 si la plage est insatisfiable.
+    """
+    mode = getattr(settings, 'DOCUMENTS_SENDFILE', None)
+    if mode:
+        response = _sendfile_response(fichier, mode)
+    else:
+        response = _django_response(request, fichier, last_modified)
+
+    response['Content-Disposition'] = 'inline'
+    response['X-Content-Type-Options'] = 'nosniff'
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def _django_response(request, fichier, last_modified):
+    size = fichier.size
+    content_type = content_type_for(fichier.name)
+
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+
+    # If-Range : la plage n'est valable que si le fichier n'a pas changé
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if byte_range and if_range:
+        if_range_date = parse_http_date_safe(if_range)
+        if last_modified is None or if_range_date is None or int(last_modified.timestamp()) > if_range_date:
+            byte_range = None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(fichier.open('rb'), content_type=content_type)
+        response['Content-Length'] = size
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    start, end = byte_range
+    length = end - start + 1
+    response = StreamingHttpResponse(
+        _iter_range(fichier, start, length),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Length'] = length
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
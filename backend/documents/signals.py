@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from documents import blobs, extraction
+from documents.models import DocumentFile
+
+
+# ============================================
+# COMPTAGE DES RÉFÉRENCES AUX BLOBS (documents.storage)
+# ============================================
+
+def _is_blob(name):
+    return blobs.storage().is_content_addressed(name)
+
+
+@receiver(pre_save, sender=DocumentFile)
+def document_file_memoriser_fichier(sender, instance, **kwargs):
+    instance._fichier_precedent = None
+    if instance.pk is not None:
+        instance._fichier_precedent = (
+            DocumentFile.objects.filter(pk=instance.pk).values_list('fichier', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=DocumentFile)
+def document_file_refs_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    precedent = getattr(instance, '_fichier_precedent', None)
+    name = instance.fichier.name
+    if name == precedent:
+        return
+    if _is_blob(name):
+        blobs.add_ref(name)
+    if _is_blob(precedent):
+        blobs.release(precedent)
+
+
+@receiver(post_delete, sender=DocumentFile)
+def document_file_refs_delete(sender, instance, **kwargs):
+    if _is_blob(instance.fichier.name):
+        blobs.release(instance.fichier.name)
+
+
+# ============================================
+# EXTRACTION DU TEXTE DES PDF (documents.extraction)
+# ============================================
+
+@receiver(post_save, sender=DocumentFile)
+def document_file_extraction(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    name = instance.fichier.name
+    if name == getattr(instance, '_fichier_precedent', None) or not extraction.is_pdf(name):
+        return
+    # Une ligne dans la file après le commit ; l'extraction tourne dans un worker
+    pk = instance.pk
+    transaction.on_commit(lambda: extraction.enqueue(pk))
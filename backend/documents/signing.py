@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core import signing
+
+
+SALT = 'documents.signed-file'
+
+
+def max_age():
+    return getattr(settings, 'DOCUMENTS_SIGNED_URL_MAX_AGE', 60)
+
+
+def expiration(now=None):
+    """Fin de validité alignée sur des fenêtres de max_age() secondes.
+
+    Les jetons d'un même fichier émis dans une fenêtre sont identiques :
+    même URL, donc réponse réutilisable par un CDN. Validité entre
+    max_age() et 2 × max_age().
+    """
+    window = max(max_age(), 1)
+    now = int(time.time() if now is None else now)
+    return (now // window + 2) * window
+
+
+def sign_file(doc_file):
+    """Jeton HMAC (SECRET_KEY) lié au fichier et à une expiration courte.
+
+    URL au porteur : lue sans authentification, elle donne accès au fichier
+    à quiconque la détient jusqu'à l'expiration (DOCUMENTS_SIGNED_URL_MAX_AGE).
+    Le jeton porte aussi le chemin de stockage : la vérification n'a besoin
+    d'aucune requête en base.
+    """
+    payload = {
+        'f': doc_file.id,
+        'n': doc_file.fichier.name,
+        'e': expiration(),
+    }
+    return signing.dumps(payload, salt=SALT, compress=True)
+
+
+def verify_token(token, file_id):
+    """Retourne le payload si le jeton est valide pour ce fichier, sinon None"""
+    try:
+        payload = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        return None
+    if payload.get('f') != file_id or payload.get('e', 0) < time.time():
+        return None
+    return payload
@@ -0,0 +1,84 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+
+
+CAS_PREFIX = 'fichiers/sha256/'
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stockage adressé par contenu : chaque fichier est rangé sous son SHA-256.
+
+    Le contenu est haché pendant sa copie vers un fichier temporaire (mémoire
+    constante), puis déplacé vers `fichiers/sha256/ab/cd/<sha256><ext>`.
+    Un contenu déjà présent n'est pas réécrit : les doublons partagent le
+    même fichier, compté par documents.models.Blob.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Le nom final dépend du contenu, calculé dans _save()
+        return name
+
+    def blob_name(self, digest, original_name):
+        ext = os.path.splitext(original_name)[1].lower()
+        return posixpath.join(CAS_PREFIX, digest[:2], digest[2:4], digest + ext)
+
+    def is_content_addressed(self, name):
+        return bool(name) and name.startswith(CAS_PREFIX)
+
+    def digest(self, content):
+        """SHA-256 d'un contenu, lu par blocs"""
+        digest = hashlib.sha256()
+        for chunk in self._chunks(content):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def _chunks(self, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        if hasattr(content, 'chunks'):
+            return content.chunks()
+        return iter(lambda: content.read(64 * 1024), b'')
+
+    def store(self, content, original_name):
+        """Hache et range `content` ; retourne (nom, taille, créé)"""
+        directory = self.path(CAS_PREFIX)
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in self._chunks(content):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            name = self.blob_name(digest.hexdigest(), original_name)
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(tmp_path)
+                return name, size, False
+
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+            return name, size, True
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _save(self, name, content):
+        stored_name, _, _ = self.store(content, name)
+        return stored_name
+
+
+def documents_storage():
+    """Stockage de DocumentFile.fichier (callable : gardé hors des migrations)"""
+    return ContentAddressedStorage()
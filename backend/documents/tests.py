@@ -1,3 +1,407 @@
-from django.test import TestCase
+import hashlib
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from academique.models import Cours
+from documents import extraction, signing, uploads
+from documents.models import Blob, Document, DocumentFile, ExtractionJob, PageTexte, UploadSession
+from users.models import User
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, DOCUMENTS_UPLOAD_DIR=f'{MEDIA_ROOT}-uploads')
+class DocumentsTestCase(TestCase):
+    """Base : un admin authentifié et un PDF de test"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(f'{MEDIA_ROOT}-uploads', ignore_errors=True)
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.cours = Cours.objects.create(titre='Cours', description='desc')
+        self.document = Document.objects.create(cours=self.cours, titre='Notes')
+        self.content = bytes(range(256)) * 40
+        self.doc_file = DocumentFile.objects.create(
+            document=self.document,
+            nom='notes',
+            fichier=SimpleUploadedFile('notes.pdf', self.content),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/documents/files/{self.doc_file.id}/view/'
+
+
+class ViewDocumentFileTests(DocumentsTestCase):
+
+    def test_full_response(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(int(response['Content-Length']), len(self.content))
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_range_returns_206(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(int(response['Content-Length']), 100)
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+    def test_suffix_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+    def test_unsatisfiable_range_returns_416(self):
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    @override_settings(DOCUMENTS_SENDFILE='x-accel-redirect')
+    def test_x_accel_redirect_offload(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            '/protected-media/' + self.doc_file.fichier.name,
+        )
+        self.assertEqual(response.content, b'')
+
+    def test_sendfile_headers_quote_legacy_names(self):
+        # Fichier antérieur au stockage adressé par contenu : nom d'origine
+        DocumentFile.objects.filter(pk=self.doc_file.pk).update(fichier="fichiers/Cours d'été.pdf")
+
+        with override_settings(DOCUMENTS_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/fichiers/Cours%20d%27%C3%A9t%C3%A9.pdf')
+
+        with override_settings(DOCUMENTS_SENDFILE='x-sendfile'):
+            response = self.client.get(self.url)
+        self.assertTrue(response['X-Sendfile'].endswith('/fichiers/Cours%20d%27%C3%A9t%C3%A9.pdf'))
+
+
+@override_settings(DOCUMENTS_SIGNED_URLS=True)
+class SignedDocumentFileTests(DocumentsTestCase):
+
+    def _signed_url(self):
+        response = self.client.get(f'/api/documents/{self.document.id}/files/')
+        self.assertEqual(response.status_code, 200)
+        return response.data[0]['view_url']
+
+    def test_signed_url_serves_without_queries_or_auth(self):
+        url = self._signed_url()
+        self.assertIn('/signed/', url)
+
+        anonymous = APIClient()
+        with self.assertNumQueries(0):
+            response = anonymous.get(url, HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[:10])
+        self.assertIn('public', response['Cache-Control'])
+        max_age = int(response['Cache-Control'].split('max-age=')[1].split(',')[0])
+        self.assertLessEqual(max_age, 2 * signing.max_age())
+        # Même fenêtre : même expiration, donc même URL, réutilisable par un CDN
+        debut = (int(time.time()) // signing.max_age()) * signing.max_age()
+        self.assertEqual(signing.expiration(debut), signing.expiration(debut + signing.max_age() - 1))
+
+    def test_tampered_or_foreign_token_is_rejected(self):
+        url = self._signed_url()
+        token = url.rstrip('/').rsplit('/', 1)[-1]
+
+        response = APIClient().get(url.replace(token, token[:-2] + 'xx'))
+        self.assertEqual(response.status_code, 404)
+
+        other = f'/api/documents/files/{self.doc_file.id + 1}/signed/{token}/'
+        self.assertEqual(APIClient().get(other).status_code, 404)
+
+    def test_expired_token_is_rejected(self):
+        url = self._signed_url()
+
+        with mock.patch('documents.signing.time.time', return_value=time.time() + 2 * signing.max_age() + 1):
+            response = APIClient().get(url)
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ChunkedUploadTests(DocumentsTestCase):
+
+    def _put(self, session_id, start, chunk, **extra):
+        return self.client.put(
+            f'/api/documents/uploads/{session_id}/',
+            data=chunk,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(chunk) - 1}/{len(self.content)}',
+            **extra,
+        )
+
+    def test_resumable_upload_creates_document_file(self):
+        response = self.client.post(f'/api/documents/{self.document.id}/uploads/', {
+            'nom': 'gros scan',
+            'filename': 'scan.pdf',
+            'taille': len(self.content),
+            'sha256': hashlib.sha256(self.content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        session_id = response.data['id']
+
+        first, second = self.content[:4000], self.content[4000:]
+        self.assertEqual(self._put(session_id, 0, first).data['recu'], 4000)
+
+        # Morceau corrompu : rejeté, l'offset ne bouge pas
+        response = self._put(session_id, 4000, second, HTTP_X_CHUNK_SHA256='0' * 64)
+        self.assertEqual(response.status_code, 422)
+
+        # Mauvais offset : 409 avec l'offset attendu pour reprendre
+        response = self._put(session_id, 0, first)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['recu'], 4000)
+
+        response = self._put(
+            session_id, 4000, second,
+            HTTP_X_CHUNK_SHA256=hashlib.sha256(second).hexdigest(),
+        )
+        self.assertEqual(response.data['recu'], len(self.content))
+
+        response = self.client.post(f'/api/documents/uploads/{session_id}/finalize/')
+        self.assertEqual(response.status_code, 201)
+
+        doc_file = DocumentFile.objects.get(id=response.data['id'])
+        self.assertEqual(doc_file.nom, 'gros scan')
+        with doc_file.fichier.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_finalize_rejects_incomplete_upload(self):
+        response = self.client.post(f'/api/documents/{self.document.id}/uploads/', {
+            'filename': 'scan.pdf', 'taille': len(self.content),
+        }, format='json')
+        session_id = response.data['id']
+        self._put(session_id, 0, self.content[:100])
+
+        response = self.client.post(f'/api/documents/uploads/{session_id}/finalize/')
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_upload_resumes_after_part_file_is_lost(self):
+        response = self.client.post(f'/api/documents/{self.document.id}/uploads/', {
+            'filename': 'scan.pdf', 'taille': len(self.content),
+        }, format='json')
+        session_id = response.data['id']
+        first, second = self.content[:4000], self.content[4000:]
+        self._put(session_id, 0, first)
+        uploads.part_path(UploadSession.objects.get(pk=session_id)).unlink()
+
+        response = self._put(session_id, 4000, second)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['recu'], 0)
+        self.assertEqual(UploadSession.objects.get(pk=session_id).recu, 0)
+
+        self.assertEqual(self._put(session_id, 0, first).data['recu'], 4000)
+        self.assertEqual(self._put(session_id, 4000, second).data['recu'], len(self.content))
+        self.assertEqual(self.client.post(f'/api/documents/uploads/{session_id}/finalize/').status_code, 201)
+
+    def test_second_finalize_and_lost_part_file_are_client_errors(self):
+        session = UploadSession.objects.create(
+            document=self.document, uploaded_by=self.admin, filename='scan.pdf',
+            taille=len(self.content), recu=len(self.content),
+        )
+        url = f'/api/documents/uploads/{session.id}/finalize/'
+
+        # Fichier partiel disparu (purge, disque) : pas de 500
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 409)
+
+        uploads.part_path(session).write_bytes(self.content)
+        self.assertEqual(self.client.post(url).status_code, 201)
+        # Session déjà finalisée par une requête concurrente
+        with self.assertRaises(uploads.UploadError) as ctx:
+            uploads.finalize(session)
+        self.assertEqual(ctx.exception.status, 404)
+        self.assertEqual(DocumentFile.objects.filter(document=self.document).count(), 2)
+
+
+class ContentAddressedStorageTests(DocumentsTestCase):
+
+    def _create(self, content, filename='copie.pdf'):
+        return DocumentFile.objects.create(
+            document=self.document,
+            fichier=SimpleUploadedFile(filename, content),
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        copy = self._create(self.content)
+
+        self.assertEqual(copy.fichier.name, self.doc_file.fichier.name)
+        self.assertTrue(copy.fichier.name.startswith('fichiers/sha256/'))
+        self.assertEqual(Blob.objects.get(name=copy.fichier.name).refs, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            copy.delete()
+        self.assertTrue(self.doc_file.fichier.storage.exists(self.doc_file.fichier.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doc_file.delete()
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(copy.fichier.storage.exists(copy.fichier.name))
+
+    def test_reupload_before_commit_keeps_the_file(self):
+        name = self.doc_file.fichier.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doc_file.delete()
+            # Même contenu envoyé avant le commit de la suppression
+            copy = self._create(self.content)
+
+        self.assertEqual(copy.fichier.name, name)
+        self.assertEqual(Blob.objects.get(name=name).refs, 1)
+        self.assertTrue(copy.fichier.storage.exists(name))
+
+    def test_dedupe_media_command_migrates_legacy_files(self):
+        legacy_storage = FileSystemStorage()
+        names = [legacy_storage.save(f'fichiers/legacy{i}.pdf', ContentFile(b'%PDF-same')) for i in range(2)]
+        legacy = [self._create(b'tmp' + bytes([i])) for i in range(2)]
+        for doc_file, name in zip(legacy, names):
+            DocumentFile.objects.filter(pk=doc_file.pk).update(fichier=name)
+
+        out = StringIO()
+        call_command('dedupe_media', stdout=out)
+
+        blob_names = set(DocumentFile.objects.filter(pk__in=[d.pk for d in legacy]).values_list('fichier', flat=True))
+        self.assertEqual(len(blob_names), 1)
+        self.assertEqual(Blob.objects.get(name=blob_names.pop()).refs, 2)
+        self.assertFalse(any(legacy_storage.exists(name) for name in names))
+        self.assertIn('Octets récupérés : 9', out.getvalue())
+
+
+class SparseFieldsetsTests(DocumentsTestCase):
+    """?fields= / ?expand= : champs, colonnes et préchargements à la demande"""
+
+    def test_course_detail_expands_documents_and_files(self):
+        url = f'/api/academique/cours/{self.cours.id}/?fields=id,documents.titre&expand=documents.fichiers'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+
+        self.assertEqual(response.data, {
+            'id': self.cours.id,
+            'documents': [{
+                'titre': 'Notes',
+                'fichiers': [{
+                    'id': self.doc_file.id, 'nom': 'notes',
+                    'view_url': f'http://testserver/api/documents/files/{self.doc_file.id}/view/',
+                }],
+            }],
+        })
+        # Cours, documents, fichiers : ni encadreurs ni promotions préchargés
+        sqls = [q['sql'] for q in ctx.captured_queries]
+        self.assertEqual(len(sqls), 3)
+        self.assertFalse(any('academique_cours_encadreurs' in sql for sql in sqls))
+        self.assertNotIn('"description"', sqls[0])
+
+    def test_documents_list_fields(self):
+        response = self.client.get(f'/api/cours/{self.cours.id}/documents/?fields=id,titre')
+
+        self.assertEqual(response.data, [{'id': self.document.id, 'titre': 'Notes'}])
+
+    def test_default_output_is_unchanged(self):
+        response = self.client.get(f'/api/academique/cours/{self.cours.id}/')
+
+        self.assertEqual(
+            set(response.data), {'id', 'titre', 'description', 'date_creation', 'encadreurs', 'promotions'},
+        )
+
+
+class ExtractionTests(DocumentsTestCase):
+    """Extraction du texte des PDF via la file ExtractionJob"""
+
+    def _upload(self, filename='cours.pdf', content=b'%PDF-1.4 cours'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return DocumentFile.objects.create(
+                document=self.document, nom='Cours magistral',
+                fichier=SimpleUploadedFile(filename, content),
+            )
+
+    def test_upload_only_enqueues(self):
+        doc_file = self._upload()
+        self._upload('image.png', b'png')
+
+        job = ExtractionJob.objects.get()
+        self.assertEqual((job.document_file_id, job.etat), (doc_file.id, ExtractionJob.EN_ATTENTE))
+        self.assertFalse(PageTexte.objects.exists())
+
+    def test_worker_stores_compressed_pages_and_indexes_them(self):
+        doc_file = self._upload()
+        pages = iter([(1, 'Introduction à la pharmacologie'), (2, '  '), (3, 'Posologie usuelle')])
+
+        with mock.patch.object(extraction, 'extract_pages', return_value=pages):
+            self.assertEqual(extraction.run_pending(), (1, 0))
+
+        job = ExtractionJob.objects.get()
+        self.assertEqual((job.etat, job.nb_pages), (ExtractionJob.TERMINE, 2))
+        page = PageTexte.objects.get(page=3)
+        self.assertEqual(PageTexte.decompresser(page.texte), 'Posologie usuelle')
+
+        response = self.client.get('/api/recherche/', {'q': 'posologie'})
+        result = response.data['results'][0]
+        self.assertEqual((result['type'], result['fichier'], result['page']), ('page', doc_file.id, 3))
+
+    @override_settings(EXTRACTION_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_with_backoff_then_abandoned(self):
+        self._upload()
+
+        with mock.patch.object(extraction, 'extract_pages', side_effect=OSError('disque')):
+            self.assertEqual(extraction.run_pending(), (0, 1))
+            job = ExtractionJob.objects.get()
+            self.assertEqual((job.etat, job.tentatives), (ExtractionJob.EN_ATTENTE, 1))
+            # Pas encore dû : le délai n'est pas écoulé
+            self.assertIsNone(extraction.claim())
+
+            ExtractionJob.objects.update(prochain_essai=None)
+            extraction.run_pending()
+
+        job.refresh_from_db()
+        self.assertEqual((job.etat, job.tentatives, job.erreur), (ExtractionJob.ECHEC, 2, 'disque'))
+
+    @override_settings(EXTRACTION_MAX_CONCURRENCY=1)
+    def test_claims_are_bounded(self):
+        self._upload('a.pdf', b'%PDF-a')
+        self._upload('b.pdf', b'%PDF-b')
+
+        self.assertIsNotNone(extraction.claim())
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertIsNone(extraction.claim())
+
+        # Décompte et réservation dans la même instruction UPDATE
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith('SELECT COUNT')])
+        self.assertTrue([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE') and 'COUNT' in q['sql']])
+
+    def test_backfill_enqueues_existing_pdfs(self):
+        out = StringIO()
+        call_command('backfill_extractions', stdout=out)
+
+        self.assertEqual(ExtractionJob.objects.get().document_file_id, self.doc_file.id)
+        self.assertIn('1 tâche', out.getvalue())
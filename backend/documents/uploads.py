@@ -0,0 +1,148 @@
+import hashlib
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from documents.models import DocumentFile, UploadSession
+
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """Erreur de protocole : `status` est le code HTTP à renvoyer.
+
+    `recu` : offset à enregistrer avant de répondre (fichier partiel perdu),
+    appliqué par `rewind` hors de la transaction annulée par l'erreur.
+    """
+
+    def __init__(self, detail, status=400, recu=None):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+        self.recu = recu
+
+
+def max_chunk_size():
+    return getattr(settings, 'DOCUMENTS_UPLOAD_MAX_CHUNK', 8 * 1024 * 1024)
+
+
+def max_file_size():
+    return getattr(settings, 'DOCUMENTS_UPLOAD_MAX_SIZE', 500 * 1024 * 1024)
+
+
+def part_path(session):
+    """Fichier partiel d'une session, dans DOCUMENTS_UPLOAD_DIR (hors de MEDIA_ROOT)"""
+    directory = Path(getattr(settings, 'DOCUMENTS_UPLOAD_DIR', None) or Path(settings.BASE_DIR) / 'uploads')
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f'{session.id}.part'
+
+
+def write_chunk(session, offset, length, stream, expected_sha256=None):
+    """Ajoute un morceau lu depuis `stream` à la position `offset`.
+
+    Le morceau est copié par blocs de 64 Ko (jamais entièrement en mémoire)
+    et son SHA-256 vérifié avant d'avancer l'offset. Un morceau corrompu
+    est retiré du fichier partiel : le client le renvoie tel quel.
+    """
+    if offset != session.recu:
+        raise UploadError(f"Offset attendu : {session.recu}", status=409)
+    if length <= 0 or length > max_chunk_size():
+        raise UploadError("Taille de morceau invalide", status=413)
+    if offset + length > session.taille:
+        raise UploadError("Le morceau dépasse la taille annoncée", status=416)
+
+    path = part_path(session)
+    present = path.stat().st_size if path.exists() else 0
+    if present < session.recu:
+        # Fichier partiel perdu ou tronqué : le client reprend plus tôt
+        raise UploadError(f"Offset attendu : {present}", status=409, recu=present)
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(path, 'ab') as f:
+        f.truncate(offset)
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                break
+            digest.update(data)
+            f.write(data)
+            written += len(data)
+
+        if written != length or (expected_sha256 and digest.hexdigest() != expected_sha256.lower()):
+            f.truncate(offset)
+            raise UploadError("Morceau incomplet ou somme SHA-256 invalide", status=422)
+
+    session.recu = offset + length
+    session.save(update_fields=['recu', 'date_maj'])
+    return session
+
+
+def rewind(session, recu):
+    """Ramène l'offset reçu à `recu` (jamais en avant), hors transaction d'écriture"""
+    UploadSession.objects.filter(pk=session.pk, recu__gt=recu).update(recu=recu, date_maj=timezone.now())
+    session.recu = recu
+    return session
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def finalize(session):
+    """Vérifie le fichier complet et crée le DocumentFile.
+
+    La session est verrouillée (select_for_update) : de deux finalisations
+    concurrentes, la seconde trouve la session supprimée et reçoit un 404.
+    Le fichier partiel est copié vers le stockage par blocs puis supprimé
+    après le commit.
+    """
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+        if session is None:
+            raise UploadError("Envoi introuvable", status=404)
+        if session.recu != session.taille:
+            raise UploadError(f"Envoi incomplet : {session.recu}/{session.taille}", status=409)
+
+        path = part_path(session)
+        try:
+            if session.sha256 and file_sha256(path) != session.sha256.lower():
+                raise UploadError("Somme SHA-256 du fichier invalide", status=422)
+
+            with open(path, 'rb') as f:
+                doc_file = DocumentFile(
+                    document=session.document,
+                    nom=session.nom,
+                    uploaded_by=session.uploaded_by,
+                )
+                doc_file.fichier.save(session.filename, File(f), save=False)
+        except FileNotFoundError:
+            raise UploadError("Fichier partiel introuvable : envoi à recommencer", status=409)
+
+        doc_file.save()
+        session.delete()
+        transaction.on_commit(lambda: path.unlink(missing_ok=True))
+
+    return doc_file
+
+
+def purge(max_age=timedelta(days=1)):
+    """Supprime les sessions abandonnées et leurs fichiers partiels"""
+    limit = timezone.now() - max_age
+    count = 0
+    for session in UploadSession.objects.filter(date_maj__lt=limit).iterator():
+        path = part_path(session)
+        if path.exists():
+            path.unlink()
+        session.delete()
+        count += 1
+    return count
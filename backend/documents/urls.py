@@ -1,8 +1,21 @@
 from django.urls import path
-from documents.views import documents_by_cours, document_files_list_create, view_document_file
+from documents.views import (
+    documents_by_cours,
+    document_files_list_create,
+    view_document_file,
+    view_signed_document_file,
+    upload_init,
+    upload_detail,
+    upload_finalize,
+)
 
 urlpatterns = [
     path('cours/<int:cours_id>/documents/', documents_by_cours),
     path('documents/<int:document_id>/files/', document_files_list_create),
     path('documents/files/<int:file_id>/view/', view_document_file),
+    path('documents/files/<int:file_id>/signed/<str:token>/', view_signed_document_file),
+    # Envoi découpé et reprenable
+    path('documents/<int:document_id>/uploads/', upload_init),
+    path('documents/uploads/<uuid:upload_id>/', upload_detail),
+    path('documents/uploads/<uuid:upload_id>/finalize/', upload_finalize),
 ]
@@ -1,10 +1,17 @@
-from django.http import FileResponse, Http404
+import re
+import time
+
+from django.db import transaction
+from django.http import Http404
+from django.views.decorators.http import require_safe
+from django.utils.cache import patch_cache_control
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from documents.models import DocumentFile
+from documents.models import DocumentFile, UploadSession
+from documents import uploads
 from rest_framework import status
-from academique.permissions import CoursPermission
+from academique.permissions import has_cours_access
 from documents.models import Document
 from documents.serializer.document import (
     DocumentListSerializer,
@@ -14,35 +21,54 @@ from documents.serializer.document_file import (
     DocumentFileCreateSerializer,
     DocumentFileSerializer
 )
+from documents.serializer.upload import (
+    UploadSessionCreateSerializer,
+    UploadSessionSerializer
+)
 from academique.models import Cours
+from core import batch
+from core.fieldsets import Selection
+from core.pagination import paginated_response
+from documents.serving import serve_file
+from documents.signing import verify_token
 
 
+@batch.hors_lot
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def view_document_file(request, file_id):
     try:
-        doc_file = DocumentFile.objects.select_related(
-            'document__cours'
-        ).get(id=file_id)
+        doc_file = DocumentFile.objects.select_related('document').get(id=file_id)
     except DocumentFile.DoesNotExist:
         raise Http404()
 
-    cours = doc_file.document.cours
-
     # réutilisation des permissions cours
-    permission = CoursPermission()
-    if not permission.has_object_permission(request, None, cours):
+    if not has_cours_access(request, doc_file.document.cours_id):
         return Response({"detail": "Accès interdit"}, status=403)
 
-    response = FileResponse(
-        doc_file.fichier.open('rb'),
-        content_type='application/pdf'  # adaptable
-    )
+    # 🔐 FORCE LECTURE INLINE, Range pris en charge (ou délégué au serveur frontal)
+    return serve_file(request, doc_file.fichier, last_modified=doc_file.date_ajout)
+
+
+@batch.hors_lot
+@require_safe
+def view_signed_document_file(request, file_id, token):
+    """Lecture d'un fichier via URL signée (documents.signing).
 
-    # 🔐 FORCE LECTURE INLINE
-    response['Content-Disposition'] = 'inline'
-    response['X-Content-Type-Options'] = 'nosniff'
+    Vue Django simple : pas d'authentification DRF, pas de requête en base.
+    Le jeton HMAC atteste que les permissions ont été vérifiées à l'émission.
+    """
+    payload = verify_token(token, file_id)
+    if payload is None:
+        raise Http404()
+
+    # Instance non sauvegardée : donne accès au stockage sans requête
+    fichier = DocumentFile(id=file_id, fichier=payload['n']).fichier
+    response = serve_file(request, fichier)
 
+    # L'URL est le secret : cache partagé (CDN) autorisé jusqu'à l'expiration du jeton
+    remaining = max(int(payload['e'] - time.time()), 0)
+    patch_cache_control(response, public=True, max_age=remaining)
     return response
 
 
@@ -55,15 +81,14 @@ def documents_by_cours(request, cours_id):
         return Response({"detail": "Cours introuvable"}, status=404)
 
     # 🔐 Permission sur le cours
-    permission = CoursPermission()
-    if not permission.has_object_permission(request, None, cours):
+    if not has_cours_access(request, cours.id):
         return Response({"detail": "Accès interdit"}, status=403)
 
     # 📄 LIST
     if request.method == 'GET':
         docs = Document.objects.filter(cours=cours)
-        serializer = DocumentListSerializer(docs, many=True)
-        return Response(serializer.data)
+        # context : URLs des fichiers avec ?expand=fichiers
+        return paginated_response(request, docs, DocumentListSerializer, context={'request': request})
 
     # ➕ CREATE
     if request.method == 'POST':
@@ -83,15 +108,13 @@ def document_files_list_create(request, document_id):
     except Document.DoesNotExist:
         return Response({"detail": "Document introuvable"}, status=404)
 
-    cours = document.cours
-
-    permission = CoursPermission()
-    if not permission.has_object_permission(request, None, cours):
+    if not has_cours_access(request, document.cours_id):
         return Response({"detail": "Accès interdit"}, status=403)
 
     if request.method == 'GET':
-        files = DocumentFile.objects.filter(document=document)
-        serializer = DocumentFileSerializer(files, many=True, context={'request': request})
+        selection = Selection.from_request(request)
+        files = DocumentFileSerializer.optimize(DocumentFile.objects.filter(document=document), selection)
+        serializer = DocumentFileSerializer(files, many=True, selection=selection, context={'request': request})
         return Response(serializer.data)
 
     # POST - création
@@ -102,3 +125,97 @@ def document_files_list_create(request, document_id):
 
     return Response(serializer.errors, status=400)
 
+
+
+# ============================================
+# ENVOI DÉCOUPÉ (init → PUT morceaux → finalize)
+# ============================================
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+def _get_upload_session(request, upload_id):
+    # Une session n'est visible que par celui qui l'a ouverte
+    return UploadSession.objects.select_related('document').filter(
+        id=upload_id, uploaded_by_id=request.user.id
+    ).first()
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_init(request, document_id):
+    try:
+        document = Document.objects.get(id=document_id)
+    except Document.DoesNotExist:
+        return Response({"detail": "Document introuvable"}, status=404)
+
+    if not has_cours_access(request, document.cours_id):
+        return Response({"detail": "Accès interdit"}, status=403)
+
+    serializer = UploadSessionCreateSerializer(data=request.data)
+    if serializer.is_valid():
+        session = serializer.save(document=document, uploaded_by=request.user)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    return Response(serializer.errors, status=400)
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_detail(request, upload_id):
+    """GET : état (offset reçu) pour reprendre
+    PUT : ajoute un morceau (corps brut, en-tête Content-Range, X-Chunk-SHA256 optionnel)
+    DELETE : abandonne l'envoi"""
+    session = _get_upload_session(request, upload_id)
+    if session is None:
+        return Response({"detail": "Envoi introuvable"}, status=404)
+
+    if request.method == 'GET':
+        return Response(UploadSessionSerializer(session).data)
+
+    if request.method == 'DELETE':
+        path = uploads.part_path(session)
+        if path.exists():
+            path.unlink()
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    # PUT - le corps n'est jamais parsé par DRF, il est lu en flux
+    match = CONTENT_RANGE_RE.match(request.headers.get('Content-Range', ''))
+    if not match:
+        return Response({"detail": "En-tête Content-Range requis"}, status=400)
+    start, end = int(match.group(1)), int(match.group(2))
+    length = int(request.META.get('CONTENT_LENGTH') or 0)
+    if end - start + 1 != length:
+        return Response({"detail": "Content-Range et Content-Length incohérents"}, status=400)
+
+    try:
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            uploads.write_chunk(
+                session, start, length, request.stream,
+                expected_sha256=request.headers.get('X-Chunk-SHA256'),
+            )
+    except uploads.UploadError as e:
+        if e.recu is not None:
+            # Après l'annulation de la transaction : l'offset reculé est conservé
+            uploads.rewind(session, e.recu)
+        return Response({"detail": e.detail, "recu": session.recu}, status=e.status)
+
+    return Response(UploadSessionSerializer(session).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_finalize(request, upload_id):
+    session = _get_upload_session(request, upload_id)
+    if session is None:
+        return Response({"detail": "Envoi introuvable"}, status=404)
+
+    try:
+        doc_file = uploads.finalize(session)
+    except uploads.UploadError as e:
+        return Response({"detail": e.detail, "recu": session.recu}, status=e.status)
+
+    serializer = DocumentFileSerializer(doc_file, context={'request': request})
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
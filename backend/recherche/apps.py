@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class RechercheConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'recherche'
+
+    def ready(self):
+        from recherche import signals  # noqa: F401
@@ -0,0 +1,200 @@
+import re
+from collections import namedtuple
+
+from django.db import connection
+
+
+# Une ligne de l'index : `cours_id` sert au filtrage par promotion
+Entree = namedtuple('Entree', ['kind', 'obj_id', 'cours_id', 'titre', 'corps'])
+
+KINDS = ('cours', 'document', 'fichier', 'page')
+MAX_TERMS = 10
+
+
+def terms(query):
+    """Mots de la requête utilisateur, sans aucune syntaxe du moteur"""
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+class SearchBackend:
+    """Interface commune des index plein texte.
+
+    `search` renvoie des résultats classés (meilleur d'abord), déjà
+    restreints aux cours de `promotion_id` quand il est fourni.
+    """
+
+    def create_schema(self, cursor):
+        raise NotImplementedError
+
+    def drop_schema(self, cursor):
+        raise NotImplementedError
+
+    def upsert(self, entrees):
+        raise NotImplementedError
+
+    def delete(self, kind, obj_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, kinds=KINDS, promotion_id=None, limit=20):
+        raise NotImplementedError
+
+    def _filters(self, kinds, promotion_id):
+        sql, params = [], []
+        if set(kinds) != set(KINDS):
+            sql.append(f'kind IN ({_placeholders(kinds)})')
+            params.extend(kinds)
+        if promotion_id is not None:
+            sql.append(
+                'cours_id IN (SELECT cours_id FROM academique_cours_promotions WHERE promotion_id = %s)'
+            )
+            params.append(promotion_id)
+        return ''.join(f' AND {clause}' for clause in sql), params
+
+    def _rows(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                {'type': kind, 'id': obj_id, 'cours': cours_id, 'titre': titre, 'score': round(score, 4)}
+                for kind, obj_id, cours_id, titre, score in cursor.fetchall()
+            ]
+
+
+class SQLiteFTS5Backend(SearchBackend):
+    """Table virtuelle FTS5, classement bm25 (titre pondéré ×10).
+
+    rowid = obj_id × 8 + code du type : mise à jour et suppression par
+    clé primaire, sans parcourir les colonnes non indexées.
+    """
+    table = 'recherche_fts'
+    codes = {'cours': 1, 'document': 2, 'fichier': 3, 'page': 4}
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            "kind UNINDEXED, obj_id UNINDEXED, cours_id UNINDEXED, titre, corps, "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _rowid(self, kind, obj_id):
+        return obj_id * 8 + self.codes[kind]
+
+    def upsert(self, entrees):
+        if not entrees:
+            return
+        with connection.cursor() as cursor:
+            rowids = [self._rowid(e.kind, e.obj_id) for e in entrees]
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({_placeholders(rowids)})', rowids)
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, kind, obj_id, cours_id, titre, corps) '
+                'VALUES (%s, %s, %s, %s, %s, %s)',
+                [(rowid, *entree) for rowid, entree in zip(rowids, entrees)],
+            )
+
+    def delete(self, kind, obj_ids):
+        rowids = [self._rowid(kind, obj_id) for obj_id in obj_ids]
+        if rowids:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({_placeholders(rowids)})', rowids)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search(self, query, kinds=KINDS, promotion_id=None, limit=20):
+        words = terms(query)
+        if not words:
+            return []
+        # Chaque mot entre guillemets (pas d'opérateur FTS5), en préfixe, tous requis
+        match = ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+        filters, params = self._filters(kinds, promotion_id)
+        return self._rows(
+            f'SELECT kind, obj_id, cours_id, titre, -bm25({self.table}, 0, 0, 0, 10.0, 1.0) AS score '
+            f'FROM {self.table} WHERE {self.table} MATCH %s{filters} '
+            'ORDER BY score DESC LIMIT %s',
+            [match, *params, limit],
+        )
+
+
+class PostgresBackend(SearchBackend):
+    """Table avec colonne tsvector générée (titre poids A, corps poids B) et index GIN"""
+    table = 'recherche_index'
+    config = 'french'
+
+    def create_schema(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'kind varchar(20) NOT NULL, obj_id integer NOT NULL, cours_id integer, '
+            "titre text NOT NULL DEFAULT '', corps text NOT NULL DEFAULT '', "
+            f"vecteur tsvector GENERATED ALWAYS AS ("
+            f"setweight(to_tsvector('{self.config}', titre), 'A') || "
+            f"setweight(to_tsvector('{self.config}', corps), 'B')) STORED, "
+            'PRIMARY KEY (kind, obj_id))'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.table}_vecteur ON {self.table} USING GIN (vecteur)'
+        )
+
+    def drop_schema(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def upsert(self, entrees):
+        if not entrees:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {self.table} (kind, obj_id, cours_id, titre, corps) '
+                'VALUES (%s, %s, %s, %s, %s) ON CONFLICT (kind, obj_id) DO UPDATE SET '
+                'cours_id = EXCLUDED.cours_id, titre = EXCLUDED.titre, corps = EXCLUDED.corps',
+                [tuple(entree) for entree in entrees],
+            )
+
+    def delete(self, kind, obj_ids):
+        obj_ids = list(obj_ids)
+        if obj_ids:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {self.table} WHERE kind = %s AND obj_id = ANY(%s)', [kind, obj_ids]
+                )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+
+    def search(self, query, kinds=KINDS, promotion_id=None, limit=20):
+        words = terms(query)
+        if not words:
+            return []
+        tsquery = ' & '.join(f'{word}:*' for word in words)
+        filters, params = self._filters(kinds, promotion_id)
+        return self._rows(
+            f'SELECT kind, obj_id, cours_id, titre, ts_rank(vecteur, q) AS score '
+            f"FROM {self.table}, to_tsquery('{self.config}', %s) AS q "
+            f'WHERE vecteur @@ q{filters} ORDER BY score DESC LIMIT %s',
+            [tsquery, *params, limit],
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresBackend,
+}
+
+
+def backend_for(vendor):
+    backend_class = BACKENDS.get(vendor)
+    return backend_class() if backend_class else None
+
+
+def get_backend():
+    """Index du moteur de la base par défaut, None si non pris en charge"""
+    return backend_for(connection.vendor)
@@ -0,0 +1,94 @@
+import os
+
+from academique.models import Cours
+from documents.models import Document, DocumentFile, PageTexte
+from recherche.backends import Entree, get_backend
+
+
+BATCH_SIZE = 500
+
+
+def entree_cours(cours):
+    return Entree('cours', cours.id, cours.id, cours.titre, cours.description or '')
+
+
+def entree_document(document):
+    return Entree(
+        'document', document.id, document.cours_id, document.titre, document.get_categorie_display(),
+    )
+
+
+def entree_fichier(doc_file, cours_id):
+    titre = doc_file.nom or os.path.basename(doc_file.fichier.name)
+    return Entree('fichier', doc_file.id, cours_id, titre, '')
+
+
+def entree_page(page_id, page, texte, titre_fichier, cours_id):
+    # Texte extrait des PDF (documents.extraction), une entrée par page
+    return Entree('page', page_id, cours_id, f'{titre_fichier} — p. {page}', texte)
+
+
+def indexer(*entrees):
+    backend = get_backend()
+    if backend is not None:
+        backend.upsert(list(entrees))
+
+
+def retirer(kind, *obj_ids):
+    backend = get_backend()
+    if backend is not None:
+        backend.delete(kind, obj_ids)
+
+
+def fichiers_du_document(document):
+    """Entrées des fichiers d'un document et de leurs pages (après changement de cours)"""
+    entrees = [
+        entree_fichier(doc_file, document.cours_id)
+        for doc_file in DocumentFile.objects.filter(document=document).only('id', 'nom', 'fichier')
+    ]
+    pages = PageTexte.objects.filter(document_file__document=document).values_list(
+        'id', 'page', 'texte', 'document_file__nom', 'document_file__fichier',
+    )
+    for page_id, page, texte, nom, fichier in pages.iterator(chunk_size=BATCH_SIZE):
+        entrees.append(entree_page(page_id, page, PageTexte.decompresser(texte), nom or os.path.basename(fichier), document.cours_id))
+    return entrees
+
+
+def _batches(iterable):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def reconstruire():
+    """Vide et reconstruit tout l'index depuis les tables de base (backfill)"""
+    backend = get_backend()
+    if backend is None:
+        return 0
+    backend.clear()
+
+    def sources():
+        for row in Cours.objects.only('id', 'titre', 'description').iterator(chunk_size=BATCH_SIZE):
+            yield entree_cours(row)
+        for row in Document.objects.only('id', 'cours_id', 'titre', 'categorie').iterator(chunk_size=BATCH_SIZE):
+            yield entree_document(row)
+        fichiers = DocumentFile.objects.values_list('id', 'nom', 'fichier', 'document__cours_id')
+        for file_id, nom, fichier, cours_id in fichiers.iterator(chunk_size=BATCH_SIZE):
+            yield Entree('fichier', file_id, cours_id, nom or os.path.basename(fichier), '')
+        pages = PageTexte.objects.values_list(
+            'id', 'page', 'texte', 'document_file__nom', 'document_file__fichier',
+            'document_file__document__cours_id',
+        )
+        for page_id, page, texte, nom, fichier, cours_id in pages.iterator(chunk_size=BATCH_SIZE):
+            yield entree_page(page_id, page, PageTexte.decompresser(texte), nom or os.path.basename(fichier), cours_id)
+
+    total = 0
+    for batch in _batches(sources()):
+        backend.upsert(batch)
+        total += len(batch)
+    return total
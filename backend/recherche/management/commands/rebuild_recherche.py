@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recherche import index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte (cours, documents, fichiers) depuis les tables de base"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = index.reconstruire()
+        self.stdout.write(self.style.SUCCESS(f"{total} entrée(s) indexée(s)"))
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+from recherche.backends import backend_for
+
+
+def creer_index(apps, schema_editor):
+    backend = backend_for(schema_editor.connection.vendor)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.create_schema(cursor)
+
+
+def supprimer_index(apps, schema_editor):
+    backend = backend_for(schema_editor.connection.vendor)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop_schema(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academique', '0008_statmensuelle'),
+        ('documents', '0004_blob_documentfile_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
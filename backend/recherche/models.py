@@ -0,0 +1,5 @@
+from django.db import models
+
+# Pas de modèle : l'index plein texte est une table propre au moteur
+# (FTS5 sous SQLite, tsvector + GIN sous PostgreSQL), créée par la
+# migration 0001 et manipulée par recherche.backends.
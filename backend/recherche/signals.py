@@ -0,0 +1,64 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from academique.models import Cours
+from documents.models import Document, DocumentFile, PageTexte
+from recherche import index
+
+
+# ============================================
+# SYNCHRONISATION DE L'INDEX PLEIN TEXTE
+# ============================================
+
+@receiver(post_save, sender=Cours)
+def cours_indexer(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index.indexer(index.entree_cours(instance))
+
+
+@receiver(post_delete, sender=Cours)
+def cours_retirer(sender, instance, **kwargs):
+    # Documents et fichiers suivent via leur propre post_delete (cascade)
+    index.retirer('cours', instance.pk)
+
+
+@receiver(pre_save, sender=Document)
+def document_memoriser_cours(sender, instance, **kwargs):
+    instance._cours_precedent = None
+    if instance.pk is not None:
+        instance._cours_precedent = (
+            Document.objects.filter(pk=instance.pk).values_list('cours_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Document)
+def document_indexer(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    entrees = [index.entree_document(instance)]
+    precedent = getattr(instance, '_cours_precedent', None)
+    if not created and precedent != instance.cours_id:
+        # Les fichiers portent le cours pour le filtrage par promotion
+        entrees.extend(index.fichiers_du_document(instance))
+    index.indexer(*entrees)
+
+
+@receiver(post_delete, sender=Document)
+def document_retirer(sender, instance, **kwargs):
+    index.retirer('document', instance.pk)
+
+
+@receiver(post_save, sender=DocumentFile)
+def document_file_indexer(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index.indexer(index.entree_fichier(instance, instance.document.cours_id))
+
+
+@receiver(post_delete, sender=DocumentFile)
+def document_file_retirer(sender, instance, **kwargs):
+    index.retirer('fichier', instance.pk)
+
+
+@receiver(post_delete, sender=PageTexte)
+def page_retirer(sender, instance, **kwargs):
+    index.retirer('page', instance.pk)
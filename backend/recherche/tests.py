@@ -0,0 +1,84 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from academique.models import Cours, Promotion
+from documents.models import Document, DocumentFile
+from recherche import index
+from recherche.backends import get_backend
+from users.models import User
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class RechercheTests(TestCase):
+    """Index plein texte tenu à jour par signaux, filtré par promotion"""
+
+    url = '/api/recherche/'
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.b1 = Promotion.objects.create(name='B1', annee=2025)
+        self.b2 = Promotion.objects.create(name='B2', annee=2025)
+        self.anatomie = Cours.objects.create(titre='Anatomie générale', description='Os et muscles')
+        self.anatomie.promotions.add(self.b1)
+        self.biochimie = Cours.objects.create(titre='Biochimie', description="Métabolisme et anatomie cellulaire")
+        self.biochimie.promotions.add(self.b2)
+        self.document = Document.objects.create(cours=self.anatomie, titre='Squelette axial', categorie='resume')
+        self.doc_file = DocumentFile.objects.create(
+            document=self.document, nom='Planches du crâne', fichier=ContentFile(b'%PDF', name='crane.pdf'),
+        )
+        self.etudiant = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT', promotion=self.b1,
+        )
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        self.client = APIClient()
+
+    def _search(self, user, q, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(r['type'], r['id']) for r in response.data['results']]
+
+    def test_title_match_ranks_first_and_accents_are_ignored(self):
+        results = self._search(self.admin, 'anatomie')
+
+        self.assertEqual(results, [('cours', self.anatomie.id), ('cours', self.biochimie.id)])
+        self.assertEqual(self._search(self.admin, 'crane'), [('fichier', self.doc_file.id)])
+
+    def test_student_only_sees_own_promotion(self):
+        self.assertEqual(self._search(self.etudiant, 'anatomie'), [('cours', self.anatomie.id)])
+        self.assertEqual(self._search(self.etudiant, 'métabolisme'), [])
+
+    def test_signals_keep_index_in_sync(self):
+        self.document.titre = 'Membre supérieur'
+        self.document.cours = self.biochimie
+        self.document.save()
+        self.assertEqual(self._search(self.admin, 'squelette'), [])
+        # Le fichier suit le document dans la promotion du nouveau cours
+        self.assertEqual(self._search(self.etudiant, 'planches'), [])
+
+        self.biochimie.delete()
+        self.assertEqual(self._search(self.admin, 'membre', type='document'), [])
+
+    def test_rebuild_restores_index(self):
+        get_backend().clear()
+
+        self.assertEqual(index.reconstruire(), 4)
+        self.assertEqual(self._search(self.admin, 'resum'), [('document', self.document.id)])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self._search(self.admin, 'anat" OR *'), [])
@@ -0,0 +1,6 @@
+from django.urls import path
+from recherche.views import recherche
+
+urlpatterns = [
+    path('', recherche),
+]
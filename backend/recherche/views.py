@@ -0,0 +1,61 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from academique import acces
+from documents.models import PageTexte
+from recherche.backends import KINDS, get_backend
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recherche(request):
+    """Recherche plein texte dans les cours, documents et fichiers
+    Paramètres :
+    - `q` : texte recherché (chaque mot est un préfixe, tous requis)
+    - `type` : cours, document, fichier, page (séparés par des virgules, tous par défaut)
+    - `limit` : nombre de résultats (20 par défaut, 50 max)
+    Un étudiant ne voit que les cours de sa promotion."""
+    query = request.query_params.get('q', '').strip()
+    if len(query) < 2:
+        return Response({"detail": "Requête trop courte"}, status=status.HTTP_400_BAD_REQUEST)
+
+    kinds = [k for k in request.query_params.get('type', '').split(',') if k] or list(KINDS)
+    if not set(kinds) <= set(KINDS):
+        return Response({"detail": "Type inconnu"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+    except ValueError:
+        return Response({"detail": "Paramètres invalides"}, status=status.HTTP_400_BAD_REQUEST)
+
+    backend = get_backend()
+    if backend is None:
+        return Response({"detail": "Recherche indisponible"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    user = request.user
+    promotion_id = None
+    if user.role == 'ETUDIANT':
+        # Même règle que CoursPermission en lecture ; sans promotion, aucun cours
+        promotion_id = user.promotion_id or 0
+
+    results = backend.search(query, kinds=kinds, promotion_id=promotion_id, limit=limit)
+    # Le filtre SQL remplit `limit` de résultats visibles ; les droits font foi,
+    # relus pour tous les cours en un appel
+    permis = acces.accessible_cours(user, {r['cours'] for r in results if r['cours']})
+    results = [r for r in results if r['cours'] is None or r['cours'] in permis]
+
+    # Pages de PDF : fichier et numéro de page pour ouvrir au bon endroit
+    page_ids = [r['id'] for r in results if r['type'] == 'page']
+    if page_ids:
+        pages = {
+            page_id: (file_id, page)
+            for page_id, file_id, page in PageTexte.objects.filter(id__in=page_ids).values_list(
+                'id', 'document_file_id', 'page'
+            )
+        }
+        for result in results:
+            if result['type'] == 'page' and result['id'] in pages:
+                result['fichier'], result['page'] = pages[result['id']]
+
+    return Response({'results': results})
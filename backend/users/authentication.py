@@ -1,9 +1,148 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
 from django.conf import settings
+from django.utils.functional import cached_property
+
 
+class UserCache:
+    """Cache LRU borné avec TTL des utilisateurs résolus depuis un JWT.
 
-class CookieJWTAuthentication(JWTAuthentication):
+    Clé : (user_id, jti ou iat du jeton). Partagé par toutes les classes
+    d'authentification du processus, vidé pour un utilisateur à chaque
+    save/delete (users.signals). Le TTL borne le retard entre processus.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, user)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            user_id = str(user_id)
+            for key in [key for key in self._data if key[0] == user_id]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_cache = UserCache(
+    maxsize=getattr(settings, 'JWT_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 60),
+)
+
+
+def token_cache_key(validated_token):
+    # simplejwt stocke l'identifiant en texte dans le jeton
+    user_id = str(validated_token.get(api_settings.USER_ID_CLAIM))
+    return (user_id, validated_token.get(api_settings.JTI_CLAIM) or validated_token.get('iat'))
+
+
+class ClaimsUser(TokenUser):
+    """Utilisateur reconstruit depuis les claims signés du jeton (mode sans état).
+
+    `role` et `promotion_id` viennent du jeton : les chemins de lecture
+    autorisent sans lire la table users. Tout autre attribut charge le
+    vrai User (via le cache) à la première utilisation.
+    """
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def promotion_id(self):
+        return self.token.get('promotion_id')
+
+    @cached_property
+    def promotion(self):
+        from academique.models import Promotion
+        if self.promotion_id is None:
+            return None
+        return Promotion.objects.filter(pk=self.promotion_id).first()
+
+    @cached_property
+    def _user(self):
+        return CachedJWTAuthentication().get_cached_user(self.token)
+
+    def __getattr__(self, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(self._user, attr)
+
+
+class CachedUserMixin:
+    """Résolution jeton → utilisateur via user_cache, sans SELECT à chaque requête"""
+
+    def get_cached_user(self, validated_token):
+        key = token_cache_key(validated_token)
+        user = user_cache.get(key)
+        if user is None:
+            user = JWTAuthentication.get_user(self, validated_token)
+            user_cache.set(key, user)
+        # Copie : une vue qui modifie request.user ne touche pas l'entrée partagée
+        return copy.copy(user)
+
+    def resolve_user(self, request, validated_token):
+        if request.method not in SAFE_METHODS:
+            # Écritures : toujours l'état courant de la base
+            return JWTAuthentication.get_user(self, validated_token)
+        if getattr(settings, 'JWT_STATELESS_USER', False) and 'role' in validated_token:
+            return ClaimsUser(validated_token)
+        return self.get_cached_user(validated_token)
+
+
+class CachedJWTAuthentication(CachedUserMixin, JWTAuthentication):
+    """JWTAuthentication (en-tête Authorization) avec le cache des utilisateurs"""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return self.resolve_user(request, validated_token), validated_token
+
+
+class CookieJWTAuthentication(CachedUserMixin, JWTAuthentication):
     """
     Classe d'authentification pour lire le JWT depuis les cookies
     Fallback sur l'en-tête Authorization si pas de cookie
@@ -12,8 +151,12 @@ class CookieJWTAuthentication(JWTAuthentication):
         # D'abord, vérifier l'en-tête Authorization standard
         header = self.get_header(request)
         if header is not None:
-            return super().authenticate(request)
-        
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+            validated_token = self.get_validated_token(raw_token)
+            return self.resolve_user(request, validated_token), validated_token
+
         # Ensuite, vérifier le cookie access_token
         access_token = request.COOKIES.get(
             settings.SIMPLE_JWT.get("AUTH_COOKIE", "access_token")
@@ -21,9 +164,9 @@ class CookieJWTAuthentication(JWTAuthentication):
 
         if access_token is None:
             return None  # Pas d'authentification trouvée, laisser d'autres authentificateurs essayer
-        
+
         try:
             validated_token = self.get_validated_token(access_token)
-            return (self.get_user(validated_token), validated_token)
+            return (self.resolve_user(request, validated_token), validated_token)
         except AuthenticationFailed as e:
             raise AuthenticationFailed(str(e))
@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from rest_framework.throttling import BaseThrottle
+
+
+class LoginSaturated(Exception):
+    """Trop de vérifications de mot de passe en cours sur ce processus"""
+
+
+class FailureCounter:
+    """Compteur d'échecs compact : count-min sketch sur deux fenêtres glissantes.
+
+    Mémoire fixe (depth × width entiers par fenêtre) quel que soit le nombre
+    de comptes ou d'IP vus. Peut surestimer, jamais sous-estimer.
+    """
+
+    def __init__(self, width=4096, depth=4, window=900):
+        self.width = width
+        self.depth = depth
+        self.window = window
+        self._lock = threading.Lock()
+        self._current = self._empty()
+        self._previous = self._empty()
+        self._started = time.monotonic()
+
+    def _empty(self):
+        return [[0] * self.width for _ in range(self.depth)]
+
+    def _indexes(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return [
+            int.from_bytes(digest[4 * i:4 * i + 4], 'little') % self.width
+            for i in range(self.depth)
+        ]
+
+    def _rotate(self):
+        elapsed = time.monotonic() - self._started
+        if elapsed < self.window:
+            return
+        self._previous = self._current if elapsed < 2 * self.window else self._empty()
+        self._current = self._empty()
+        self._started = time.monotonic()
+
+    def add(self, key):
+        with self._lock:
+            self._rotate()
+            for row, index in zip(self._current, self._indexes(key)):
+                row[index] += 1
+
+    def count(self, key):
+        with self._lock:
+            self._rotate()
+            indexes = self._indexes(key)
+            return min(
+                current[i] + previous[i]
+                for current, previous, i in zip(self._current, self._previous, indexes)
+            )
+
+    def reset(self, key):
+        """Oublie les échecs de `key` : chaque case perd l'estimation de la clé.
+
+        Une autre clé ne peut être sous-estimée que si elle partage les
+        `depth` cases de `key`.
+        """
+        with self._lock:
+            self._rotate()
+            indexes = self._indexes(key)
+            estimate = min(
+                current[i] + previous[i]
+                for current, previous, i in zip(self._current, self._previous, indexes)
+            )
+            for current, previous, i in zip(self._current, self._previous, indexes):
+                removed = min(current[i], estimate)
+                current[i] -= removed
+                previous[i] -= min(previous[i], estimate - removed)
+
+    def clear(self):
+        with self._lock:
+            self._current = self._empty()
+            self._previous = self._empty()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+failures = FailureCounter(window=_setting('LOGIN_FAILURE_WINDOW', 900))
+
+# Hachages en cours sur ce processus : au-delà, refus immédiat plutôt
+# qu'une file de threads bloqués pendant la rafale de connexions
+_slots = threading.BoundedSemaphore(_setting('LOGIN_MAX_CONCURRENT', 4))
+
+
+def client_ip(request):
+    """Adresse du client : X-Forwarded-For seulement derrière NUM_PROXIES proxys de confiance"""
+    return BaseThrottle().get_ident(request)
+
+
+def account_ip_key(email, request):
+    # Par (compte, IP) : un tiers ne peut pas bloquer un compte depuis son adresse
+    return f"account:{(email or '').strip().lower()}|ip:{client_ip(request)}"
+
+
+def ip_key(request):
+    return 'ip:' + client_ip(request)
+
+
+def is_throttled(email, request):
+    """Trop d'échecs récents pour ce compte depuis cette IP, ou pour cette IP : refuser avant tout hachage"""
+    return (
+        failures.count(account_ip_key(email, request)) >= _setting('LOGIN_MAX_FAILURES_PER_ACCOUNT', 5)
+        or failures.count(ip_key(request)) >= _setting('LOGIN_MAX_FAILURES_PER_IP', 200)
+    )
+
+
+def record_failure(email, request):
+    failures.add(account_ip_key(email, request))
+    failures.add(ip_key(request))
+
+
+def record_success(email, request):
+    # Les échecs du propriétaire avant sa connexion ne comptent plus
+    failures.reset(account_ip_key(email, request))
+
+
+def check_credentials(request, email, password):
+    """Vérifie email/mot de passe par authenticate(), au plus LOGIN_MAX_CONCURRENT à la fois.
+
+    AUTHENTICATION_BACKENDS, le signal user_login_failed, le hachage factice
+    des emails inconnus et la mise à niveau du hash restent ceux de Django.
+    Lève LoginSaturated si toutes les places sont prises.
+    """
+    if not _slots.acquire(blocking=False):
+        raise LoginSaturated()
+    try:
+        return authenticate(request, username=email, password=password)
+    finally:
+        _slots.release()
@@ -34,5 +34,17 @@ class User(AbstractBaseUser, PermissionsMixin) :
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Rôle et promotion tels que chargés : comparés à la sauvegarde sans relire la base
+        if 'role' in instance.__dict__ and 'promotion_id' in instance.__dict__:
+            instance._etat_charge = (instance.role, instance.promotion_id)
+        if 'first_name' in instance.__dict__ and 'last_name' in instance.__dict__:
+            instance._nom_charge = (instance.first_name, instance.last_name)
+        if 'is_active' in instance.__dict__:
+            instance._actif_charge = instance.is_active
+        return instance
+
     def __str__(self):
         return self.email
\ No newline at end of file
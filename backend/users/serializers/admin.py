@@ -1,9 +1,12 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin, select
 from users.models import User
 
-class UserAdminDetailSerializer(serializers.ModelSerializer) :
+class UserAdminDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer) :
     promotion = serializers.StringRelatedField(read_only = True)
 
+    relations = {'promotion': select('promotion', 'name')}
+
     class Meta : 
         model = User
         fields = [
@@ -2,6 +2,20 @@ from rest_framework import serializers
 from users.models import User
 from academique.models import Promotion
 
+def check_creator_rules(creator, role, promotion_id):
+    """Règles coordonnateur/promotion, partagées avec l'import en masse"""
+    if creator.role == 'COORDON' :
+        if role != 'ETUDIANT' :
+            raise serializers.ValidationError(
+                "Un coordonnateur ne peut créer que des étudiants."
+            )
+        # Valider la promotion si elle est fournie
+        if promotion_id and promotion_id != creator.promotion_id :
+            raise serializers.ValidationError(
+                "Un coordonnateur ne peut créer un étudiant que de sa promotion."
+            )
+
+
 class UserCreateSerializer(serializers.ModelSerializer) :
     password = serializers.CharField(write_only=True, required=False)
     role = serializers.CharField(required=False)  # Optional car passé via .save()
@@ -26,17 +40,8 @@ class UserCreateSerializer(serializers.ModelSerializer) :
         if role is None:
             return attrs
 
-        if creator.role == 'COORDON' :
-            if role != 'ETUDIANT' :
-                raise serializers.ValidationError(
-                    "Un coordonnateur ne peut créer que des étudiants."
-                )
-            # Valider la promotion si elle est fournie
-            promotion = attrs.get('promotion')
-            if promotion and promotion != creator.promotion :
-                raise serializers.ValidationError(
-                    "Un coordonnateur ne peut créer un étudiant que de sa promotion."
-                )
+        promotion = attrs.get('promotion')
+        check_creator_rules(creator, role, promotion.id if promotion else None)
         return attrs
     
     def create(self, validated_data) :
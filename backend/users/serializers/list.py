@@ -1,9 +1,15 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin, select
+from core.projections import one
 from users.models import User
 
-class UserListSerializer(serializers.ModelSerializer) :
+class UserListSerializer(SparseFieldsMixin, serializers.ModelSerializer) :
     promotion = serializers.SerializerMethodField()
 
+    relations = {'promotion': select('promotion', 'id', 'name')}
+    # Lecture par values() (core.projections)
+    projections = {'promotion': one('promotion', 'id', 'name')}
+
     class Meta : 
         model = User
         fields = [
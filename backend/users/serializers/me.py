@@ -1,7 +1,8 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin
 from users.models import User
 
-class UserMeSerializer(serializers.ModelSerializer) :
+class UserMeSerializer(SparseFieldsMixin, serializers.ModelSerializer) :
 
     class Meta :
         model = User
@@ -1,10 +1,13 @@
 from rest_framework import serializers
+from core.fieldsets import SparseFieldsMixin, select
 from users.models import User
 from academique.models import Promotion
 
-class UserPublicSerializer(serializers.ModelSerializer) :
+class UserPublicSerializer(SparseFieldsMixin, serializers.ModelSerializer) :
     promotion = serializers.StringRelatedField()
 
+    relations = {'promotion': select('promotion', 'name')}
+
     class Meta :
         model = User
         fields = [
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import user_cache
+from users.models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_cache_invalider(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
@@ -1,3 +1,200 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.signals import user_login_failed
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from unittest import mock
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from academique.models import Promotion
+from users import login
+from users.authentication import user_cache
+from users.models import User
+from users.tokens import RoleRefreshToken
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """Résolution jeton → utilisateur via le cache partagé"""
+
+    def setUp(self):
+        user_cache.clear()
+        self.promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.user = User.objects.create_user(
+            email='etu@example.com', password='x',
+            first_name='E', last_name='Tu', role='ETUDIANT',
+            promotion=self.promotion,
+        )
+        self.client = APIClient()
+        token = RoleRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def _user_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, [q['sql'] for q in ctx.captured_queries if 'FROM "users_user"' in q['sql']]
+
+    def test_second_request_skips_user_lookup(self):
+        _, first = self._user_queries('/api/academique/promotions/')
+        _, second = self._user_queries('/api/academique/promotions/')
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(second, [])
+
+    def test_user_save_invalidates_cache(self):
+        self._user_queries('/api/auth/users/me/')
+        self.user.first_name = 'Nouveau'
+        self.user.save()
+
+        response, queries = self._user_queries('/api/auth/users/me/')
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data['first_name'], 'Nouveau')
+
+    @override_settings(JWT_STATELESS_USER=True)
+    def test_stateless_mode_authorizes_from_claims(self):
+        _, queries = self._user_queries('/api/academique/horaires/')
+
+        self.assertEqual(queries, [])
+
+    @override_settings(JWT_STATELESS_USER=True)
+    def test_stateless_user_loads_model_for_other_fields(self):
+        response, _ = self._user_queries('/api/auth/users/me/')
+
+        self.assertEqual(response.data['email'], 'etu@example.com')
+        self.assertEqual(response.data['promotion'], self.promotion.id)
+
+
+class LoginCookieViewTests(TestCase):
+    """Connexion par authenticate() et limitation des échecs"""
+
+    url = '/api/auth/login-cookie/'
+
+    def setUp(self):
+        login.failures.clear()
+        self.user = User.objects.create_user(
+            email='admin@example.com', password='secret',
+            first_name='A', last_name='Dmin', role='ADMIN',
+        )
+        self.client = APIClient()
+
+    def test_valid_credentials_set_cookies(self):
+        response = self.client.post(self.url, {'email': 'admin@example.com', 'password': 'secret'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.cookies)
+
+    @override_settings(LOGIN_MAX_FAILURES_PER_ACCOUNT=2)
+    def test_repeated_failures_throttle_without_hashing(self):
+        failed = mock.Mock()
+        user_login_failed.connect(failed)
+        self.addCleanup(user_login_failed.disconnect, failed)
+        for _ in range(2):
+            response = self.client.post(self.url, {'email': 'admin@example.com', 'password': 'faux'})
+            self.assertEqual(response.status_code, 401)
+        self.assertEqual(failed.call_count, 2)
+
+        with mock.patch.object(login, 'check_credentials') as check:
+            response = self.client.post(self.url, {'email': 'admin@example.com', 'password': 'secret'})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        check.assert_not_called()
+
+        # Compteur par (compte, IP) : le propriétaire du compte, ailleurs, n'est pas bloqué
+        response = self.client.post(
+            self.url, {'email': 'admin@example.com', 'password': 'secret'}, REMOTE_ADDR='10.0.0.2',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(LOGIN_MAX_FAILURES_PER_ACCOUNT=2)
+    def test_successful_login_resets_account_failures(self):
+        self.client.post(self.url, {'email': 'admin@example.com', 'password': 'faux'})
+        self.assertEqual(self.client.post(self.url, {'email': 'admin@example.com', 'password': 'secret'}).status_code, 200)
+
+        self.client.post(self.url, {'email': 'admin@example.com', 'password': 'faux'})
+        response = self.client.post(self.url, {'email': 'admin@example.com', 'password': 'secret'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_saturated_gate_returns_503_without_hashing(self):
+        with mock.patch.object(login, '_slots') as slots, mock.patch.object(login, 'authenticate') as auth:
+            slots.acquire.return_value = False
+            response = self.client.post(self.url, {'email': 'admin@example.com', 'password': 'secret'})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        auth.assert_not_called()
+        slots.release.assert_not_called()
+
+    @override_settings(LOGIN_MAX_FAILURES_PER_ACCOUNT=1)
+    def test_forwarded_address_trusted_only_behind_proxies(self):
+        def echec(forwarded):
+            self.client.post(
+                self.url, {'email': 'admin@example.com', 'password': 'faux'},
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=forwarded,
+            )
+
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            echec('192.0.2.1')
+            response = self.client.post(
+                self.url, {'email': 'admin@example.com', 'password': 'secret'},
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='192.0.2.2',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh_reissues_current_claims_and_rejects_inactive(self):
+        self.client.post(self.url, {'email': 'admin@example.com', 'password': 'secret'})
+        self.user.role = 'ETUDIANT'
+        self.user.save()
+
+        for url in ('/api/auth/refresh-cookie/', '/api/auth/token/refresh/'):
+            refresh = self.client.cookies['refresh_token'].value
+            response = self.client.post(url, {'refresh': refresh})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(AccessToken(response.data['access'])['role'], 'ETUDIANT')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.post('/api/auth/refresh-cookie/').status_code, 401)
+        self.assertEqual(self.client.post('/api/auth/token/refresh/', {'refresh': refresh}).status_code, 401)
+
+
+class SparseFieldsetsTests(TestCase):
+    """?fields= réduit les colonnes lues et supprime la jointure sur la promotion"""
+
+    def setUp(self):
+        promotion = Promotion.objects.create(name='B1', annee=2025)
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='x',
+            first_name='Ad', last_name='Min', role='ADMIN',
+        )
+        for i in range(3):
+            User.objects.create_user(
+                email=f'etu{i}@example.com', password='x',
+                first_name='E', last_name=str(i), role='ETUDIANT', promotion=promotion,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _list(self, query=''):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/auth/user/' + query)
+        self.assertEqual(response.status_code, 200)
+        return response.data, [q['sql'] for q in ctx.captured_queries]
+
+    def test_fields_prune_columns_and_joins(self):
+        data, sqls = self._list('?fields=id,first_name')
+
+        self.assertEqual(set(data[0]), {'id', 'first_name'})
+        self.assertEqual(len(sqls), 1)
+        self.assertNotIn('"bio"', sqls[0])
+        self.assertNotIn('JOIN', sqls[0])
+
+    def test_default_list_joins_promotion_once(self):
+        data, sqls = self._list()
+
+        self.assertEqual(len(sqls), 1)
+        self.assertIn('"academique_promotion"', sqls[0])
+        self.assertEqual(data[-1]['promotion']['name'], 'B1')
+        self.assertIn('bio', data[0])
@@ -0,0 +1,50 @@
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import User
+
+
+class RoleRefreshToken(RefreshToken):
+    """Refresh token portant le rôle et la promotion de l'utilisateur.
+
+    Les claims sont copiés dans les access tokens dérivés : en mode
+    JWT_STATELESS_USER, les lectures s'autorisent sans requête sur users.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['promotion_id'] = user.promotion_id
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Rafraîchissement avec des claims relus en base.
+
+    Le nouvel access token ne recopie pas les claims du refresh token : un
+    utilisateur rétrogradé reçoit son rôle courant, un utilisateur
+    désactivé ou supprimé est refusé.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        nouveau = RoleRefreshToken.for_user(user)
+        data = {'access': str(nouveau.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            data['refresh'] = str(nouveau)
+        return data
@@ -1,13 +1,17 @@
-from django.contrib.auth import authenticate
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import RoleRefreshToken, RoleTokenRefreshSerializer
+from users import login
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from users.models import User
 from users.permissions import CanAccessUser
+from core.pagination import paginated_response
+from core.conditional import versioned
+from core.fieldsets import Selection
+from django.utils.decorators import method_decorator
 from users.serializers import (
     UserListSerializer,
     UserCreateSerializer,
@@ -24,12 +28,31 @@ def login_cookie_view(request):
 
     if not email or not password:
         return Response({"error": "Email et mot de passe requis"}, status=400)
-    user = authenticate(request, username=email, password=password)
+
+    # Trop d'échecs récents : refus avant tout calcul de hash
+    if login.is_throttled(email, request):
+        return Response(
+            {"error": "Trop de tentatives, réessayez plus tard"},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(settings.LOGIN_FAILURE_WINDOW)},
+        )
+
+    try:
+        user = login.check_credentials(request, email, password)
+    except login.LoginSaturated:
+        return Response(
+            {"error": "Service de connexion saturé, réessayez"},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+
     if user is None:
+        login.record_failure(email, request)
         return Response({"error": "Identifiants invalides"}, status=401)
+    login.record_success(email, request)
 
-    # # Crée les tokens
-    refresh = RefreshToken.for_user(user)
+    # # Crée les tokens (avec rôle et promotion en claims)
+    refresh = RoleRefreshToken.for_user(user)
     access_token = str(refresh.access_token)
 
     # Réponse JSON avec access token et info user
@@ -75,10 +98,11 @@ def refresh_cookie_view(request):
     if not refresh_token:
         return Response({"error": "Pas de refresh token"}, status=401)
 
+    # Claims (rôle, promotion, droits) relus en base, utilisateur actif exigé
+    serializer = RoleTokenRefreshSerializer(data={'refresh': refresh_token})
     try:
-        refresh = RefreshToken(refresh_token)
-        new_access = str(refresh.access_token)
-        return Response({"access": new_access})
+        serializer.is_valid(raise_exception=True)
+        return Response({"access": serializer.validated_data['access']})
     except Exception:
         return Response({"error": "Refresh token invalide ou expiré"}, status=401)
     
@@ -97,7 +121,7 @@ def logout_cookie_view(request):
 @permission_classes([IsAuthenticated])
 def me_view(request):
     """Endpoint /me pour vérifier l'authentification et obtenir les données utilisateur"""
-    serializer = UserMeSerializer(request.user)
+    serializer = UserMeSerializer(request.user, selection=Selection.from_request(request))
     return Response(serializer.data)
 
 
@@ -112,15 +136,14 @@ class UserListCreateAPIView(APIView):
         elif user.role == 'COORDON' :
             queryset = User.objects.filter(
                 role = 'ETUDIANT',
-                promotion = user.promotion
+                promotion_id = user.promotion_id
             )
         else :
             return Response(
                 {"detail" : "Accès non autorisé."},
                 status=status.HTTP_403_FORBIDDEN
             )
-        serializer = UserListSerializer(queryset, many= True)
-        return Response(serializer.data)
+        return paginated_response(request, queryset, UserListSerializer)
     
     def post(self, request) : 
         user = request.user
@@ -158,7 +181,7 @@ class UserDetailAPIView(APIView):
         self.check_object_permissions(request, user_obj)
 
         serializer_class = self.get_serializer_class(request, user_obj)
-        serializer = serializer_class(user_obj)
+        serializer = serializer_class(user_obj, selection=Selection.from_request(request))
         return Response(serializer.data)
 
     def patch(self, request, pk):
@@ -186,8 +209,9 @@ class UserDetailAPIView(APIView):
 class UserMeAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(versioned('user', variant=lambda request: request.user.id))
     def get(self, request):
-        serializer = UserMeSerializer(request.user)
+        serializer = UserMeSerializer(request.user, selection=Selection.from_request(request))
         return Response(serializer.data)
 
     def patch(self, request):